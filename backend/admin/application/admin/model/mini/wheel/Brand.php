@@ -2,6 +2,7 @@
 
 namespace app\admin\model\mini\wheel;
 
+use app\common\library\CatalogVersion;
 use think\Model;
 
 
@@ -37,6 +38,13 @@ class Brand extends Model
                 $row->getQuery()->where($pk, $row[$pk])->update(['weigh' => $row[$pk]]);
             }
         });
+        // 商品目录变化后递增版本号，使 API 端的匹配结果缓存失效
+        self::afterWrite(function ($row) {
+            CatalogVersion::bump(CatalogVersion::PRODUCT);
+        });
+        self::afterDelete(function ($row) {
+            CatalogVersion::bump(CatalogVersion::PRODUCT);
+        });
     }
 
     
@@ -0,0 +1,42 @@
+<?php
+
+namespace app\common\library;
+
+use think\Env;
+use think\Log;
+
+/**
+ * API 目录缓存 Redis（DB=4，Env redis.catalog_db）
+ *
+ * 后台只做少量写入（目录版本号、规格实时价格/库存），每次调用单独连接，
+ * Redis 不可用时只记录日志，不影响后台保存
+ */
+class CatalogRedis
+{
+    /**
+     * 连接目录缓存库并执行操作
+     * @param callable $callback function (\Redis $redis)
+     * @return mixed|false 回调的返回值，失败返回 false
+     */
+    public static function run(callable $callback)
+    {
+        if (!extension_loaded('redis')) {
+            return false;
+        }
+        try {
+            $redis = new \Redis();
+            $redis->connect(Env::get('redis.host', '127.0.0.1'), (int)Env::get('redis.port', 6379), 1);
+            $password = Env::get('redis.password', '');
+            if ($password !== '') {
+                $redis->auth($password);
+            }
+            $redis->select((int)Env::get('redis.catalog_db', 4));
+            $result = $callback($redis);
+            $redis->close();
+            return $result;
+        } catch (\Exception $e) {
+            Log::write('catalog redis write failed: ' . $e->getMessage(), 'error');
+            return false;
+        }
+    }
+}
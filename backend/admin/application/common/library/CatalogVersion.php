@@ -0,0 +1,40 @@
+<?php
+
+namespace app\common\library;
+
+/**
+ * 目录版本号
+ *
+ * API 端按版本号隔离商品目录相关缓存（Redis DB=4，key: catalog:ver:{catalog}），
+ * 后台修改品牌（mini_wheel_brand，API 的品牌字典与商品详情读取该表）后递增版本号，旧缓存自然失效。
+ *
+ * 注意：API 读取的商品 / 规格表是 mini_product / mini_product_spec，后台的商品 / 规格模型维护的是
+ * mini_wheel_product / mini_wheel_product_spec，不在这里递增版本号；
+ * mini_product / mini_product_spec 变更后在 backend/api 下执行 python -m scripts.refresh_product_catalog
+ */
+class CatalogVersion
+{
+    const PRODUCT = 'product';
+
+    /**
+     * 递增目录版本号（Redis 不可用时只记录日志，不影响后台保存）
+     * @param string $catalog 目录名
+     * @return int|false 新版本号
+     */
+    public static function bump($catalog = self::PRODUCT)
+    {
+        return self::incr('catalog:ver:' . $catalog);
+    }
+
+    /**
+     * 在目录缓存库中递增计数器
+     * @param string $key 键
+     * @return int|false 新值
+     */
+    protected static function incr($key)
+    {
+        return CatalogRedis::run(function ($redis) use ($key) {
+            return $redis->incr($key);
+        });
+    }
+}
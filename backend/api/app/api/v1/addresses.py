@@ -2,12 +2,13 @@
 地址簿 API 路由
 Web 端：Cookie 认证 + CSRF 校验
 """
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from sqlalchemy import select, and_, or_
 from datetime import datetime
-from typing import Optional
-from app.database import get_db, get_table
+from typing import Optional, List, Dict, Any
+from app.config import settings
+from app.database import get_db, get_table, SessionLocal
 from app.api.deps import get_current_user, verify_csrf_token
 from app.core.address_cache import AddressCache
 from app.schemas.address import (
@@ -148,6 +149,86 @@ def set_default_address(
     # 提交事务（由调用者控制）
 
 
+def load_user_addresses(db: Session, user_id: int) -> List[Dict[str, Any]]:
+    """
+    查询用户的全部有效地址（用于重建地址缓存）
+    
+    排序与列表接口一致（默认地址优先），is_default / is_shippable 转换为 bool
+    
+    Args:
+        db: 数据库会话
+        user_id: 用户ID
+    """
+    addresses_table = get_table("mini_user_address")
+    result = db.execute(
+        select(addresses_table)
+        .where(
+            and_(
+                addresses_table.c.user_id == user_id,
+                addresses_table.c.deletetime.is_(None)
+            )
+        )
+        .order_by(addresses_table.c.is_default.desc(), addresses_table.c.createtime.desc())
+    )
+    
+    addresses = []
+    for addr in result.fetchall():
+        addr_dict = dict(addr._mapping)
+        addr_dict['is_default'] = bool(addr_dict.get('is_default'))
+        addr_dict['is_shippable'] = bool(addr_dict.get('is_shippable'))
+        addresses.append(addr_dict)
+    return addresses
+
+
+def rebuild_address_cache(db: Session, user_id: int) -> None:
+    """
+    重建用户的地址缓存哈希（查询失败时退回为失效）
+    
+    Args:
+        db: 数据库会话
+        user_id: 用户ID
+    """
+    try:
+        addresses = load_user_addresses(db, user_id)
+    except Exception:
+        AddressCache.invalidate_user_addresses(user_id)
+        return
+    AddressCache.replace_user_addresses(user_id, addresses)
+
+
+def rebuild_address_cache_task(user_id: int) -> None:
+    """后台任务：使用独立的数据库会话重建地址缓存（请求的会话在响应后关闭）"""
+    db = SessionLocal()
+    try:
+        rebuild_address_cache(db, user_id)
+    finally:
+        db.close()
+
+
+def refresh_address_cache(db: Session, user_id: int, background_tasks: BackgroundTasks) -> None:
+    """
+    写操作提交后刷新地址缓存（按 ADDRESS_CACHE_WRITE_MODE）
+    
+    保存后前端会立即重新拉取地址列表，写穿透使这次读取直接命中缓存：
+    - sync: 在本请求内查询用户全部地址并整体替换缓存哈希（多一条查询）
+    - background: 先失效，响应发出后由后台任务重建（重建完成前的读取回源数据库）
+    - off: 只失效
+    
+    Args:
+        db: 数据库会话（已提交）
+        user_id: 用户ID
+        background_tasks: 请求的后台任务
+    """
+    mode = settings.ADDRESS_CACHE_WRITE_MODE
+    if mode == "sync":
+        rebuild_address_cache(db, user_id)
+        return
+    
+    AddressCache.invalidate_user_addresses(user_id)
+    if mode == "background":
+        background_tasks.add_task(rebuild_address_cache_task, user_id)
+
+
 @router.get("", response_model=AddressListResponse, summary="获取地址列表")
 async def get_addresses(
     address_type: Optional[str] = None,
@@ -272,6 +353,7 @@ async def get_address(
 @router.post("", response_model=AddressResponse, status_code=status.HTTP_201_CREATED, summary="创建地址")
 async def create_address(
     request: AddressCreate,
+    background_tasks: BackgroundTasks,
     current_user: dict = Depends(get_current_user),
     db: Session = Depends(get_db),
     _: None = Depends(verify_csrf_token),  # CSRF 校验
@@ -378,8 +460,8 @@ async def create_address(
     if 'is_shippable' in address_dict:
         address_dict['is_shippable'] = bool(address_dict['is_shippable'])
     
-    # 失效相关缓存（创建地址后）
-    AddressCache.invalidate_user_addresses(user_id)
+    # 刷新相关缓存（创建地址后，写穿透）
+    refresh_address_cache(db, user_id, background_tasks)
     
     return AddressResponse(**address_dict)
 
@@ -388,6 +470,7 @@ async def create_address(
 async def update_address(
     address_id: int,
     request: AddressUpdate,
+    background_tasks: BackgroundTasks,
     current_user: dict = Depends(get_current_user),
     db: Session = Depends(get_db),
     _: None = Depends(verify_csrf_token),  # CSRF 校验
@@ -497,8 +580,8 @@ async def update_address(
     updated_address = result.fetchone()
     address_dict = dict(updated_address._mapping)
     
-    # 失效相关缓存（更新地址后）
-    AddressCache.invalidate_user_addresses(user_id)
+    # 刷新相关缓存（更新地址后，写穿透）
+    refresh_address_cache(db, user_id, background_tasks)
     
     return AddressResponse(**address_dict)
 
@@ -506,6 +589,7 @@ async def update_address(
 @router.post("/{address_id}/set-default", response_model=AddressResponse, summary="设置默认地址")
 async def set_default(
     address_id: int,
+    background_tasks: BackgroundTasks,
     current_user: dict = Depends(get_current_user),
     db: Session = Depends(get_db),
     _: None = Depends(verify_csrf_token),  # CSRF 校验
@@ -560,8 +644,8 @@ async def set_default(
     if 'is_shippable' in address_dict:
         address_dict['is_shippable'] = bool(address_dict['is_shippable'])
     
-    # 失效相关缓存（设置默认地址后）
-    AddressCache.invalidate_user_addresses(user_id)
+    # 刷新相关缓存（设置默认地址后，写穿透）
+    refresh_address_cache(db, user_id, background_tasks)
     
     return AddressResponse(**address_dict)
 
@@ -569,6 +653,7 @@ async def set_default(
 @router.delete("/{address_id}", status_code=status.HTTP_204_NO_CONTENT, summary="删除地址（软删除）")
 async def delete_address(
     address_id: int,
+    background_tasks: BackgroundTasks,
     current_user: dict = Depends(get_current_user),
     db: Session = Depends(get_db),
     _: None = Depends(verify_csrf_token),  # CSRF 校验
@@ -623,8 +708,8 @@ async def delete_address(
     
     db.commit()
     
-    # 失效相关缓存（删除地址后）
-    AddressCache.invalidate_user_addresses(user_id)
+    # 刷新相关缓存（删除地址后，写穿透）
+    refresh_address_cache(db, user_id, background_tasks)
     
     return None
 
@@ -2,231 +2,386 @@
 商品 API 路由
 游客可访问，无需鉴权（GET 请求）
 """
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from sqlalchemy import select, and_, or_, func, distinct
-from typing import Optional, List
+from typing import Optional, List, Dict, Tuple
 from decimal import Decimal
+import json
 from app.database import get_db, get_table
-from app.schemas.shop import WheelsListResponse, WheelProductResponse, WheelSpecResponse
+from app.schemas.shop import (
+    WheelsListResponse,
+    WheelProductResponse,
+    WheelSpecResponse,
+    WheelFacetBucket,
+    WheelFacetsResponse,
+    WheelProductDetailResponse,
+)
+from app.core.wheel_fitment import parse_pcd
+from app.core.vehicle_catalog import vehicle_catalog
+from app.core.fitment_store import load_fitment_payload
+from app.core.fitment_class import AxleTargets, resolve_axle_targets, is_staggered
+from app.core.wheel_search import wheel_search, WheelFilter, DEFAULT_SORT, SORT_MODES
+from app.core.wheel_result_cache import WheelResultCache
+from app.core.brand_dictionary import brand_dictionary
+from app.core.spec_overlay import apply_spec_overlay
+from app.core.product_detail import ProductDetailCache, load_product_detail, find_product_id_by_slug
+from app.core.pagination import encode_cursor, decode_cursor
 
 router = APIRouter()
 
 
-def parse_pcd(pcd_str: Optional[str]) -> Optional[tuple]:
+def load_wheel_products(
+    db: Session,
+    groups: List[Tuple[int, List[int]]],
+    axles: Optional[Dict[int, str]] = None,
+) -> List[WheelProductResponse]:
     """
-    解析 PCD 字符串（如 "5x114.3"）为 (lugs, mm)
+    按搜索结果加载本页商品及匹配的规格（2 条主键查询，与页大小无关；品牌名来自进程内品牌字典）
     
+    Args:
+        db: 数据库会话
+        groups: 搜索引擎返回的 [(product_id, [spec_id, ...]), ...]
+        axles: staggered 筛选时规格适配的车轴 spec_id -> "front" / "rear" / "both"
+        
     Returns:
-        (lugs: int, mm: float) 或 None
+        商品列表（顺序与 groups 一致）
     """
-    if not pcd_str:
-        return None
+    if not groups:
+        return []
     
-    import re
-    match = re.match(r'(\d+)x([\d.]+)', pcd_str.replace('×', 'x').replace('X', 'x'))
-    if match:
-        return (int(match.group(1)), float(match.group(2)))
-    return None
-
-
-def parse_diameter(diameter_str: Optional[str]) -> Optional[int]:
-    """
-    解析直径字符串（如 "18\""）为整数
+    products_table = get_table("mini_product")
+    specs_table = get_table("mini_product_spec")
     
-    Returns:
-        int 或 None
-    """
-    if not diameter_str:
-        return None
+    product_ids = [product_id for product_id, _ in groups]
+    spec_ids = [spec_id for _, group_spec_ids in groups for spec_id in group_spec_ids]
+    
+    product_rows = {
+        row.id: row
+        for row in db.execute(
+            select(products_table).where(products_table.c.id.in_(product_ids))
+        ).fetchall()
+    }
+    spec_rows = {
+        row.id: row
+        for row in db.execute(
+            select(specs_table).where(specs_table.c.id.in_(spec_ids))
+        ).fetchall()
+    }
+    
+    brands = brand_dictionary.get(db)
+    
+    products = []
+    for product_id, group_spec_ids in groups:
+        product_row = product_rows.get(product_id)
+        if product_row is None:
+            continue
+        
+        specs = [
+            WheelSpecResponse(
+                spec_id=spec_row.id,
+                size=spec_row.size,
+                diameter=spec_row.diameter,
+                width=spec_row.width,
+                pcd=spec_row.pcd,
+                offset=spec_row.offset,
+                center_bore=spec_row.center_bore,
+                price=spec_row.price,
+                stock=spec_row.stock or 0,
+                axle=axles.get(spec_row.id) if axles else None,
+            )
+            for spec_row in (spec_rows.get(spec_id) for spec_id in group_spec_ids)
+            if spec_row is not None
+        ]
+        
+        # 如果商品有匹配的规格，才添加到结果中
+        if specs:
+            brand = brands.get(product_row.brand_id)
+            products.append(WheelProductResponse(
+                product_id=product_row.id,
+                name=product_row.name,
+                brand_id=product_row.brand_id,
+                brand_name=brand.name if brand is not None else None,
+                image=product_row.image,
+                sale_price=product_row.sale_price,
+                original_price=product_row.original_price,
+                price_per=product_row.price_per,
+                stock=product_row.stock or 0,
+                status=product_row.status,
+                specs=specs,
+            ))
     
-    import re
-    match = re.search(r'(\d+)', diameter_str)
-    if match:
-        return int(match.group(1))
-    return None
+    return products
 
 
-@router.get("/wheels", response_model=WheelsListResponse, summary="获取轮毂商品列表")
-async def get_wheels(
+def resolve_wheel_filter(
     vehicle_id: Optional[str] = Query(None, description="车辆ID（优先，用于匹配 fitment）"),
     profile_id: Optional[int] = Query(None, description="Wheel Profile ID（已废弃，保留兼容）"),
     engine_id: Optional[int] = Query(None, description="发动机ID（已废弃，保留兼容）"),
     pcd: Optional[str] = Query(None, description="PCD（如 5x114.3）"),
     diameter: Optional[int] = Query(None, description="轮毂直径（英寸，如 18）"),
-    page: int = Query(1, ge=1, description="页码"),
-    page_size: int = Query(20, ge=1, le=100, description="每页数量"),
+    width: Optional[float] = Query(None, gt=0, description="轮毂宽度（英寸，如 8.5）"),
+    brand_id: Optional[int] = Query(None, description="品牌ID"),
+    finish: Optional[str] = Query(None, max_length=100, description="涂装名称（如 Gloss Black）"),
+    tag_id: Optional[int] = Query(None, description="标签ID"),
+    offset_min: Optional[float] = Query(None, description="最小偏距（ET，毫米）"),
+    offset_max: Optional[float] = Query(None, description="最大偏距（ET，毫米）"),
+    center_bore_min: Optional[float] = Query(None, gt=0, description="最小中心孔（毫米）"),
+    price_min: Optional[float] = Query(None, ge=0, description="最低价格"),
+    price_max: Optional[float] = Query(None, ge=0, description="最高价格"),
     db: Session = Depends(get_db)
-):
+) -> WheelFilter:
     """
-    获取轮毂商品列表
+    解析轮毂筛选参数（/wheels 与 /wheels/facets 共用）
     
     支持筛选：
-    - vehicle_id: 根据车辆ID匹配 fitment（推荐，从 mini_vehicle_detail 推导 pcd/diameter）
-    - pcd: PCD 精确匹配
-    - diameter: 直径匹配
+    - vehicle_id: 根据车辆ID匹配 fitment（推荐，从 mini_vehicle_detail 推导 pcd / 直径 / 宽度 / 偏距 / 中心孔）
+    - pcd: PCD 匹配（螺栓数精确匹配 + 孔距毫米容差匹配，支持 "5x114.3" / "5×4.5" 等写法）
+    - diameter / width / brand_id / finish / tag_id: 精确匹配
+    - offset_min / offset_max / center_bore_min / price_min / price_max: 范围匹配
     
-    如果提供了 vehicle_id，会从 mini_vehicle_detail 获取 fitment 参数并自动匹配商品规格
+    如果提供了 vehicle_id，会从 Fitment 文档获取各车轴的兼容条件（显式传入的参数优先）：
+    pcd、直径、偏距区间（min/max_offset，缺失时为 OEM 偏距 ± 容差）、宽度区间（OEM 宽度 ± 容差）、
+    最小中心孔（车辆中心孔）。区间在进程内搜索引擎中用范围索引 / 宽度位图筛选，结果直接分页，无需客户端再过滤。
+    staggered 车辆（前后轮规格不同）附加后轴条件，只返回前后轴都有匹配规格的商品：
+    后轴使用与前轴相同的 PCD，其余条件取后轴 OEM 参数，显式传入的 diameter / width 只作用于前轴
     """
-    products_table = get_table("mini_product")
-    specs_table = get_table("mini_product_spec")
-    detail_table = get_table("mini_vehicle_detail")
-    
-    # 如果提供了 vehicle_id，先获取 fitment 参数
-    target_pcd = pcd
-    target_diameter = diameter
+    front = rear = None
     
     if vehicle_id:
-        # 查询指定的 vehicle_detail
-        detail_result = db.execute(
-            select(detail_table)
-            .where(detail_table.c.vehicle_id == vehicle_id)
-            .limit(1)
-        )
-        detail_row = detail_result.fetchone()
+        # Fitment 文档（物化的 Fitment Store，未命中时查 mini_vehicle_detail）
+        payload = load_fitment_payload(db, vehicle_catalog.get_version(), vehicle_id)
         
-        if detail_row:
-            # 提取 PCD（优先用 front，如果没有则用 rear）
-            if not target_pcd:
-                target_pcd = detail_row.bolt_pattern_front or detail_row.bolt_pattern_rear
-            
-            # 提取直径（从 rim_diameter_front）
-            if not target_diameter and detail_row.rim_diameter_front:
-                target_diameter = parse_diameter(detail_row.rim_diameter_front)
-    
-    # 构建查询条件
-    conditions = [
-        products_table.c.status == "normal",  # 只查询正常状态的商品
-    ]
-    
-    # 查询商品规格（用于筛选）
-    spec_conditions = [
-        specs_table.c.status == "normal",  # 只查询正常状态的规格
-    ]
-    
-    # PCD 匹配（字符串匹配，支持多种格式）
-    if target_pcd:
-        # 标准化 PCD 格式（统一为 "5x114.3" 格式）
-        normalized_pcd = target_pcd.replace('×', 'x').replace('X', 'x').strip()
-        # 支持多种格式匹配（如 "5x114.3", "5×114.3", "5X114.3"）
-        spec_conditions.append(
-            or_(
-                specs_table.c.pcd == normalized_pcd,
-                specs_table.c.pcd == normalized_pcd.replace('x', '×'),
-                specs_table.c.pcd == normalized_pcd.replace('x', 'X'),
-                specs_table.c.pcd.like(f"%{normalized_pcd}%"),  # 模糊匹配
-            )
+        if payload is not None:
+            document = json.loads(payload)
+            front = resolve_axle_targets(document, "front")
+            if is_staggered(document):
+                rear = resolve_axle_targets(document, "rear")
+    
+    # PCD 归一化为 (螺栓数, 孔距毫米)
+    pcd_value = parse_pcd(pcd or (front.pcd if front else None))
+    if pcd is not None and pcd_value is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="PCD 格式无效（示例：5x114.3）"
         )
     
-    # 直径匹配（从 diameter 字段提取数字）
-    if target_diameter:
-        # 匹配 diameter 字段中包含目标直径的规格（如 "18\"" 匹配 18）
-        spec_conditions.append(
-            specs_table.c.diameter.like(f"%{target_diameter}%")
+    def axle_filter(targets: Optional[AxleTargets], axle_diameter: Optional[int], axle_width: Optional[float]) -> WheelFilter:
+        return WheelFilter(
+            pcd=pcd_value,
+            diameter=axle_diameter or (targets.diameter if targets else None) or None,
+            width=axle_width,
+            brand_id=brand_id,
+            finish=finish,
+            tag_id=tag_id,
+            width_min=None if axle_width is not None else (targets.width_min if targets else None),
+            width_max=None if axle_width is not None else (targets.width_max if targets else None),
+            offset_min=offset_min if offset_min is not None else (targets.offset_min if targets else None),
+            offset_max=offset_max if offset_max is not None else (targets.offset_max if targets else None),
+            center_bore_min=center_bore_min if center_bore_min is not None else (targets.center_bore_min if targets else None),
+            price_min=price_min,
+            price_max=price_max,
         )
     
-    # 查询符合条件的规格ID列表
-    spec_ids_result = db.execute(
-        select(distinct(specs_table.c.product_id))
-        .where(and_(*spec_conditions))
-    )
-    spec_product_ids = [row[0] for row in spec_ids_result.fetchall()]
-    
-    if not spec_product_ids:
-        # 没有匹配的规格，返回空列表
-        return WheelsListResponse(
-            items=[],
-            total=0,
-            page=page,
-            page_size=page_size,
+    wheel_filter = axle_filter(front, diameter, width)
+    if rear is not None:
+        wheel_filter.rear = axle_filter(rear, None, None)
+    return wheel_filter
+
+
+@router.get("/wheels", response_model=WheelsListResponse, summary="获取轮毂商品列表")
+async def get_wheels(
+    wheel_filter: WheelFilter = Depends(resolve_wheel_filter),
+    page: int = Query(1, ge=1, description="页码"),
+    page_size: int = Query(20, ge=1, le=100, description="每页数量"),
+    cursor: Optional[str] = Query(None, description="分页游标（上一页返回的 next_cursor，传入时忽略 page）"),
+    sort: str = Query(
+        DEFAULT_SORT,
+        description="排序：default（推荐顺序）/ price_asc / price_desc / newest / best_selling / stock"
+    ),
+    db: Session = Depends(get_db)
+):
+    """
+    获取轮毂商品列表
+    
+    筛选参数见 resolve_wheel_filter（vehicle_id、pcd、diameter、width、brand_id、finish、
+    tag_id、偏距 / 中心孔 / 价格范围）
+    
+    分页：
+    - page / page_size：偏移分页
+    - cursor：游标（keyset）分页，按 (weigh, createtime, id) 定位上一页最后一个商品，
+      深页与首页代价相同；每页响应都带 next_cursor（最后一页为 null），可从任意一页切换到游标分页
+    - total 为当前筛选条件的商品总数，随筛选得到并按筛选键缓存，不执行 COUNT
+    
+    排序：default 按后台权重（weigh, createtime）；其余排序方式由快照中预先生成的商品排列提供，
+    按排列顺序跳过不匹配的商品取页，不在数据库排序（游标与排序方式绑定）
+    
+    整页结果按（归一化筛选条件, sort, page 或 cursor, page_size）缓存在 Redis，键按商品目录版本号隔离，
+    命中时只做一次 GET（vehicle_id 先解析为筛选条件，同一适配参数的车辆共享缓存）。
+    规格的 price / stock 在返回前由实时覆盖层（一次 HMGET）替换，价格、库存变化不使缓存失效；
+    覆盖层没有本页规格时原样返回缓存的 JSON。
+    
+    未命中时在进程内轮毂搜索引擎（位图索引）中筛选，总数随筛选顺带得到；
+    只有本页商品和规格需要查询数据库（2 条主键查询）
+    """
+    if sort != DEFAULT_SORT and sort not in SORT_MODES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="不支持的排序方式"
         )
     
-    # 添加商品ID条件
-    conditions.append(products_table.c.id.in_(spec_product_ids))
+    try:
+        # 游标值：默认排序为 [weigh, createtime, id]，其余为 [sort, 排序字段值, weigh, createtime, id]
+        after = decode_cursor(cursor, 3 if sort == DEFAULT_SORT else 5)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="分页游标无效"
+        )
+    # 缓存键中的分页位置（游标重新编码为规范形式）
+    position = str(page) if after is None else f"c{encode_cursor(after)}"
     
-    # 查询商品总数
-    count_result = db.execute(
-        select(func.count(products_table.c.id))
-        .where(and_(*conditions))
-    )
-    total = count_result.scalar() or 0
-    
-    # 查询商品列表（分页）
-    offset = (page - 1) * page_size
-    products_result = db.execute(
-        select(products_table)
-        .where(and_(*conditions))
-        .order_by(products_table.c.weigh.desc(), products_table.c.createtime.desc())
-        .limit(page_size)
-        .offset(offset)
-    )
+    filter_key = wheel_filter.key()
+    version = wheel_search.get_version()
+    payload = WheelResultCache.get(version, filter_key, sort, position, page_size)
+    if payload is not None:
+        return Response(content=apply_spec_overlay(payload, version, "items"), media_type="application/json")
     
-    products = []
-    for product_row in products_result.fetchall():
-        # 查询该商品的所有规格
-        specs_result = db.execute(
-            select(specs_table)
-            .where(
-                and_(
-                    specs_table.c.product_id == product_row.id,
-                    specs_table.c.status == "normal"
-                )
+    snapshot = await run_in_threadpool(wheel_search.get, db)
+    bitmap, total = snapshot.match(wheel_filter)
+    try:
+        if sort != DEFAULT_SORT:
+            groups, next_values = snapshot.sorted_page(
+                wheel_filter, sort, (page - 1) * page_size, page_size, after
             )
-            .order_by(specs_table.c.weigh.desc(), specs_table.c.createtime.desc())
+        elif after is None:
+            groups, next_values = snapshot.page(bitmap, (page - 1) * page_size, page_size)
+        else:
+            groups, next_values = snapshot.page_after(bitmap, after, page_size)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="分页游标无效"
         )
-        
-        specs = []
-        for spec_row in specs_result.fetchall():
-            # 检查规格是否匹配筛选条件
-            spec_matches = True
-            
-            if target_pcd:
-                normalized_pcd = target_pcd.replace('×', 'x').replace('X', 'x').strip()
-                spec_pcd = spec_row.pcd or ""
-                if normalized_pcd not in spec_pcd.replace('×', 'x').replace('X', 'x'):
-                    spec_matches = False
-            
-            if target_diameter and spec_matches:
-                spec_diameter = parse_diameter(spec_row.diameter)
-                if spec_diameter != target_diameter:
-                    spec_matches = False
-            
-            # 只包含匹配的规格
-            if spec_matches:
-                specs.append(WheelSpecResponse(
-                    spec_id=spec_row.id,
-                    size=spec_row.size,
-                    diameter=spec_row.diameter,
-                    width=spec_row.width,
-                    pcd=spec_row.pcd,
-                    offset=spec_row.offset,
-                    center_bore=spec_row.center_bore,
-                    price=spec_row.price,
-                    stock=spec_row.stock or 0,
-                ))
-        
-        # 如果商品有匹配的规格，才添加到结果中
-        if specs:
-            products.append(WheelProductResponse(
-                product_id=product_row.id,
-                name=product_row.name,
-                brand_id=product_row.brand_id,
-                brand_name=None,  # 可以后续 JOIN brand 表获取
-                image=product_row.image,
-                sale_price=product_row.sale_price,
-                original_price=product_row.original_price,
-                price_per=product_row.price_per,
-                stock=product_row.stock or 0,
-                status=product_row.status,
-                specs=specs,
-            ))
     
-    return WheelsListResponse(
-        items=products,
+    axles = snapshot.spec_axles(wheel_filter, groups) if wheel_filter.rear is not None else None
+    
+    payload = WheelsListResponse(
+        items=load_wheel_products(db, groups, axles),
+        staggered=wheel_filter.rear is not None,
         total=total,
         page=page,
         page_size=page_size,
+        next_cursor=encode_cursor(next_values) if next_values is not None else None,
+    ).model_dump_json()
+    # 按生成结果的快照版本写入（快照尚在重建时写入旧版本的键，不会污染新版本）
+    WheelResultCache.set(snapshot.version, filter_key, sort, position, page_size, payload)
+    
+    return Response(content=apply_spec_overlay(payload, version, "items"), media_type="application/json")
+
+
+@router.get("/wheels/facets", response_model=WheelFacetsResponse, summary="获取轮毂筛选分面计数")
+async def get_wheel_facets(
+    wheel_filter: WheelFilter = Depends(resolve_wheel_filter),
+    db: Session = Depends(get_db)
+):
+    """
+    获取轮毂筛选分面计数（筛选侧边栏）
+    
+    参数与 /wheels 相同。返回当前筛选条件下每个直径 / 宽度 / 品牌 / 涂装取值的商品数：
+    每个分面不受自身条件限制（已选 18 寸时，直径分面仍返回 17、19 寸的数量），其余条件照常生效。
+    
+    计数在轮毂搜索引擎内遍历一次匹配位图得到，不查询数据库；结果按归一化筛选键在快照内缓存。
+    """
+    snapshot = await run_in_threadpool(wheel_search.get, db)
+    _, total = snapshot.match(wheel_filter)
+    facets = snapshot.facets(wheel_filter)
+    brands = await run_in_threadpool(brand_dictionary.get, db)
+    
+    return WheelFacetsResponse(
+        total=total,
+        diameter=[WheelFacetBucket(value=value, count=count) for value, count in facets["diameter"]],
+        width=[WheelFacetBucket(value=value, count=count) for value, count in facets["width"]],
+        brand=[
+            WheelFacetBucket(
+                value=value,
+                label=brands[value].name if value in brands else None,
+                count=count,
+            )
+            for value, count in facets["brand_id"]
+        ],
+        finish=[WheelFacetBucket(value=value, count=count) for value, count in facets["finish"]],
     )
 
 
+def product_detail_response(db: Session, product_id: int) -> Response:
+    """
+    商品详情 JSON 响应（先查按商品缓存的文档，未命中时组装并回填）
+    
+    阻塞调用（Redis / 数据库），async 接口通过 run_in_threadpool 调用
+    
+    Raises:
+        HTTPException: 商品不存在或不可见（404）
+    """
+    version = wheel_search.get_version()
+    payload, stamp = ProductDetailCache.get(version, product_id)
+    if payload is None:
+        detail = load_product_detail(db, product_id)
+        if detail is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="商品不存在"
+            )
+        payload = detail.model_dump_json()
+        ProductDetailCache.set(stamp, product_id, payload)
+    
+    return Response(content=apply_spec_overlay(payload, version), media_type="application/json")
 
+
+def product_detail_by_slug_response(db: Session, slug: str) -> Response:
+    """
+    按 slug 的商品详情 JSON 响应（slug -> 商品ID 先查缓存，未命中时查询并回填）
+    
+    阻塞调用（Redis / 数据库），async 接口通过 run_in_threadpool 调用
+    
+    Raises:
+        HTTPException: 商品不存在（404）
+    """
+    version = wheel_search.get_version()
+    product_id = ProductDetailCache.get_product_id(version, slug)
+    if product_id is None:
+        product_id = find_product_id_by_slug(db, slug)
+        if product_id is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="商品不存在"
+            )
+        ProductDetailCache.set_product_id(version, slug, product_id)
+    return product_detail_response(db, product_id)
+
+
+@router.get("/wheels/slug/{slug}", response_model=WheelProductDetailResponse, summary="按 slug 获取轮毂商品详情")
+async def get_wheel_detail_by_slug(
+    slug: str,
+    db: Session = Depends(get_db)
+):
+    """
+    按 URL 别名获取轮毂商品详情（slug -> 商品ID 缓存在 Redis，未命中时经索引查出；之后与按 ID 查询共用缓存）
+    """
+    return await run_in_threadpool(product_detail_by_slug_response, db, slug)
+
+
+@router.get("/wheels/{product_id}", response_model=WheelProductDetailResponse, summary="获取轮毂商品详情")
+async def get_wheel_detail(
+    product_id: int,
+    db: Session = Depends(get_db)
+):
+    """
+    获取轮毂商品详情（商品、全部上架规格、品牌、标签、图集）
+    
+    组装固定 4 条查询；序列化后的 JSON 按商品缓存在 Redis，
+    mini_product / mini_product_spec 变更后由 scripts/refresh_product_catalog.py 递增版本号使缓存失效，命中时只做一次 MGET；
+    规格的 price / stock 在返回前由实时覆盖层替换
+    """
+    return await run_in_threadpool(product_detail_response, db, product_id)
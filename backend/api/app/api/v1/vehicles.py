@@ -1,191 +1,231 @@
 """
 车辆数据 API 路由（基于 raw 表结构）
 游客可访问，无需鉴权（GET 请求）
+
+目录类 GET 接口（years/makes/models/tree/vehicles/search/fitment）的数据只随 ETL 变化：
+响应带 ETag（基于车辆目录版本号）和 Cache-Control: public, max-age，
+If-None-Match 命中时直接返回 304，不访问数据库
+
+models/vehicles 结果集可能很大：支持游标分页（limit + cursor，下一页游标在
+X-Next-Cursor 响应头）和流式 JSON（stream=true），内存占用与结果集大小无关
 """
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from sqlalchemy import select, and_, func, distinct
-from typing import Optional, List
+from sqlalchemy import select, and_, or_, func, distinct
+from typing import Optional, List, Dict, Tuple
+from app.config import settings
 from app.database import get_db, get_table
 from app.schemas.vehicle import (
     YearResponse,
     MakeResponse,
     ModelResponse,
+    VehicleTreeResponse,
     VehicleResponse,
+    VehicleSearchResponse,
+    VEHICLE_SEARCH_MAX_LIMIT,
     FitmentResponse,
-    FitmentOEM,
+    FitmentBatchRequest,
+    FitmentBatchResponse,
+)
+from app.core.vehicle_catalog import vehicle_catalog, VEHICLE_CATALOG
+from app.core.vehicle_search import vehicle_search
+from app.core.vehicle_tree import vehicle_tree
+from app.core.http_cache import check_not_modified
+from app.core.pagination import (
+    NEXT_CURSOR_HEADER,
+    STREAM_CHUNK_SIZE,
+    encode_cursor,
+    decode_cursor,
+    stream_json_array,
 )
-import re
+from app.core.fitment_store import (
+    FitmentStore,
+    build_fitment_document,
+    serialize_fitment,
+    load_fitment_payload,
+)
+import json
 
 router = APIRouter()
 
+# 游标分页单页最大数量
+PAGE_MAX_LIMIT = 500
+
+
+def check_catalog_not_modified(request: Request) -> Tuple[Dict[str, str], bool]:
+    """
+    车辆目录条件请求校验（ETag 基于车辆目录版本号，不访问数据库）
+    
+    Returns:
+        (headers, not_modified)：headers 包含 ETag 和 Cache-Control
+    """
+    return check_not_modified(
+        request,
+        vehicle_catalog.get_version(),
+        VEHICLE_CATALOG,
+        settings.VEHICLE_CATALOG_MAX_AGE,
+    )
+
+
+def parse_cursor(cursor: Optional[str], size: int) -> Optional[list]:
+    """解码分页游标，格式无效时返回 400"""
+    try:
+        return decode_cursor(cursor, size)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="分页游标无效"
+        )
+
 
 @router.get("/years", response_model=List[YearResponse], summary="获取年份列表")
 async def get_years(
+    request: Request,
+    response: Response,
     db: Session = Depends(get_db)
 ):
     """
-    获取所有可用年份列表（从 mini_vehicle_year）
+    获取所有可用年份列表（从车辆目录快照，不访问数据库）
     """
-    years_table = get_table("mini_vehicle_year")
-    
-    result = db.execute(
-        select(years_table)
-        .order_by(years_table.c.year.desc())
-    )
+    headers, not_modified = check_catalog_not_modified(request)
+    if not_modified:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    response.headers.update(headers)
     
-    years = []
-    for row in result.fetchall():
-        years.append({
-            "id": row.id,
-            "year": row.year,
-        })
-    
-    return years
+    snapshot = await run_in_threadpool(vehicle_catalog.get, db)
+    return snapshot.years()
 
 
 @router.get("/makes", response_model=List[MakeResponse], summary="获取品牌列表")
 async def get_makes(
+    request: Request,
+    response: Response,
     year: Optional[int] = Query(None, description="年份（可选，用于过滤）"),
     db: Session = Depends(get_db)
 ):
     """
-    获取品牌列表
+    获取品牌列表（从车辆目录快照，不访问数据库）
     
-    如果提供了 year 参数，按源库逻辑返回该年份的 makes（从 mini_vehicle_make 直接过滤 year_id）
+    如果提供了 year 参数，按源库逻辑返回该年份的 makes（mini_vehicle_make 按 year_id 分组）
     """
-    makes_table = get_table("mini_vehicle_make")
-    years_table = get_table("mini_vehicle_year")
-    
-    if year:
-        # 先找到 year_id
-        year_result = db.execute(
-            select(years_table.c.id)
-            .where(years_table.c.year == year)
-            .limit(1)
-        )
-        year_row = year_result.fetchone()
-        if not year_row:
-            # #region agent log
-            print(f"[DEBUG] get_makes: year {year} not found in years table")
-            # #endregion
-            return []  # 该年份不存在
-        
-        year_id = year_row.id
-        # #region agent log
-        print(f"[DEBUG] get_makes: year {year} -> year_id {year_id}")
-        # #endregion
-
-        result = db.execute(
-            select(makes_table)
-            .where(makes_table.c.year_id == year_id)
-            .order_by(makes_table.c.make_name.asc())
-        )
-    else:
-        # 返回所有品牌
-        result = db.execute(
-            select(makes_table)
-            .order_by(makes_table.c.make_name.asc())
-        )
-    
-    makes = []
-    for row in result.fetchall():
-        makes.append({
-            "id": row.make_id,
-            "name": row.make_name,
-        })
+    headers, not_modified = check_catalog_not_modified(request)
+    if not_modified:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    response.headers.update(headers)
     
-    # #region agent log
-    print(f"[DEBUG] get_makes: year={year}, makes_count={len(makes)}, first_make={makes[0] if makes else None}")
-    # #endregion
-    
-    return makes
+    snapshot = await run_in_threadpool(vehicle_catalog.get, db)
+    return snapshot.makes(year)
 
 
 @router.get("/models", response_model=List[ModelResponse], summary="获取型号列表")
 async def get_models(
+    request: Request,
+    response: Response,
     make_id: int = Query(..., description="品牌ID"),
     year: Optional[int] = Query(None, description="年份（可选，用于过滤）"),
+    limit: Optional[int] = Query(None, ge=1, le=PAGE_MAX_LIMIT, description="每页数量（可选，提供时启用游标分页）"),
+    cursor: Optional[str] = Query(None, description="分页游标（上一页响应头 X-Next-Cursor）"),
+    stream: bool = Query(False, description="流式返回剩余全部结果（忽略 limit）"),
     db: Session = Depends(get_db)
 ):
     """
-    根据品牌ID获取型号列表
+    根据品牌ID获取型号列表（从车辆目录快照，不访问数据库）
+    
+    如果提供了 year 参数，按源库逻辑返回该年份+品牌下的 models（mini_vehicle_model 按 year_id+make_id 分组）
+    未提供 year 时：返回所有年份下该 make_id 的 models（可能较多，建议使用 limit/cursor 或 stream）
     
-    如果提供了 year 参数，按源库逻辑返回该年份+品牌下的 models（从 mini_vehicle_model 直接过滤 year_id+make_id）
+    游标分页按 (year_id DESC, model_name, model_id) 定位，下一页游标在 X-Next-Cursor 响应头
     """
-    models_table = get_table("mini_vehicle_model")
-    years_table = get_table("mini_vehicle_year")
-
-    if year:
-        # 先找到 year_id
-        year_result = db.execute(
-            select(years_table.c.id)
-            .where(years_table.c.year == year)
-            .limit(1)
-        )
-        year_row = year_result.fetchone()
-        if not year_row:
-            return []  # 该年份不存在
-        
-        year_id = year_row.id
-        result = db.execute(
-            select(models_table)
-            .where(
-                and_(
-                    models_table.c.year_id == year_id,
-                    models_table.c.make_id == make_id
-                )
-            )
-            .order_by(models_table.c.model_name.asc())
+    headers, not_modified = check_catalog_not_modified(request)
+    if not_modified:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    
+    snapshot = await run_in_threadpool(vehicle_catalog.get, db)
+    after = parse_cursor(cursor, 3)
+    try:
+        rows = snapshot.model_rows(make_id, year, after)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="分页游标无效"
         )
-    else:
-        # 未提供 year 时：返回所有年份下该 make_id 的 models（可能较多）
-        result = db.execute(
-            select(models_table)
-            .where(models_table.c.make_id == make_id)
-            .order_by(models_table.c.year_id.desc(), models_table.c.model_name.asc())
+    
+    if stream:
+        return StreamingResponse(
+            stream_json_array(snapshot.model_item(i) for i in rows),
+            media_type="application/json",
+            headers=headers,
         )
     
-    models = []
-    for row in result.fetchall():
-        models.append({
-            "id": row.model_id,
-            "make_id": row.make_id,
-            "name": row.model_name,
-        })
+    if limit is not None and len(rows) > limit:
+        rows = rows[:limit]
+        headers[NEXT_CURSOR_HEADER] = encode_cursor(snapshot.model_cursor(rows[-1]))
+    response.headers.update(headers)
+    
+    return [snapshot.model_item(i) for i in rows]
+
+
+@router.get("/tree", response_model=VehicleTreeResponse, summary="获取年份-品牌-型号整树")
+async def get_tree(
+    request: Request,
+    db: Session = Depends(get_db)
+):
+    """
+    一次返回 year -> make -> model 整棵树（列式、名称字典编码），客户端预取后本地完成级联
+    
+    每个车辆目录版本只生成、压缩一次；按 Accept-Encoding 返回 br / gzip / 原始 JSON
+    """
+    headers, not_modified = check_catalog_not_modified(request)
+    if not_modified:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    
+    tree = await run_in_threadpool(vehicle_tree.get, db)
+    body, encoding = tree.select(request.headers.get("accept-encoding"))
+    headers["Vary"] = "Accept-Encoding"
+    if encoding:
+        headers["Content-Encoding"] = encoding
     
-    return models
+    return Response(content=body, media_type="application/json", headers=headers)
 
 
 @router.get("/vehicles", response_model=List[VehicleResponse], summary="获取车辆列表")
 async def get_vehicles(
+    request: Request,
+    response: Response,
     year: Optional[int] = Query(None, description="年份（可选）"),
     make_id: Optional[int] = Query(None, description="品牌ID（可选）"),
     model_id: Optional[int] = Query(None, description="型号ID（可选）"),
+    limit: Optional[int] = Query(None, ge=1, le=PAGE_MAX_LIMIT, description="每页数量（可选，提供时启用游标分页）"),
+    cursor: Optional[str] = Query(None, description="分页游标（上一页响应头 X-Next-Cursor）"),
+    stream: bool = Query(False, description="流式返回剩余全部结果（忽略 limit）"),
     db: Session = Depends(get_db)
 ):
     """
     根据年份/品牌/型号获取车辆列表（vehicle_id 和 vehicle_name）
     
     不去重：允许同名多条，但 UI 可按 vehicle_id 唯一
+    
+    游标分页按 (vehicle_name, vehicle_id) keyset 查询（不使用 OFFSET），
+    下一页游标在 X-Next-Cursor 响应头；stream=true 时服务端游标逐批读取并流式输出
     """
+    headers, not_modified = check_catalog_not_modified(request)
+    if not_modified:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    
     detail_table = get_table("mini_vehicle_detail")
-    years_table = get_table("mini_vehicle_year")
     
     conditions = []
     
     if year:
-        # 先找到 year_id
-        year_result = db.execute(
-            select(years_table.c.id)
-            .where(years_table.c.year == year)
-            .limit(1)
-        )
-        year_row = year_result.fetchone()
-        if not year_row:
+        # 从车辆目录快照解析 year_id（不再单独查询 mini_vehicle_year）
+        snapshot = await run_in_threadpool(vehicle_catalog.get, db)
+        year_id = snapshot.get_year_id(year)
+        if year_id is None:
+            response.headers.update(headers)
             return []  # 该年份不存在
         
-        year_id = year_row.id
         conditions.append(detail_table.c.year_id == year_id)
     
     if make_id:
@@ -200,7 +240,30 @@ async def get_vehicles(
             detail="必须提供至少一个过滤条件（year, make_id, model_id）"
         )
     
-    result = db.execute(
+    # keyset：排在游标 (vehicle_name, vehicle_id) 之后的行（vehicle_name 为 NULL 的行排在最前）
+    after = parse_cursor(cursor, 2)
+    if after is not None:
+        after_name, after_id = after
+        if not isinstance(after_id, str) or not (after_name is None or isinstance(after_name, str)):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="分页游标无效"
+            )
+        if after_name is None:
+            conditions.append(or_(
+                detail_table.c.vehicle_name.isnot(None),
+                detail_table.c.vehicle_id > after_id,
+            ))
+        else:
+            conditions.append(or_(
+                detail_table.c.vehicle_name > after_name,
+                and_(
+                    detail_table.c.vehicle_name == after_name,
+                    detail_table.c.vehicle_id > after_id,
+                ),
+            ))
+    
+    query = (
         select(
             detail_table.c.vehicle_id,
             detail_table.c.vehicle_name
@@ -209,8 +272,28 @@ async def get_vehicles(
         .order_by(detail_table.c.vehicle_name.asc(), detail_table.c.vehicle_id.asc())
     )
     
+    if stream:
+        result = db.execute(query.execution_options(yield_per=STREAM_CHUNK_SIZE))
+        return StreamingResponse(
+            stream_json_array(
+                {"vehicle_id": row.vehicle_id, "vehicle_name": row.vehicle_name}
+                for row in result
+            ),
+            media_type="application/json",
+            headers=headers,
+        )
+    
+    if limit is not None:
+        query = query.limit(limit + 1)
+    
+    rows = db.execute(query).fetchall()
+    if limit is not None and len(rows) > limit:
+        rows = rows[:limit]
+        headers[NEXT_CURSOR_HEADER] = encode_cursor([rows[-1].vehicle_name, rows[-1].vehicle_id])
+    response.headers.update(headers)
+    
     vehicles = []
-    for row in result.fetchall():
+    for row in rows:
         vehicles.append({
             "vehicle_id": row.vehicle_id,
             "vehicle_name": row.vehicle_name,
@@ -219,97 +302,96 @@ async def get_vehicles(
     return vehicles
 
 
+@router.get("/search", response_model=List[VehicleSearchResponse], summary="车辆名称搜索（自动补全）")
+async def search_vehicles(
+    request: Request,
+    response: Response,
+    q: str = Query(..., min_length=1, max_length=100, description="搜索词（如 2019 civic si）"),
+    limit: int = Query(10, ge=1, le=VEHICLE_SEARCH_MAX_LIMIT, description="返回数量"),
+    db: Session = Depends(get_db)
+):
+    """
+    按 年份 + 品牌 + 型号 + 车辆名 搜索车辆（typeahead）
+    
+    在进程内前缀索引中检索（随车辆目录快照版本重建），不访问数据库：
+    - 每个词按前缀匹配，所有词都必须命中（"2019 civic si" / "civ 2019"）
+    - 排序分两档：所有词都精确命中的车辆在前，其余（所有词都按前缀命中）在后；
+      档内按 year DESC, make, model, vehicle_name（部分词精确命中不提升排名）
+    """
+    headers, not_modified = check_catalog_not_modified(request)
+    if not_modified:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    response.headers.update(headers)
+    
+    index = await run_in_threadpool(vehicle_search.get, db)
+    return index.search(q, limit)
+
+
 @router.get("/fitment", response_model=FitmentResponse, summary="获取车辆适配参数")
 async def get_fitment(
+    request: Request,
     vehicle_id: str = Query(..., description="车辆ID（vehicle_id）"),
     db: Session = Depends(get_db)
 ):
     """
     根据 vehicle_id 获取车辆适配参数（轮毂适配信息）
     
-    直接从 mini_vehicle_detail 取一行，拼出 OEM front/rear 信息
+    优先从物化的 Fitment Store（Redis 哈希，ETL 后预先生成）直接返回 JSON；
+    未命中时从 mini_vehicle_detail 取一行，拼出 OEM front/rear 信息并回填
     available_sizes：优先从 rim_diameter_front 解析 OEM 直径并生成（OEM±N + All）
     """
-    detail_table = get_table("mini_vehicle_detail")
-    
-    result = db.execute(
-        select(detail_table)
-        .where(detail_table.c.vehicle_id == vehicle_id)
-        .limit(1)
-    )
+    headers, not_modified = check_catalog_not_modified(request)
+    if not_modified:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
     
-    detail_row = result.fetchone()
+    payload = load_fitment_payload(db, vehicle_catalog.get_version(), vehicle_id)
     
-    if not detail_row:
+    if payload is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="未找到车辆适配参数"
         )
     
-    # 构建 OEM 信息
-    oem_front = FitmentOEM(
-        bolt_pattern=detail_row.bolt_pattern_front,
-        hub_bore=detail_row.hub_bore_front,
-        offset_oem=detail_row.oem_offset_front,
-        offset_min=detail_row.min_offset_front,
-        offset_max=detail_row.max_offset_front,
-        wheel_size=detail_row.wheel_size_front,
-        rim_diameter=detail_row.rim_diameter_front,
-        rim_width=detail_row.rim_width_front,
-        tire_size=detail_row.tire_size_front,
-    )
+    return Response(content=payload, media_type="application/json", headers=headers)
+
+
+@router.post("/fitment/batch", response_model=FitmentBatchResponse, summary="批量获取车辆适配参数")
+async def get_fitment_batch(
+    request: FitmentBatchRequest,
+    db: Session = Depends(get_db)
+):
+    """
+    批量获取多个车辆的适配参数（车库、对比页一次请求多个车辆）
+    
+    - 先从 Fitment Store 一次 HMGET 取回所有已物化的文档
+    - 未命中的 vehicle_id 用一条 WHERE vehicle_id IN (...) 查询补齐，并一次回填
+    - 返回 {items: {vehicle_id: Fitment}, missing: [vehicle_id]}，JSON 直接拼接，不构造 Pydantic 模型
+    """
+    vehicle_ids = list(dict.fromkeys(request.vehicle_ids))  # 去重并保持顺序
+    version = vehicle_catalog.get_version()
+    
+    payloads = dict(zip(vehicle_ids, FitmentStore.get_many(version, vehicle_ids)))
+    misses = [vehicle_id for vehicle_id, payload in payloads.items() if payload is None]
     
-    oem_rear = None
-    is_staggered = False
-    
-    # 判断是否为 staggered（前后轮参数不同）
-    if (detail_row.bolt_pattern_rear or detail_row.hub_bore_rear or 
-        detail_row.rim_diameter_rear or detail_row.wheel_size_rear):
-        is_staggered = True
-        oem_rear = FitmentOEM(
-            bolt_pattern=detail_row.bolt_pattern_rear,
-            hub_bore=detail_row.hub_bore_rear,
-            offset_oem=detail_row.oem_offset_rear,
-            offset_min=detail_row.min_offset_rear,
-            offset_max=detail_row.max_offset_rear,
-            wheel_size=detail_row.wheel_size_rear,
-            rim_diameter=detail_row.rim_diameter_rear,
-            rim_width=detail_row.rim_width_rear,
-            tire_size=detail_row.tire_size_rear,
+    if misses:
+        detail_table = get_table("mini_vehicle_detail")
+        result = db.execute(
+            select(detail_table)
+            .where(detail_table.c.vehicle_id.in_(misses))
         )
+        filled = {
+            row.vehicle_id: serialize_fitment(build_fitment_document(row))
+            for row in result.fetchall()
+        }
+        FitmentStore.set_many(version, filled)
+        payloads.update(filled)
     
-    # 解析 available_sizes（从 rim_diameter_front 提取 OEM 直径）
-    available_sizes = []
-    
-    if detail_row.rim_diameter_front:
-        # 提取直径数字（如 "18\"" -> 18）
-        diameter_match = re.search(r'(\d+)', detail_row.rim_diameter_front)
-        if diameter_match:
-            oem_diameter = int(diameter_match.group(1))
-            # 生成常见尺寸（OEM ±3，以及 OEM 本身）
-            for d in range(max(15, oem_diameter - 3), min(22, oem_diameter + 4)):
-                if d == oem_diameter:
-                    label = f'{d}" (OEM)'
-                else:
-                    diff = d - oem_diameter
-                    label = f'{d}" ({diff:+d})'
-                available_sizes.append({"diameter": d, "label": label})
-    
-    # 如果没有解析到尺寸，添加一个 "All" 选项
-    if not available_sizes:
-        available_sizes.append({"diameter": None, "label": "All"})
-    
-    return FitmentResponse(
-        vehicle_id=detail_row.vehicle_id,
-        vehicle_name=detail_row.vehicle_name,
-        year_id=detail_row.year_id,
-        make_id=detail_row.make_id,
-        model_id=detail_row.model_id,
-        oem_front=oem_front,
-        oem_rear=oem_rear,
-        is_staggered=is_staggered,
-        available_sizes=available_sizes,
+    items = ",".join(
+        f"{json.dumps(vehicle_id, ensure_ascii=False)}:{payload}"
+        for vehicle_id, payload in payloads.items()
+        if payload is not None
     )
-
-
-
+    missing = [vehicle_id for vehicle_id, payload in payloads.items() if payload is None]
+    content = f'{{"items":{{{items}}},"missing":{json.dumps(missing, ensure_ascii=False)}}}'
+    
+    return Response(content=content, media_type="application/json")
@@ -30,6 +30,18 @@ class Settings(BaseSettings):
     # Redis 用户缓存配置（DB=3：地址、订单、物流等用户访问缓存）
     REDIS_USERCACHE_DB: int = 3
     REDIS_USERCACHE_TTL: int = 1800  # 用户缓存默认TTL（30分钟）
+    REDIS_USERCACHE_CODEC: str = "json"  # 用户缓存哈希值编码：json（安装 orjson 时使用 orjson）/ msgpack（需安装 msgpack）
+    REDIS_USERCACHE_COMPRESS_MIN_BYTES: int = 1024  # 编码后超过该字节数时 zlib 压缩（0 表示不压缩）
+    REDIS_USERCACHE_L1_ENABLED: bool = False  # 是否启用进程内 L1 缓存（get / hget，经 pub/sub 失效）
+    REDIS_USERCACHE_L1_SIZE: int = 10000  # L1 最多缓存的 Redis 键数（LRU 淘汰）
+    REDIS_USERCACHE_L1_TTL: float = 5.0  # L1 每个键的存活时间（秒，失效通知丢失时的最大陈旧时间）
+    ADDRESS_CACHE_WRITE_MODE: str = "sync"  # 地址写操作后的缓存处理：sync（请求内写穿透）/ background（响应后后台重建）/ off（只失效）
+    
+    # Redis 目录缓存配置（DB=4：车辆目录、商品目录等公共数据及其版本号）
+    REDIS_CATALOG_DB: int = 4
+    REDIS_CATALOG_TTL: int = 3600  # 目录缓存默认TTL（1小时）
+    VEHICLE_CATALOG_CHECK_SECONDS: int = 30  # 车辆目录快照检查版本号的间隔（秒）
+    VEHICLE_CATALOG_MAX_AGE: int = 600  # 车辆目录接口 Cache-Control max-age（秒）
     
     # 数据库配置（与 PHP FastAdmin 共享）
     DATABASE_HOST: str = "mysql"
@@ -48,6 +60,13 @@ class Settings(BaseSettings):
             f"?charset={self.DATABASE_CHARSET}"
         )
     
+    # 轮毂适配匹配配置
+    WHEEL_PCD_MM_TOLERANCE: float = 0.05  # PCD 孔距（毫米）匹配容差（pcd_mm 为一位小数）
+    WHEEL_SEARCH_CHECK_SECONDS: int = 5  # 轮毂搜索快照检查商品目录版本号的间隔（秒）
+    WHEEL_RESULT_CACHE_TTL: int = 600  # /shop/wheels 结果缓存TTL（秒，key 按商品目录版本号隔离）
+    WHEEL_WIDTH_TOLERANCE: float = 1.0  # 车辆匹配时轮毂宽度允许偏离 OEM 宽度的范围（英寸）
+    WHEEL_OFFSET_TOLERANCE: float = 10.0  # 车辆只有 OEM 偏距时，允许的偏距范围（OEM ± 毫米）
+    
     # OAuth 配置
     # Google OAuth
     GOOGLE_CLIENT_ID: Optional[str] = None
@@ -1,7 +1,17 @@
 """
 地址缓存模块（Cache-Aside 模式）
+
+每个用户的地址缓存是一个哈希（usercache:addr:u{user_id}），每个视图一个字段：
+
+    list:all / list:shipping / list:billing    地址列表
+    id:{address_id}                            单个地址
+    default:shipping / default:billing         默认地址
+
+读取为一次 HGET，回填为一次 HSET + EXPIRE（整个哈希一起过期），失效为一次 DEL，
+不再像按版本号隔离的字符串键那样留下旧版本的键等待 TTL 过期。
+字段值由 usercache_client 经 cache_codec 编码（见 app/core/cache_codec.py）。
+写操作提交后可用 replace_user_addresses 一次事务重建整个哈希（写穿透）。
 """
-import json
 from typing import Optional, List, Dict, Any
 from app.core.usercache_client import usercache_client
 
@@ -13,55 +23,43 @@ class AddressCache:
     DEFAULT_TTL = 1800  # 30分钟
     
     @staticmethod
-    def _get_version_key(user_id: int) -> str:
-        """获取版本号键"""
-        return f"{AddressCache.CACHE_PREFIX}:ver:u{user_id}"
+    def _get_key(user_id: int) -> str:
+        """获取用户地址缓存哈希键"""
+        return f"{AddressCache.CACHE_PREFIX}:u{user_id}"
     
     @staticmethod
-    def _get_list_key(user_id: int, address_type: Optional[str] = None, version: Optional[int] = None) -> str:
+    def _list_field(address_type: Optional[str] = None) -> str:
         """
-        获取地址列表缓存键
+        地址列表字段名
         
         Args:
-            user_id: 用户ID
             address_type: 地址类型（shipping/billing），None 表示所有类型
-            version: 版本号，None 表示使用当前版本
         """
-        if version is None:
-            version = usercache_client.get_version(user_id, "addr")
-        
-        if address_type:
-            return f"{AddressCache.CACHE_PREFIX}:v{version}:u{user_id}:list:{address_type}"
-        else:
-            return f"{AddressCache.CACHE_PREFIX}:v{version}:u{user_id}:list:all"
+        return f"list:{address_type}" if address_type else "list:all"
     
     @staticmethod
-    def _get_detail_key(user_id: int, address_id: int, version: Optional[int] = None) -> str:
-        """
-        获取单个地址缓存键
-        
-        Args:
-            user_id: 用户ID
-            address_id: 地址ID
-            version: 版本号，None 表示使用当前版本
-        """
-        if version is None:
-            version = usercache_client.get_version(user_id, "addr")
-        return f"{AddressCache.CACHE_PREFIX}:v{version}:u{user_id}:id:{address_id}"
+    def _detail_field(address_id: int) -> str:
+        """单个地址字段名"""
+        return f"id:{address_id}"
     
     @staticmethod
-    def _get_default_key(user_id: int, address_type: str, version: Optional[int] = None) -> str:
-        """
-        获取默认地址缓存键
-        
-        Args:
-            user_id: 用户ID
-            address_type: 地址类型
-            version: 版本号，None 表示使用当前版本
-        """
-        if version is None:
-            version = usercache_client.get_version(user_id, "addr")
-        return f"{AddressCache.CACHE_PREFIX}:v{version}:u{user_id}:default:{address_type}"
+    def _default_field(address_type: str) -> str:
+        """默认地址字段名"""
+        return f"default:{address_type}"
+    
+    @staticmethod
+    def _get(user_id: int, field: str) -> Optional[Any]:
+        """读取一个视图（一次 HGET），未命中返回 None"""
+        return usercache_client.hget(AddressCache._get_key(user_id), field)
+    
+    @staticmethod
+    def _set(user_id: int, field: str, data: Any, ttl: Optional[int] = None) -> bool:
+        """写入一个视图（HSET + EXPIRE 一次往返）"""
+        return usercache_client.hset_fields(
+            AddressCache._get_key(user_id),
+            {field: data},
+            ttl or AddressCache.DEFAULT_TTL,
+        )
     
     @staticmethod
     def get_address_list(
@@ -78,16 +76,7 @@ class AddressCache:
         Returns:
             地址列表（字典列表），缓存未命中返回 None
         """
-        cache_key = AddressCache._get_list_key(user_id, address_type)
-        cached_data = usercache_client.get(cache_key)
-        
-        if cached_data:
-            try:
-                return json.loads(cached_data)
-            except Exception:
-                return None
-        
-        return None
+        return AddressCache._get(user_id, AddressCache._list_field(address_type))
     
     @staticmethod
     def set_address_list(
@@ -108,12 +97,7 @@ class AddressCache:
         Returns:
             是否成功
         """
-        cache_key = AddressCache._get_list_key(user_id, address_type)
-        try:
-            data_json = json.dumps(addresses, ensure_ascii=False)
-            return usercache_client.set(cache_key, data_json, ttl)
-        except Exception:
-            return False
+        return AddressCache._set(user_id, AddressCache._list_field(address_type), addresses, ttl)
     
     @staticmethod
     def get_address_detail(user_id: int, address_id: int) -> Optional[Dict[str, Any]]:
@@ -127,16 +111,7 @@ class AddressCache:
         Returns:
             地址字典，缓存未命中返回 None
         """
-        cache_key = AddressCache._get_detail_key(user_id, address_id)
-        cached_data = usercache_client.get(cache_key)
-        
-        if cached_data:
-            try:
-                return json.loads(cached_data)
-            except Exception:
-                return None
-        
-        return None
+        return AddressCache._get(user_id, AddressCache._detail_field(address_id))
     
     @staticmethod
     def set_address_detail(
@@ -157,12 +132,7 @@ class AddressCache:
         Returns:
             是否成功
         """
-        cache_key = AddressCache._get_detail_key(user_id, address_id)
-        try:
-            data_json = json.dumps(address, ensure_ascii=False)
-            return usercache_client.set(cache_key, data_json, ttl)
-        except Exception:
-            return False
+        return AddressCache._set(user_id, AddressCache._detail_field(address_id), address, ttl)
     
     @staticmethod
     def get_default_address(user_id: int, address_type: str) -> Optional[Dict[str, Any]]:
@@ -176,16 +146,7 @@ class AddressCache:
         Returns:
             默认地址字典，缓存未命中返回 None
         """
-        cache_key = AddressCache._get_default_key(user_id, address_type)
-        cached_data = usercache_client.get(cache_key)
-        
-        if cached_data:
-            try:
-                return json.loads(cached_data)
-            except Exception:
-                return None
-        
-        return None
+        return AddressCache._get(user_id, AddressCache._default_field(address_type))
     
     @staticmethod
     def set_default_address(
@@ -206,31 +167,52 @@ class AddressCache:
         Returns:
             是否成功
         """
-        cache_key = AddressCache._get_default_key(user_id, address_type)
-        try:
-            data_json = json.dumps(address, ensure_ascii=False)
-            return usercache_client.set(cache_key, data_json, ttl)
-        except Exception:
-            return False
+        return AddressCache._set(user_id, AddressCache._default_field(address_type), address, ttl)
     
     @staticmethod
-    def invalidate_user_addresses(user_id: int) -> None:
+    def replace_user_addresses(
+        user_id: int,
+        addresses: List[Dict[str, Any]],
+        ttl: Optional[int] = None
+    ) -> bool:
+        """
+        用用户的全部有效地址重建缓存哈希（写穿透：写操作提交后直接写入新数据，而不是只失效）
+        
+        一次事务写入所有视图：地址列表（all / shipping / billing）、每个地址的详情、各类型的默认地址
+        
+        Args:
+            user_id: 用户ID
+            addresses: 用户的全部有效地址（字典列表，按 is_default DESC, createtime DESC 排序，与列表接口一致）
+            ttl: 过期时间（秒），None 使用默认值
+            
+        Returns:
+            是否成功
         """
-        失效用户所有地址缓存（通过版本号递增）
+        views: Dict[str, Any] = {AddressCache._list_field(None): addresses}
+        for address_type in ("shipping", "billing"):
+            typed = [address for address in addresses if address.get("address_type") == address_type]
+            views[AddressCache._list_field(address_type)] = typed
+            default = next((address for address in typed if address.get("is_default")), None)
+            if default is not None:
+                views[AddressCache._default_field(address_type)] = default
+        for address in addresses:
+            views[AddressCache._detail_field(address["id"])] = address
         
-        这是最安全的方式：递增版本号后，所有旧版本的缓存键自动失效
-        新请求会使用新版本号，自然无法命中旧缓存
+        return usercache_client.replace_hash(
+            AddressCache._get_key(user_id),
+            views,
+            ttl or AddressCache.DEFAULT_TTL,
+        )
+    
+    @staticmethod
+    def invalidate_user_addresses(user_id: int) -> None:
+        """
+        失效用户所有地址缓存（删除整个哈希，一次 DEL）
         
         Args:
             user_id: 用户ID
         """
-        try:
-            # 递增版本号，使所有旧缓存失效
-            usercache_client.bump_version(user_id, "addr")
-        except Exception:
-            # 如果失败，尝试删除所有相关键（降级方案）
-            pattern = f"{AddressCache.CACHE_PREFIX}:*:u{user_id}:*"
-            usercache_client.delete_pattern(pattern)
+        usercache_client.delete(AddressCache._get_key(user_id))
     
     @staticmethod
     def invalidate_address_detail(user_id: int, address_id: int) -> None:
@@ -241,10 +223,7 @@ class AddressCache:
             user_id: 用户ID
             address_id: 地址ID
         """
-        # 获取当前版本号
-        version = usercache_client.get_version(user_id, "addr")
-        cache_key = AddressCache._get_detail_key(user_id, address_id, version)
-        usercache_client.delete(cache_key)
+        usercache_client.hdel(AddressCache._get_key(user_id), AddressCache._detail_field(address_id))
     
     @staticmethod
     def invalidate_address_lists(user_id: int) -> None:
@@ -254,13 +233,12 @@ class AddressCache:
         Args:
             user_id: 用户ID
         """
-        version = usercache_client.get_version(user_id, "addr")
-        keys = [
-            AddressCache._get_list_key(user_id, None, version),  # all
-            AddressCache._get_list_key(user_id, "shipping", version),
-            AddressCache._get_list_key(user_id, "billing", version),
-        ]
-        usercache_client.delete(*keys)
+        usercache_client.hdel(
+            AddressCache._get_key(user_id),
+            AddressCache._list_field(None),  # all
+            AddressCache._list_field("shipping"),
+            AddressCache._list_field("billing"),
+        )
     
     @staticmethod
     def invalidate_default_addresses(user_id: int) -> None:
@@ -270,11 +248,10 @@ class AddressCache:
         Args:
             user_id: 用户ID
         """
-        version = usercache_client.get_version(user_id, "addr")
-        keys = [
-            AddressCache._get_default_key(user_id, "shipping", version),
-            AddressCache._get_default_key(user_id, "billing", version),
-        ]
-        usercache_client.delete(*keys)
+        usercache_client.hdel(
+            AddressCache._get_key(user_id),
+            AddressCache._default_field("shipping"),
+            AddressCache._default_field("billing"),
+        )
 
 
@@ -0,0 +1,100 @@
+"""
+轮毂品牌字典（进程内）
+
+品牌只有几十条且很少变化，商品列表 / 详情需要的 brand_name、slug、logo 直接从进程内字典取，
+不需要每次 JOIN mini_wheel_brand。
+
+后台保存/删除品牌时递增商品目录版本号（catalog:ver:product），字典与轮毂搜索快照
+按同一个版本号（app/core/wheel_search.py 中节流读取的值）整体重新加载。
+"""
+import threading
+from typing import Optional, Dict
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from app.database import get_table
+from app.core.wheel_search import wheel_search
+
+
+class BrandInfo:
+    """品牌信息"""
+    
+    __slots__ = ("id", "name", "slug", "logo", "status")
+    
+    def __init__(self, id: int, name: str, slug: Optional[str], logo: Optional[str], status: Optional[str]):
+        self.id = id
+        self.name = name
+        self.slug = slug
+        self.logo = logo
+        self.status = status
+
+
+def load_brands(db: Session) -> Dict[int, BrandInfo]:
+    """
+    从数据库加载全部品牌（含下架品牌，已有商品仍需显示品牌名）
+    
+    Args:
+        db: 数据库会话
+    """
+    brands_table = get_table("mini_wheel_brand")
+    rows = db.execute(
+        select(
+            brands_table.c.id,
+            brands_table.c.name,
+            brands_table.c.slug,
+            brands_table.c.logo,
+            brands_table.c.status,
+        )
+    ).fetchall()
+    return {
+        row.id: BrandInfo(row.id, row.name, row.slug, row.logo, row.status)
+        for row in rows
+    }
+
+
+class BrandDictionary:
+    """进程内品牌字典（商品目录版本号变化时重新加载）"""
+    
+    def __init__(self):
+        self._brands: Optional[Dict[int, BrandInfo]] = None
+        self._version: Optional[int] = None
+        self._lock = threading.Lock()
+    
+    def get(self, db: Session) -> Dict[int, BrandInfo]:
+        """
+        获取品牌字典 brand_id -> BrandInfo
+        
+        首次调用时加载；之后版本号变化时只有一个请求负责重新加载，其余请求继续使用旧字典。
+        加载时在当前线程查询数据库（品牌表很小）；async 接口可通过 run_in_threadpool 调用。
+        
+        Args:
+            db: 数据库会话（仅在需要加载时使用）
+        """
+        version = wheel_search.get_version()
+        brands = self._brands
+        if brands is not None and (version is None or version == self._version):
+            return brands
+        
+        if not self._lock.acquire(blocking=brands is None):
+            return brands
+        try:
+            if self._brands is None or (version is not None and version != self._version):
+                self._brands = load_brands(db)
+                self._version = version
+            return self._brands
+        finally:
+            self._lock.release()
+    
+    def get_name(self, db: Session, brand_id: Optional[int]) -> Optional[str]:
+        """获取品牌名称（品牌不存在时返回 None）"""
+        if brand_id is None:
+            return None
+        brand = self.get(db).get(brand_id)
+        return brand.name if brand is not None else None
+    
+    def invalidate(self) -> None:
+        """丢弃当前字典（下次访问时重新加载）"""
+        self._brands = None
+
+
+# 全局品牌字典实例
+brand_dictionary = BrandDictionary()
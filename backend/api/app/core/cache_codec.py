@@ -0,0 +1,115 @@
+"""
+缓存载荷编解码（用户缓存 DB=3 的哈希字段值）
+
+编码结果为 1 个头字节 + 载荷：
+
+    头字节低 4 位：格式（0x01 JSON，0x02 MessagePack）
+    头字节最高位：载荷经 zlib 压缩（编码后超过 REDIS_USERCACHE_COMPRESS_MIN_BYTES 且压缩后更小时）
+
+- JSON 安装了 orjson 时用 orjson 编解码（输出与 json.dumps(..., ensure_ascii=False) 等价的 UTF-8），
+  未安装时回退标准库 json；两者写出的数据可以互相读取
+- MessagePack 需要安装 msgpack，未安装时 REDIS_USERCACHE_CODEC=msgpack 回退为 JSON
+- 解码按头字节选择格式，与当前配置无关；没有头字节的旧数据（json.dumps 写入的文本）按 JSON 解码，
+  切换格式或升级期间无需清空缓存
+"""
+import json
+import zlib
+from typing import Any, Union
+from app.config import settings
+
+try:
+    import orjson
+except ImportError:  # requirements.txt 已固定 orjson，未安装时使用标准库 json
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # requirements.txt 已固定 msgpack，未安装时只提供 JSON
+    msgpack = None
+
+FORMAT_JSON = 0x01
+FORMAT_MSGPACK = 0x02
+FLAG_ZLIB = 0x80
+_FORMAT_MASK = 0x0F
+
+# 压缩级别（缓存载荷重视速度）
+ZLIB_LEVEL = 1
+
+
+def _json_dumps(value: Any) -> bytes:
+    if orjson is not None:
+        # 行映射的键是 str 子类（SQLAlchemy quoted_name），非 str 键按 json.dumps 的方式转为字符串
+        return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _json_loads(data: bytes) -> Any:
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+class CacheCodec:
+    """带格式头字节的缓存编解码器"""
+    
+    def __init__(self, codec: str = "json", compress_min_bytes: int = 0):
+        """
+        Args:
+            codec: 编码格式（json / msgpack；msgpack 未安装时回退为 json）
+            compress_min_bytes: 编码后超过该字节数时尝试 zlib 压缩（0 表示不压缩）
+        """
+        self.format = FORMAT_MSGPACK if codec == "msgpack" and msgpack is not None else FORMAT_JSON
+        self.compress_min_bytes = compress_min_bytes
+    
+    def encode(self, value: Any) -> bytes:
+        """
+        编码缓存值
+        
+        Raises:
+            TypeError: 值无法序列化
+        """
+        if self.format == FORMAT_MSGPACK:
+            payload = msgpack.packb(value, use_bin_type=True)
+        else:
+            payload = _json_dumps(value)
+        
+        header = self.format
+        if self.compress_min_bytes and len(payload) > self.compress_min_bytes:
+            compressed = zlib.compress(payload, ZLIB_LEVEL)
+            if len(compressed) < len(payload):
+                payload = compressed
+                header |= FLAG_ZLIB
+        return bytes((header,)) + payload
+    
+    def decode(self, data: Union[bytes, str]) -> Any:
+        """
+        解码缓存值
+        
+        Raises:
+            ValueError: 数据格式无效或格式对应的库未安装
+        """
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        if not data:
+            raise ValueError("缓存数据为空")
+        
+        header = data[0]
+        if header & ~(FLAG_ZLIB | _FORMAT_MASK) or not header & _FORMAT_MASK:
+            # 没有头字节的旧数据（json.dumps 写入的文本）
+            return json.loads(data)
+        
+        payload = data[1:]
+        try:
+            if header & FLAG_ZLIB:
+                payload = zlib.decompress(payload)
+            if header & _FORMAT_MASK == FORMAT_JSON:
+                return _json_loads(payload)
+            if header & _FORMAT_MASK == FORMAT_MSGPACK and msgpack is not None:
+                return msgpack.unpackb(payload, raw=False)
+        except (zlib.error, ValueError, TypeError) as e:
+            raise ValueError(f"缓存数据无效: {e}")
+        raise ValueError("不支持的缓存数据格式")
+
+
+# 全局编解码器实例
+cache_codec = CacheCodec(settings.REDIS_USERCACHE_CODEC, settings.REDIS_USERCACHE_COMPRESS_MIN_BYTES)
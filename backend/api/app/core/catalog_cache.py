@@ -0,0 +1,215 @@
+"""
+目录缓存 Redis 客户端（DB=4）
+用于缓存车辆目录、商品目录等公共（非用户）数据，以及目录版本号
+"""
+import redis
+from typing import Optional, List, Dict
+from app.config import settings
+
+# 商品目录版本号名称（catalog:ver:product，后台编辑品牌、scripts/refresh_product_catalog.py 执行时递增）
+PRODUCT_CATALOG = "product"
+
+# 写入哈希字段，键由本次写入新建时设置 TTL（已存在的键保持原有 TTL）
+# KEYS[1]: 哈希键；ARGV[1]: TTL；ARGV[2..]: 字段、值交替
+_HSET_WITH_TTL_SCRIPT = """
+local created = redis.call('EXISTS', KEYS[1]) == 0
+redis.call('HSET', KEYS[1], unpack(ARGV, 2))
+if created then
+    redis.call('EXPIRE', KEYS[1], ARGV[1])
+end
+return 1
+"""
+
+
+class CatalogCacheClient:
+    """目录缓存 Redis 客户端（DB=4）"""
+    
+    VERSION_PREFIX = "catalog:ver"
+    
+    def __init__(self):
+        redis_kwargs = {
+            "host": settings.REDIS_HOST,
+            "port": settings.REDIS_PORT,
+            "db": settings.REDIS_CATALOG_DB,  # DB=4 专门用于目录缓存
+            "decode_responses": settings.REDIS_DECODE_RESPONSES,
+            "socket_connect_timeout": 5,
+            "socket_timeout": 5,
+        }
+        if settings.REDIS_PASSWORD:
+            redis_kwargs["password"] = settings.REDIS_PASSWORD
+        
+        self.client = redis.Redis(**redis_kwargs)
+        self.default_ttl = settings.REDIS_CATALOG_TTL
+        self._hset_with_ttl_script = self.client.register_script(_HSET_WITH_TTL_SCRIPT)
+    
+    def ping(self) -> bool:
+        """检查 Redis 连接"""
+        try:
+            return self.client.ping()
+        except Exception:
+            return False
+    
+    def get(self, key: str) -> Optional[str]:
+        """
+        获取缓存值
+        
+        Args:
+            key: 缓存键
+        
+        Returns:
+            缓存值（字符串），如果不存在返回 None
+        """
+        try:
+            return self.client.get(key)
+        except Exception:
+            return None
+    
+    def mget(self, keys: List[str]) -> List[Optional[str]]:
+        """
+        批量获取缓存值（一次往返）
+        
+        Args:
+            keys: 缓存键列表
+            
+        Returns:
+            与 keys 顺序一致的值列表，不存在为 None；Redis 不可用时全部为 None
+        """
+        if not keys:
+            return []
+        try:
+            return self.client.mget(keys)
+        except Exception:
+            return [None] * len(keys)
+    
+    def set(self, key: str, value: str, ttl: Optional[int] = None) -> bool:
+        """
+        设置缓存值
+        
+        Args:
+            key: 缓存键
+            value: 缓存值（字符串）
+            ttl: 过期时间（秒），None 使用默认TTL
+        
+        Returns:
+            是否成功
+        """
+        try:
+            if ttl is None:
+                ttl = self.default_ttl
+            self.client.setex(key, ttl, value)
+            return True
+        except Exception:
+            return False
+    
+    def delete(self, *keys: str) -> int:
+        """
+        删除缓存键
+        
+        Args:
+            *keys: 要删除的键（可变参数）
+        
+        Returns:
+            删除的键数量
+        """
+        try:
+            if not keys:
+                return 0
+            return self.client.delete(*keys)
+        except Exception:
+            return 0
+    
+    def hget(self, key: str, field: str) -> Optional[str]:
+        """
+        获取哈希字段值
+        
+        Args:
+            key: 哈希键
+            field: 字段名
+            
+        Returns:
+            字段值，不存在或 Redis 不可用时返回 None
+        """
+        try:
+            return self.client.hget(key, field)
+        except Exception:
+            return None
+    
+    def hmget(self, key: str, fields: List[str]) -> List[Optional[str]]:
+        """
+        批量获取哈希字段值（一次往返）
+        
+        Args:
+            key: 哈希键
+            fields: 字段名列表
+            
+        Returns:
+            与 fields 顺序一致的值列表，缺失字段为 None；Redis 不可用时全部为 None
+        """
+        if not fields:
+            return []
+        try:
+            return self.client.hmget(key, fields)
+        except Exception:
+            return [None] * len(fields)
+    
+    def hset(self, key: str, mapping: Dict[str, str], ttl: Optional[int] = None) -> bool:
+        """
+        设置多个哈希字段
+        
+        Args:
+            key: 哈希键
+            mapping: 字段 -> 值
+            ttl: 键由本次写入新建时设置的过期时间（秒，一次 Lua 脚本往返）；
+                 None 表示不设置，已存在的键保持原有 TTL
+            
+        Returns:
+            是否成功
+        """
+        try:
+            if not mapping:
+                return True
+            if ttl is None:
+                self.client.hset(key, mapping=mapping)
+            else:
+                args = [ttl]
+                for field, value in mapping.items():
+                    args.extend((field, value))
+                self._hset_with_ttl_script(keys=[key], args=args)
+            return True
+        except Exception:
+            return False
+    
+    def get_version(self, catalog: str) -> Optional[int]:
+        """
+        获取目录版本号（由 ETL / 后台编辑递增）
+        
+        Args:
+            catalog: 目录名称（如 "vehicle"）
+        
+        Returns:
+            版本号（未初始化时为 0），Redis 不可用时返回 None
+        """
+        try:
+            version = self.client.get(f"{self.VERSION_PREFIX}:{catalog}")
+            return int(version) if version is not None else 0
+        except Exception:
+            return None
+    
+    def bump_version(self, catalog: str) -> Optional[int]:
+        """
+        递增目录版本号（使基于旧版本的快照和缓存全部失效）
+        
+        Args:
+            catalog: 目录名称（如 "vehicle"）
+        
+        Returns:
+            新的版本号，失败返回 None
+        """
+        try:
+            return self.client.incr(f"{self.VERSION_PREFIX}:{catalog}")
+        except Exception:
+            return None
+
+
+# 全局目录缓存客户端实例
+catalog_cache = CatalogCacheClient()
@@ -0,0 +1,127 @@
+"""
+车辆适配分组（Fitment Class）
+
+15.9 万辆车里大量车型的适配参数完全相同（螺栓孔距、中心孔、偏距范围、宽度、轮毂直径）。
+按归一化后的适配签名把车辆分组，同组车辆的商品筛选条件完全相同：
+
+    签名: "5x114.3|18|64.1|35~50|7~9"     （pcd | 直径 | 中心孔 | 偏距范围 | 宽度范围，缺失项为 "-"）
+    staggered 车辆: "5x114.3|18|64.1|35~50|7~9/5x114.3|19|64.1|40~55|8~10"（前轴 / 后轴）
+
+匹配结果由轮毂搜索引擎（app/core/wheel_search.py）按筛选条件在进程内缓存，
+同组的成千上万辆车共用一份位图计算结果。
+"""
+from typing import Optional, Dict, Any
+from app.config import settings
+from app.core.wheel_fitment import parse_pcd, parse_diameter, parse_number, parse_interval
+
+
+def _format_number(value: Optional[float]) -> str:
+    """签名中的数字格式（64.0 -> "64"，缺失 -> "-"）"""
+    return "-" if value is None else f"{value:g}"
+
+
+class AxleTargets:
+    """单个车轴的商品筛选目标（区间均含边界，None 表示不限）"""
+    
+    __slots__ = ("pcd", "diameter", "offset_min", "offset_max", "width_min", "width_max", "center_bore_min")
+    
+    def __init__(
+        self,
+        pcd: Optional[str],
+        diameter: Optional[int],
+        offset_min: Optional[float],
+        offset_max: Optional[float],
+        width_min: Optional[float] = None,
+        width_max: Optional[float] = None,
+        center_bore_min: Optional[float] = None,
+    ):
+        self.pcd = pcd
+        self.diameter = diameter
+        self.offset_min = offset_min
+        self.offset_max = offset_max
+        self.width_min = width_min
+        self.width_max = width_max
+        self.center_bore_min = center_bore_min
+
+
+def resolve_axle_targets(document: Dict[str, Any], axle: str = "front") -> AxleTargets:
+    """
+    从 Fitment 文档推导某个车轴的商品筛选参数
+    
+    PCD 优先取本轴，其次另一轴（前后轴螺栓孔距相同，数据常只填一侧）；
+    后轴缺少直径 / 偏距 / 宽度 / 中心孔时沿用前轴。
+    
+    兼容区间（字段为自由文本，如 "+35"、"35 - 45"、"8.5J"、"64.1mm"）：
+    - 偏距：[min_offset 下限, max_offset 上限]；两者都缺失时为 OEM 偏距 ± WHEEL_OFFSET_TOLERANCE
+    - 宽度：OEM 宽度 ± WHEEL_WIDTH_TOLERANCE（英寸）
+    - 中心孔：轮毂中心孔不小于车辆中心孔（更大的中心孔可用中心环适配）
+    
+    Args:
+        document: build_fitment_document() 的结果
+        axle: "front" 或 "rear"
+    """
+    oem_front = document.get("oem_front") or {}
+    oem_rear = document.get("oem_rear") or {}
+    oem = oem_rear if axle == "rear" else oem_front
+    fallback = oem_front if axle == "rear" else {}
+    
+    def pick(field: str):
+        value = oem.get(field)
+        return value if value not in (None, "") else fallback.get(field)
+    
+    offset_low = parse_interval(pick("offset_min"))
+    offset_high = parse_interval(pick("offset_max"))
+    offset_min = offset_low[0] if offset_low else None
+    offset_max = offset_high[1] if offset_high else None
+    if offset_min is None and offset_max is None:
+        offset_oem = parse_interval(pick("offset_oem"))
+        if offset_oem:
+            offset_min = offset_oem[0] - settings.WHEEL_OFFSET_TOLERANCE
+            offset_max = offset_oem[1] + settings.WHEEL_OFFSET_TOLERANCE
+    
+    width = parse_interval(pick("rim_width"))
+    
+    return AxleTargets(
+        pcd=oem.get("bolt_pattern") or (oem_front if axle == "rear" else oem_rear).get("bolt_pattern"),
+        diameter=parse_diameter(pick("rim_diameter")),
+        offset_min=offset_min,
+        offset_max=offset_max,
+        width_min=width[0] - settings.WHEEL_WIDTH_TOLERANCE if width else None,
+        width_max=width[1] + settings.WHEEL_WIDTH_TOLERANCE if width else None,
+        center_bore_min=parse_number(pick("hub_bore")),
+    )
+
+
+def is_staggered(document: Dict[str, Any]) -> bool:
+    """是否为前后轮不同规格（staggered）的车辆"""
+    return bool(document.get("is_staggered") and document.get("oem_rear"))
+
+
+def _axle_signature(document: Dict[str, Any], axle: str) -> str:
+    """单个车轴的签名（pcd | 直径 | 中心孔 | 偏距范围 | 宽度范围）"""
+    targets = resolve_axle_targets(document, axle)
+    pcd = parse_pcd(targets.pcd)
+    
+    return "|".join((
+        f"{pcd[0]}x{pcd[1]:g}" if pcd else "-",
+        str(targets.diameter) if targets.diameter else "-",
+        _format_number(targets.center_bore_min),
+        f"{_format_number(targets.offset_min)}~{_format_number(targets.offset_max)}",
+        f"{_format_number(targets.width_min)}~{_format_number(targets.width_max)}",
+    ))
+
+
+def build_fitment_signature(document: Dict[str, Any]) -> str:
+    """
+    生成归一化适配签名（同签名的车辆匹配到完全相同的商品）
+    
+    PCD 与商品匹配使用同一套解析（英寸换算毫米、保留一位小数），
+    因此 "5x4.5" 与 "5x114.3" 属于同一组。staggered 车辆追加后轴签名（"前轴签名/后轴签名"）。
+    
+    Args:
+        document: build_fitment_document() 的结果
+    """
+    signature = _axle_signature(document, "front")
+    if is_staggered(document):
+        signature += "/" + _axle_signature(document, "rear")
+    return signature
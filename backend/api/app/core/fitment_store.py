@@ -0,0 +1,203 @@
+"""
+车辆适配参数物化存储（Fitment Store）
+
+/vehicles/fitment 的结果只取决于 mini_vehicle_detail 的一行，只在 ETL 重新导入时变化。
+ETL 完成后执行物化步骤（scripts/materialize_fitment.py），把所有车辆的
+FitmentResponse 预先序列化为 JSON，写入 Redis 哈希：
+
+    catalog:fitment:v{vehicle_catalog_version}   field = vehicle_id, value = JSON
+
+API 热路径只做一次 HGET，直接返回 JSON 字符串，不构造 Pydantic 模型。
+未命中（尚未物化或新车辆）时回退数据库查询，并回填到同一个哈希。
+
+回填时若哈希不存在（尚未物化，或物化步骤已切换版本并删除了旧版本哈希，而本进程仍在使用旧版本号），
+新建的哈希设置 TTL（REDIS_CATALOG_TTL），不会留下永不删除的部分旧版本哈希；
+物化步骤 RENAME 写入的哈希没有 TTL。
+"""
+import json
+import re
+from typing import Optional, Dict, Any, List
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from app.database import get_table
+from app.core.catalog_cache import catalog_cache
+
+FITMENT_KEY_PREFIX = "catalog:fitment"
+
+_DIAMETER_PATTERN = re.compile(r'(\d+)')
+
+_OEM_FIELDS = (
+    ("bolt_pattern", "bolt_pattern"),
+    ("hub_bore", "hub_bore"),
+    ("offset_oem", "oem_offset"),
+    ("offset_min", "min_offset"),
+    ("offset_max", "max_offset"),
+    ("wheel_size", "wheel_size"),
+    ("rim_diameter", "rim_diameter"),
+    ("rim_width", "rim_width"),
+    ("tire_size", "tire_size"),
+)
+
+
+def _build_oem(detail_row, axle: str) -> Dict[str, Any]:
+    """构建 OEM 参数字典（字段顺序与 FitmentOEM 一致）"""
+    return {
+        field: getattr(detail_row, f"{column}_{axle}")
+        for field, column in _OEM_FIELDS
+    }
+
+
+def build_available_sizes(rim_diameter: Optional[str]) -> List[Dict[str, Any]]:
+    """
+    从 OEM 直径生成可选尺寸（OEM ±3，范围 15-21；无法解析时返回 "All"）
+    
+    Args:
+        rim_diameter: rim_diameter_front（如 "18\""）
+    """
+    available_sizes = []
+    
+    if rim_diameter:
+        diameter_match = _DIAMETER_PATTERN.search(rim_diameter)
+        if diameter_match:
+            oem_diameter = int(diameter_match.group(1))
+            for d in range(max(15, oem_diameter - 3), min(22, oem_diameter + 4)):
+                if d == oem_diameter:
+                    label = f'{d}" (OEM)'
+                else:
+                    label = f'{d}" ({d - oem_diameter:+d})'
+                available_sizes.append({"diameter": d, "label": label})
+    
+    if not available_sizes:
+        available_sizes.append({"diameter": None, "label": "All"})
+    
+    return available_sizes
+
+
+def build_fitment_document(detail_row) -> Dict[str, Any]:
+    """
+    由 mini_vehicle_detail 行构建 Fitment 文档（结构与 FitmentResponse 完全一致）
+    
+    staggered 判定：后轮螺栓孔距 / 中心孔 / 直径 / 尺寸任一有值
+    
+    Args:
+        detail_row: mini_vehicle_detail 行
+    """
+    is_staggered = bool(
+        detail_row.bolt_pattern_rear or detail_row.hub_bore_rear or
+        detail_row.rim_diameter_rear or detail_row.wheel_size_rear
+    )
+    
+    return {
+        "vehicle_id": detail_row.vehicle_id,
+        "vehicle_name": detail_row.vehicle_name,
+        "year_id": detail_row.year_id,
+        "make_id": detail_row.make_id,
+        "model_id": detail_row.model_id,
+        "oem_front": _build_oem(detail_row, "front"),
+        "oem_rear": _build_oem(detail_row, "rear") if is_staggered else None,
+        "is_staggered": is_staggered,
+        "available_sizes": build_available_sizes(detail_row.rim_diameter_front),
+    }
+
+
+def serialize_fitment(document: Dict[str, Any]) -> str:
+    """序列化 Fitment 文档（紧凑 JSON）"""
+    return json.dumps(document, ensure_ascii=False, separators=(",", ":"))
+
+
+class FitmentStore:
+    """物化 Fitment 文档的读写（Redis 哈希，按车辆目录版本号隔离）"""
+    
+    @staticmethod
+    def get_key(version: int) -> str:
+        """获取指定版本的哈希键"""
+        return f"{FITMENT_KEY_PREFIX}:v{version}"
+    
+    @staticmethod
+    def get(version: Optional[int], vehicle_id: str) -> Optional[str]:
+        """
+        获取单个车辆的 Fitment JSON
+        
+        Args:
+            version: 车辆目录版本号（None 表示版本未知，直接视为未命中）
+            vehicle_id: 车辆ID
+        """
+        if version is None:
+            return None
+        return catalog_cache.hget(FitmentStore.get_key(version), vehicle_id)
+    
+    @staticmethod
+    def set(version: Optional[int], vehicle_id: str, payload: str) -> bool:
+        """
+        回填单个车辆的 Fitment JSON（哈希不存在时新建并设置 TTL）
+        
+        Args:
+            version: 车辆目录版本号
+            vehicle_id: 车辆ID
+            payload: serialize_fitment() 的结果
+        """
+        if version is None:
+            return False
+        return catalog_cache.hset(FitmentStore.get_key(version), {vehicle_id: payload}, catalog_cache.default_ttl)
+    
+    @staticmethod
+    def get_many(version: Optional[int], vehicle_ids: List[str]) -> List[Optional[str]]:
+        """
+        批量获取 Fitment JSON（一次 HMGET）
+        
+        Args:
+            version: 车辆目录版本号（None 表示版本未知，全部视为未命中）
+            vehicle_ids: 车辆ID列表
+            
+        Returns:
+            与 vehicle_ids 顺序一致的 JSON 列表，未命中为 None
+        """
+        if version is None:
+            return [None] * len(vehicle_ids)
+        return catalog_cache.hmget(FitmentStore.get_key(version), vehicle_ids)
+    
+    @staticmethod
+    def set_many(version: Optional[int], payloads: Dict[str, str]) -> bool:
+        """
+        批量回填 Fitment JSON（一次往返；哈希不存在时新建并设置 TTL）
+        
+        Args:
+            version: 车辆目录版本号
+            payloads: vehicle_id -> serialize_fitment() 的结果
+        """
+        if version is None or not payloads:
+            return False
+        return catalog_cache.hset(FitmentStore.get_key(version), payloads, catalog_cache.default_ttl)
+
+
+def load_fitment_payload(db: Session, version: Optional[int], vehicle_id: str) -> Optional[str]:
+    """
+    获取车辆的 Fitment JSON（先查 Fitment Store，未命中查 mini_vehicle_detail 并回填）
+    
+    Args:
+        db: 数据库会话
+        version: 车辆目录版本号
+        vehicle_id: 车辆ID
+        
+    Returns:
+        Fitment JSON，车辆不存在返回 None
+    """
+    payload = FitmentStore.get(version, vehicle_id)
+    if payload is not None:
+        return payload
+    
+    detail_table = get_table("mini_vehicle_detail")
+    
+    result = db.execute(
+        select(detail_table)
+        .where(detail_table.c.vehicle_id == vehicle_id)
+        .limit(1)
+    )
+    
+    detail_row = result.fetchone()
+    if not detail_row:
+        return None
+    
+    payload = serialize_fitment(build_fitment_document(detail_row))
+    FitmentStore.set(version, vehicle_id, payload)
+    return payload
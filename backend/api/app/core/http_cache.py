@@ -0,0 +1,78 @@
+"""
+HTTP 条件请求（ETag / If-None-Match / Cache-Control）
+
+用于数据只随目录版本号变化的公共接口：ETag 由目录版本号 + 请求路径和查询参数
+计算得出，校验时不需要读取任何数据（不访问数据库），版本号变化后 ETag 自然改变。
+"""
+import hashlib
+from typing import Dict, Optional, Tuple
+from fastapi import Request
+
+
+def build_etag(request: Request, version: int, namespace: str) -> str:
+    """
+    构建强 ETag
+    
+    Args:
+        request: 请求对象（使用路径 + 排序后的查询参数）
+        version: 目录版本号
+        namespace: 目录名称（如 "vehicle"），区分不同目录的版本号
+    """
+    query = "&".join(f"{k}={v}" for k, v in sorted(request.query_params.multi_items()))
+    digest = hashlib.blake2b(
+        f"{request.url.path}?{query}".encode("utf-8"),
+        digest_size=8,
+    ).hexdigest()
+    return f'"{namespace}{version}-{digest}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """
+    判断 If-None-Match 是否命中（弱比较，支持列表和 *）
+    
+    Args:
+        request: 请求对象
+        etag: 当前资源的 ETag
+    """
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return True
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+
+def check_not_modified(
+    request: Request,
+    version: Optional[int],
+    namespace: str,
+    max_age: int,
+) -> Tuple[Dict[str, str], bool]:
+    """
+    计算缓存响应头并判断是否可以返回 304
+    
+    Args:
+        request: 请求对象
+        version: 目录版本号（None 表示版本未知，不输出校验头）
+        namespace: 目录名称
+        max_age: Cache-Control max-age（秒）
+    
+    Returns:
+        (headers, not_modified)：headers 应附加到 200 / 304 响应上
+    """
+    if version is None:
+        return {}, False
+    
+    etag = build_etag(request, version, namespace)
+    headers = {
+        "ETag": etag,
+        "Cache-Control": f"public, max-age={max_age}",
+    }
+    return headers, etag_matches(request, etag)
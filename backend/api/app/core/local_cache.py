@@ -0,0 +1,95 @@
+"""
+进程内 L1 缓存（LRU + TTL）
+
+放在 Redis 用户缓存（L2）前面，同一请求 / 同一页面渲染内重复读取同一个键时不再走网络。
+按 Redis 键组织，每个键下按字段（哈希字段；字符串键为 None）存放值：
+
+    "usercache:addr:u7" -> {"list:all": "[...]", "id:3": "{...}"}
+
+- 按 Redis 键计数，超过 max_entries 时淘汰最久未使用的键
+- 每个键写入后 ttl 秒过期（即使失效通知丢失，陈旧时间也不超过 ttl）
+- 失效按整个 Redis 键进行（invalidate），由写入方本地调用并通过 Redis pub/sub 通知其他进程
+
+generation 在每次失效时递增：读取 Redis 前记下 generation，写入 L1 时若期间发生过失效则放弃，
+避免把失效通知之前读到的旧值放进 L1。
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, List
+
+
+class LocalCache:
+    """进程内 LRU + TTL 缓存（线程安全）"""
+    
+    def __init__(self, max_entries: int, ttl: float):
+        """
+        Args:
+            max_entries: 最多缓存的 Redis 键数
+            ttl: 每个键的存活时间（秒）
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.generation = 0
+        self._entries: "OrderedDict[str, List]" = OrderedDict()  # key -> [expires_at, {field: value}]
+        self._lock = threading.Lock()
+    
+    def get(self, key: str, field: Optional[str] = None) -> Optional[str]:
+        """
+        读取缓存值
+        
+        Args:
+            key: Redis 键
+            field: 哈希字段（字符串键为 None）
+        
+        Returns:
+            缓存值；未缓存或已过期返回 None
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[1].get(field)
+    
+    def set(self, key: str, field: Optional[str], value: str, generation: int) -> None:
+        """
+        写入缓存值
+        
+        Args:
+            key: Redis 键
+            field: 哈希字段（字符串键为 None）
+            value: 值
+            generation: 读取 Redis 之前的 generation（期间发生过失效时不写入）
+        """
+        with self._lock:
+            if generation != self.generation:
+                return
+            now = time.monotonic()
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= now:
+                entry = [now + self.ttl, {}]
+                self._entries[key] = entry
+            self._entries.move_to_end(key)
+            entry[1][field] = value
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+    
+    def invalidate(self, *keys: str) -> None:
+        """使若干 Redis 键的全部字段失效"""
+        with self._lock:
+            self.generation += 1
+            for key in keys:
+                self._entries.pop(key, None)
+    
+    def clear(self) -> None:
+        """清空缓存"""
+        with self._lock:
+            self.generation += 1
+            self._entries.clear()
+    
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,75 @@
+"""
+游标（keyset）分页与流式 JSON 工具
+
+游标是排序键最后一行的值（JSON 数组），经 URL 安全的 base64 编码后对客户端不透明：
+下一页查询 "排序键 > 游标" 的行，不使用 OFFSET，任意页的代价相同。
+
+列表接口保持返回 JSON 数组，下一页游标放在响应头 X-Next-Cursor 中（最后一页不返回该头）。
+"""
+import base64
+import json
+from typing import Any, Iterable, Iterator, List, Optional
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+# 流式响应每次写出的行数
+STREAM_CHUNK_SIZE = 500
+
+
+def encode_cursor(values: List[Any]) -> str:
+    """
+    编码游标
+    
+    Args:
+        values: 排序键的值（如 [year_id, model_name, model_id]）
+    """
+    raw = json.dumps(values, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode("ascii")
+
+
+def decode_cursor(cursor: Optional[str], size: int) -> Optional[List[Any]]:
+    """
+    解码游标
+    
+    Args:
+        cursor: 客户端传回的游标（None 表示第一页）
+        size: 排序键的字段数
+    
+    Returns:
+        排序键的值列表；cursor 为空时返回 None
+    
+    Raises:
+        ValueError: 游标格式无效
+    """
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except (ValueError, TypeError):
+        values = None
+    if not isinstance(values, list) or len(values) != size:
+        raise ValueError("分页游标无效")
+    return values
+
+
+def stream_json_array(items: Iterable[Any], chunk_size: int = STREAM_CHUNK_SIZE) -> Iterator[bytes]:
+    """
+    把可迭代对象逐块序列化为 JSON 数组（配合 StreamingResponse，内存占用与结果集大小无关）
+    
+    Args:
+        items: 可 JSON 序列化的元素（通常是 dict）
+        chunk_size: 每块包含的元素数
+    """
+    yield b"["
+    chunk: List[str] = []
+    first = True
+    for item in items:
+        chunk.append(json.dumps(item, ensure_ascii=False, separators=(",", ":")))
+        if len(chunk) >= chunk_size:
+            yield (("" if first else ",") + ",".join(chunk)).encode("utf-8")
+            first = False
+            chunk = []
+    if chunk:
+        yield (("" if first else ",") + ",".join(chunk)).encode("utf-8")
+    yield b"]"
@@ -0,0 +1,264 @@
+"""
+轮毂商品详情（组装 + 按商品缓存）
+
+详情页需要商品、全部上架规格、品牌、标签（mini_product_tag_relation + mini_product_tag）
+和图集（mini_gallery）。组装固定执行 4 条查询（商品、规格、标签、图集；品牌来自进程内品牌字典），
+序列化后的 JSON 按商品缓存在 Redis（DB=4）：
+
+    catalog:product:{id}:ver    商品版本号（scripts/refresh_product_catalog.py --product-id 递增）
+    catalog:product:{id}:doc    "{catalog_version}.{product_version}|{json}"
+
+读取时一次 MGET 同时取回版本号和文档，文档前缀与当前版本一致才算命中。
+商品目录版本号（catalog:ver:product，品牌等变化时递增）也计入前缀，品牌改名后详情同样失效。
+
+按 slug 访问时，slug -> 商品ID 也缓存在 DB=4（TTL REDIS_CATALOG_TTL），命中时不查询数据库：
+
+    catalog:product:slug:{slug}  "{catalog_version}|{product_id}"
+
+映射按商品目录版本号失效；修改 slug 后需执行默认的 refresh_product_catalog（递增目录版本号），
+只递增单个商品版本号（--product-id）时旧 slug 最长在 TTL 内仍指向原商品。
+"""
+from typing import Optional, List, Tuple
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from app.database import get_table
+from app.core.catalog_cache import catalog_cache
+from app.core.brand_dictionary import brand_dictionary
+from app.schemas.shop import (
+    WheelProductDetailResponse,
+    WheelSpecResponse,
+    WheelBrandResponse,
+    WheelTagResponse,
+    WheelGalleryResponse,
+)
+
+PRODUCT_KEY_PREFIX = "catalog:product"
+
+# 详情页可见的商品状态（售罄商品仍可查看）
+DETAIL_VISIBLE_STATUSES = ("normal", "soldout")
+
+
+class ProductDetailCache:
+    """商品详情 JSON 缓存（按商品版本号 + 商品目录版本号失效）"""
+    
+    @staticmethod
+    def get_version_key(product_id: int) -> str:
+        """商品版本号键"""
+        return f"{PRODUCT_KEY_PREFIX}:{product_id}:ver"
+    
+    @staticmethod
+    def get_document_key(product_id: int) -> str:
+        """商品详情文档键"""
+        return f"{PRODUCT_KEY_PREFIX}:{product_id}:doc"
+    
+    @staticmethod
+    def get(catalog_version: Optional[int], product_id: int) -> Tuple[Optional[str], Optional[str]]:
+        """
+        获取缓存的详情 JSON（一次 MGET）
+        
+        Args:
+            catalog_version: 商品目录版本号（None 表示版本未知，不使用缓存）
+            product_id: 商品ID
+        
+        Returns:
+            (详情 JSON，未命中为 None；当前版本戳，回填时使用，不使用缓存时为 None)
+        """
+        if catalog_version is None:
+            return None, None
+        product_version, document = catalog_cache.mget([
+            ProductDetailCache.get_version_key(product_id),
+            ProductDetailCache.get_document_key(product_id),
+        ])
+        stamp = f"{catalog_version}.{product_version or 0}|"
+        if document is not None and document.startswith(stamp):
+            return document[len(stamp):], stamp
+        return None, stamp
+    
+    @staticmethod
+    def get_slug_key(slug: str) -> str:
+        """slug -> 商品ID 映射键"""
+        return f"{PRODUCT_KEY_PREFIX}:slug:{slug}"
+    
+    @staticmethod
+    def get_product_id(catalog_version: Optional[int], slug: str) -> Optional[int]:
+        """
+        获取缓存的 slug -> 商品ID（一次 GET）
+        
+        Args:
+            catalog_version: 商品目录版本号（None 表示版本未知，不使用缓存）
+            slug: URL 别名
+        
+        Returns:
+            商品ID，未命中或版本不一致时返回 None
+        """
+        if catalog_version is None:
+            return None
+        value = catalog_cache.get(ProductDetailCache.get_slug_key(slug))
+        if value is None:
+            return None
+        version, _, product_id = value.partition("|")
+        if version != str(catalog_version) or not product_id.isdigit():
+            return None
+        return int(product_id)
+    
+    @staticmethod
+    def set_product_id(catalog_version: Optional[int], slug: str, product_id: int) -> bool:
+        """
+        回填 slug -> 商品ID
+        
+        Args:
+            catalog_version: 查询时的商品目录版本号
+            slug: URL 别名
+            product_id: 商品ID
+        """
+        if catalog_version is None:
+            return False
+        return catalog_cache.set(ProductDetailCache.get_slug_key(slug), f"{catalog_version}|{product_id}")
+    
+    @staticmethod
+    def set(stamp: Optional[str], product_id: int, payload: str) -> bool:
+        """
+        回填详情 JSON（读取后版本号又发生变化时，写入的旧版本戳在下次读取时不会命中）
+        
+        Args:
+            stamp: get() 返回的版本戳
+            product_id: 商品ID
+            payload: 序列化后的 WheelProductDetailResponse
+        """
+        if stamp is None:
+            return False
+        return catalog_cache.set(ProductDetailCache.get_document_key(product_id), stamp + payload)
+
+
+def _split_images(images: Optional[str]) -> List[str]:
+    """图集字段（逗号分隔的路径）转列表"""
+    if not images:
+        return []
+    return [image.strip() for image in images.split(",") if image.strip()]
+
+
+def find_product_id_by_slug(db: Session, slug: str) -> Optional[int]:
+    """
+    按 slug 查找商品ID（走 slug 索引）
+    
+    Args:
+        db: 数据库会话
+        slug: URL 别名
+    """
+    products_table = get_table("mini_product")
+    return db.execute(
+        select(products_table.c.id)
+        .where(products_table.c.slug == slug)
+        .limit(1)
+    ).scalar()
+
+
+def load_product_detail(db: Session, product_id: int) -> Optional[WheelProductDetailResponse]:
+    """
+    从数据库组装商品详情（4 条查询，与规格 / 标签 / 图集数量无关）
+    
+    Args:
+        db: 数据库会话
+        product_id: 商品ID
+    
+    Returns:
+        商品详情，商品不存在或不可见时返回 None
+    """
+    products_table = get_table("mini_product")
+    specs_table = get_table("mini_product_spec")
+    tag_relation_table = get_table("mini_product_tag_relation")
+    tags_table = get_table("mini_product_tag")
+    gallery_table = get_table("mini_gallery")
+    
+    product_row = db.execute(
+        select(products_table)
+        .where(
+            products_table.c.id == product_id,
+            products_table.c.status.in_(DETAIL_VISIBLE_STATUSES),
+        )
+    ).fetchone()
+    if product_row is None:
+        return None
+    
+    spec_rows = db.execute(
+        select(specs_table)
+        .where(
+            specs_table.c.product_id == product_id,
+            specs_table.c.status == "normal",
+        )
+        .order_by(
+            specs_table.c.weigh.desc(),
+            specs_table.c.createtime.desc(),
+            specs_table.c.id.desc(),
+        )
+    ).fetchall()
+    
+    tag_rows = db.execute(
+        select(tags_table.c.id, tags_table.c.name, tags_table.c.color)
+        .select_from(
+            tag_relation_table.join(tags_table, tags_table.c.id == tag_relation_table.c.tag_id)
+        )
+        .where(
+            tag_relation_table.c.product_id == product_id,
+            tags_table.c.status == "normal",
+        )
+        .order_by(tags_table.c.weigh.desc(), tags_table.c.id)
+    ).fetchall()
+    
+    gallery_rows = db.execute(
+        select(gallery_table)
+        .where(
+            gallery_table.c.product_id == product_id,
+            gallery_table.c.status == "normal",
+        )
+        .order_by(gallery_table.c.weigh.desc(), gallery_table.c.id)
+    ).fetchall()
+    
+    brand = brand_dictionary.get(db).get(product_row.brand_id)
+    
+    return WheelProductDetailResponse(
+        product_id=product_row.id,
+        name=product_row.name,
+        slug=product_row.slug,
+        brand_id=product_row.brand_id,
+        brand_name=brand.name if brand is not None else None,
+        brand=WheelBrandResponse(
+            id=brand.id,
+            name=brand.name,
+            slug=brand.slug,
+            logo=brand.logo,
+        ) if brand is not None else None,
+        image=product_row.image,
+        sale_price=product_row.sale_price,
+        original_price=product_row.original_price,
+        price_per=product_row.price_per,
+        stock=product_row.stock or 0,
+        status=product_row.status,
+        specs=[
+            WheelSpecResponse(
+                spec_id=spec_row.id,
+                size=spec_row.size,
+                diameter=spec_row.diameter,
+                width=spec_row.width,
+                pcd=spec_row.pcd,
+                offset=spec_row.offset,
+                center_bore=spec_row.center_bore,
+                price=spec_row.price,
+                stock=spec_row.stock or 0,
+            )
+            for spec_row in spec_rows
+        ],
+        tags=[
+            WheelTagResponse(id=tag_row.id, name=tag_row.name, color=tag_row.color)
+            for tag_row in tag_rows
+        ],
+        gallery=[
+            WheelGalleryResponse(
+                id=gallery_row.id,
+                title=gallery_row.title,
+                image=gallery_row.image,
+                images=_split_images(gallery_row.images),
+            )
+            for gallery_row in gallery_rows
+        ],
+    )
@@ -0,0 +1,132 @@
+"""
+规格实时价格 / 库存覆盖层（Redis DB=4 哈希，按商品目录版本号隔离）
+
+mini_product_spec 的 price、stock 变化频繁。只修改价格 / 库存时不必递增商品目录版本号，
+而是生成覆盖层，缓存的商品列表 / 详情在返回前用它替换其中规格的 price、stock：
+
+    catalog:spec:live:v{product_version}   field = spec_id, value = {"price": 199.0, "stock": 4}
+
+- 只改价格 / 库存：python -m scripts.refresh_product_catalog --overlay，由 mini_product_spec 生成
+  当前版本的覆盖层（写入临时哈希后 RENAME 原子替换）
+- 其他修改：python -m scripts.refresh_product_catalog（默认）递增版本号，列表 / 详情缓存从数据库重建，
+  旧版本的覆盖层不再被读取（并被删除），不会用旧价格覆盖新数据
+- 覆盖层没有的规格沿用缓存中的值
+
+每个进程每隔 WHEEL_SEARCH_CHECK_SECONDS 检查一次当前版本的覆盖层是否存在（一次 EXISTS）；
+不存在时直接返回缓存的 JSON，不扫描、不访问 Redis。存在时先从 JSON 文本中取出 spec_id 做一次 HMGET，
+没有任何覆盖值时同样原样返回，只有存在覆盖值时才解析并替换。
+
+注意：搜索快照中的价格（价格区间筛选、价格排序）在下次快照重建时才会更新。
+"""
+import json
+import re
+import time
+from typing import Optional, Dict, Any, List, Tuple
+from app.config import settings
+from app.core.catalog_cache import catalog_cache
+
+SPEC_LIVE_KEY_PREFIX = "catalog:spec:live"
+
+# 序列化后的规格中的 spec_id（字符串值中的引号已转义，不会误匹配）
+_SPEC_ID_PATTERN = re.compile(r'"spec_id":\s*(\d+)')
+
+
+class SpecOverlay:
+    """规格实时价格 / 库存读取（进程内缓存当前版本覆盖层是否存在）"""
+    
+    def __init__(self):
+        self._version: Optional[int] = None
+        self._active = False
+        self._checked_at = 0.0
+    
+    @staticmethod
+    def get_key(version: int) -> str:
+        """获取指定商品目录版本的覆盖层键"""
+        return f"{SPEC_LIVE_KEY_PREFIX}:v{version}"
+    
+    def is_active(self, version: Optional[int]) -> bool:
+        """
+        当前版本是否存在覆盖层
+        
+        每隔 WHEEL_SEARCH_CHECK_SECONDS（或版本变化时）用一次 EXISTS 检查，其余时间返回进程内缓存值；
+        版本未知或 Redis 不可用时视为不存在。
+        
+        Args:
+            version: 商品目录版本号
+        """
+        if version is None:
+            return False
+        now = time.monotonic()
+        if version != self._version or now - self._checked_at >= settings.WHEEL_SEARCH_CHECK_SECONDS:
+            try:
+                self._active = bool(catalog_cache.client.exists(self.get_key(version)))
+            except Exception:
+                self._active = False
+            self._version = version
+            self._checked_at = now
+        return self._active
+    
+    def get_many(self, version: int, spec_ids: List[int]) -> Dict[int, Tuple[Optional[float], int]]:
+        """
+        批量获取覆盖值（一次 HMGET）
+        
+        Args:
+            version: 商品目录版本号
+            spec_ids: 规格ID列表
+        
+        Returns:
+            spec_id -> (price, stock)，只包含覆盖层中存在的规格；Redis 不可用时为空
+        """
+        values = catalog_cache.hmget(self.get_key(version), [str(spec_id) for spec_id in spec_ids])
+        overlay = {}
+        for spec_id, value in zip(spec_ids, values):
+            if value is None:
+                continue
+            try:
+                data = json.loads(value)
+                overlay[spec_id] = (data.get("price"), int(data.get("stock") or 0))
+            except (ValueError, TypeError, AttributeError):
+                continue  # 格式异常的覆盖值忽略，沿用缓存中的值
+        return overlay
+
+
+# 全局覆盖层实例
+spec_overlay = SpecOverlay()
+
+
+def serialize_live(price: Optional[float], stock: int) -> str:
+    """序列化一个规格的覆盖值"""
+    return json.dumps({"price": price, "stock": stock}, separators=(",", ":"))
+
+
+def apply_spec_overlay(payload: str, version: Optional[int], products_field: Optional[str] = None) -> str:
+    """
+    用当前版本的覆盖层替换商品 JSON 中规格的 price / stock
+    
+    Args:
+        payload: 序列化后的响应（WheelsListResponse 或 WheelProductDetailResponse）
+        version: 当前商品目录版本号（wheel_search.get_version()）
+        products_field: 商品列表所在字段（列表响应为 "items"；None 表示 payload 本身是一个商品）
+    
+    Returns:
+        替换后的 JSON；覆盖层不存在或没有任何覆盖值时原样返回，不解析、不重新序列化
+    """
+    if not spec_overlay.is_active(version):
+        return payload
+    
+    spec_ids = list(dict.fromkeys(int(spec_id) for spec_id in _SPEC_ID_PATTERN.findall(payload)))
+    if not spec_ids:
+        return payload
+    
+    overlay = spec_overlay.get_many(version, spec_ids)
+    if not overlay:
+        return payload
+    
+    document: Dict[str, Any] = json.loads(payload)
+    products = (document.get(products_field) or []) if products_field else [document]
+    specs = [spec for product in products for spec in product.get("specs") or ()]
+    for spec in specs:
+        live = overlay.get(spec["spec_id"])
+        if live is not None:
+            spec["price"], spec["stock"] = live
+    return json.dumps(document, ensure_ascii=False, separators=(",", ":"))
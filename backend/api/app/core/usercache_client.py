@@ -1,11 +1,70 @@
 """
 用户缓存 Redis 客户端（DB=3）
 用于缓存用户相关的访问数据：地址、订单、物流等
+
+版本化缓存键：usercache:{cache_type}:v{version}:u{user_id}:{suffix}
+版本号键：usercache:{cache_type}:ver:u{user_id}（递增后旧版本的键全部失效）
+
+get_versioned / set_versioned / delete_versioned 在服务端脚本中解析版本号并读写数据键，
+一次往返完成（原先先 GET 版本号、再读写数据键，至少两次串行往返）。
+地址缓存已改为按用户的哈希（见下），不再使用这组原语；它们保留给键分散、需要按版本号批量失效的
+缓存（订单、物流等）。
+
+按用户聚合的缓存（如地址）使用哈希：usercache:{cache_type}:u{user_id}，每个视图一个字段，
+整体过期、整体删除或整体替换（hget / hset_fields / replace_hash / hdel）。
+哈希字段值为 Python 对象，经 cache_codec 编码（头字节 + JSON/MessagePack，超过阈值时压缩）后
+通过不解码响应的连接（raw_client）读写。
+
+可选的进程内 L1（REDIS_USERCACHE_L1_ENABLED，app/core/local_cache.py）缓存 get / hget 的结果：
+本进程写入或删除键时本地失效，并在频道 usercache:invalidate 上发布键名，
+每个 worker 的订阅线程收到后失效本地副本。订阅未建立（或断开重连）期间不使用 L1，
+重连时清空 L1；通知丢失时陈旧时间不超过 REDIS_USERCACHE_L1_TTL。
 """
 import json
+import threading
+import time
 import redis
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Tuple
 from app.config import settings
+from app.core.cache_codec import cache_codec
+from app.core.local_cache import LocalCache
+
+# L1 失效通知频道（消息为换行分隔的键名）
+INVALIDATION_CHANNEL = "usercache:invalidate"
+
+# 版本号键的过期时间（7天）
+VERSION_TTL = 86400 * 7
+
+# 数据键依赖版本号，只能在脚本内拼接（未声明在 KEYS 中，适用于单节点 Redis，不适用于 Cluster）
+# 版本号不存在时初始化为 1（与 get_version 一致）
+# KEYS[1]: 版本号键；ARGV[1] / ARGV[2]: 数据键在版本号前后的部分；ARGV[3]: 版本号TTL
+_RESOLVE_VERSION = """
+local version = redis.call('GET', KEYS[1])
+if not version then
+    version = '1'
+    redis.call('SET', KEYS[1], version, 'EX', ARGV[3])
+end
+"""
+
+# 读取：返回 {版本号, 数据}
+_GET_VERSIONED_SCRIPT = _RESOLVE_VERSION + """
+return {version, redis.call('GET', ARGV[1] .. version .. ARGV[2])}
+"""
+
+# 写入：ARGV[4] 数据，ARGV[5] 数据TTL；返回版本号
+_SET_VERSIONED_SCRIPT = _RESOLVE_VERSION + """
+redis.call('SET', ARGV[1] .. version .. ARGV[2], ARGV[4], 'EX', ARGV[5])
+return version
+"""
+
+# 删除：ARGV[4] 起为各数据键的后缀（完整键为 ARGV[1] .. 版本号 .. ARGV[2] .. 后缀）；返回删除数量
+_DELETE_VERSIONED_SCRIPT = _RESOLVE_VERSION + """
+local deleted = 0
+for i = 4, #ARGV do
+    deleted = deleted + redis.call('DEL', ARGV[1] .. version .. ARGV[2] .. ARGV[i])
+end
+return deleted
+"""
 
 
 class UserCacheClient:
@@ -24,7 +83,77 @@ class UserCacheClient:
             redis_kwargs["password"] = settings.REDIS_PASSWORD
         
         self.client = redis.Redis(**redis_kwargs)
+        # 编码后的二进制值（哈希字段）使用不解码响应的连接
+        self.raw_client = redis.Redis(**{**redis_kwargs, "decode_responses": False})
         self.default_ttl = settings.REDIS_USERCACHE_TTL
+        
+        # 脚本按 SHA 调用（EVALSHA，服务端未缓存时自动回退 EVAL）
+        self._get_versioned_script = self.client.register_script(_GET_VERSIONED_SCRIPT)
+        self._set_versioned_script = self.client.register_script(_SET_VERSIONED_SCRIPT)
+        self._delete_versioned_script = self.client.register_script(_DELETE_VERSIONED_SCRIPT)
+        
+        # 进程内 L1（可选）
+        self.local: Optional[LocalCache] = None
+        if settings.REDIS_USERCACHE_L1_ENABLED:
+            self.local = LocalCache(settings.REDIS_USERCACHE_L1_SIZE, settings.REDIS_USERCACHE_L1_TTL)
+        self._subscribed = threading.Event()
+        self._subscriber: Optional[threading.Thread] = None
+        self._subscriber_lock = threading.Lock()
+    
+    def _local_ready(self) -> bool:
+        """L1 是否可用（已启用且失效订阅已建立；首次调用时启动订阅线程）"""
+        if self.local is None:
+            return False
+        if self._subscriber is None:
+            with self._subscriber_lock:
+                if self._subscriber is None:
+                    self._subscriber = threading.Thread(
+                        target=self._listen_invalidations,
+                        name="usercache-invalidation",
+                        daemon=True,
+                    )
+                    self._subscriber.start()
+        return self._subscribed.is_set()
+    
+    def _listen_invalidations(self) -> None:
+        """订阅线程：接收失效通知并失效本地副本，连接异常时清空 L1 并重连"""
+        while True:
+            pubsub = None
+            try:
+                pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(INVALIDATION_CHANNEL)
+                # 订阅建立之前的通知可能已丢失
+                self.local.clear()
+                self._subscribed.set()
+                while True:
+                    message = pubsub.get_message(timeout=1.0)
+                    if message is None:
+                        continue
+                    data = message.get("data")
+                    if isinstance(data, bytes):
+                        data = data.decode("utf-8")
+                    if isinstance(data, str):
+                        self.local.invalidate(*data.split("\n"))
+            except Exception:
+                self._subscribed.clear()
+                self.local.clear()
+            finally:
+                if pubsub is not None:
+                    try:
+                        pubsub.close()
+                    except Exception:
+                        pass
+            time.sleep(1)
+    
+    def _invalidate_local(self, *keys: str) -> None:
+        """写入 / 删除键后失效本进程的 L1 副本，并通知其他进程"""
+        if self.local is None or not keys:
+            return
+        self.local.invalidate(*keys)
+        try:
+            self.client.publish(INVALIDATION_CHANNEL, "\n".join(keys))
+        except Exception:
+            pass
     
     def ping(self) -> bool:
         """检查 Redis 连接"""
@@ -43,10 +172,19 @@ class UserCacheClient:
         Returns:
             缓存值（字符串），如果不存在返回 None
         """
+        local = self.local if self._local_ready() else None
+        if local is not None:
+            value = local.get(key)
+            if value is not None:
+                return value
+            generation = local.generation
         try:
-            return self.client.get(key)
+            value = self.client.get(key)
         except Exception:
             return None
+        if local is not None and value is not None:
+            local.set(key, None, value, generation)
+        return value
     
     def set(self, key: str, value: str, ttl: Optional[int] = None) -> bool:
         """
@@ -67,6 +205,8 @@ class UserCacheClient:
             return True
         except Exception:
             return False
+        finally:
+            self._invalidate_local(key)
     
     def delete(self, *keys: str) -> int:
         """
@@ -84,6 +224,8 @@ class UserCacheClient:
             return self.client.delete(*keys)
         except Exception:
             return 0
+        finally:
+            self._invalidate_local(*keys)
     
     def delete_pattern(self, pattern: str) -> int:
         """
@@ -102,12 +244,121 @@ class UserCacheClient:
                 cursor, keys = self.client.scan(cursor, match=pattern, count=100)
                 if keys:
                     deleted_count += self.client.delete(*keys)
+                    self._invalidate_local(*keys)
                 if cursor == 0:
                     break
             return deleted_count
         except Exception:
             return 0
     
+    def hget(self, key: str, field: str) -> Optional[Any]:
+        """
+        获取哈希字段值（解码后的对象；L1 中保存编码后的字节，每次读取解码出新的对象）
+        
+        Args:
+            key: 哈希键
+            field: 字段名
+            
+        Returns:
+            字段值，如果不存在或无法解码返回 None
+        """
+        local = self.local if self._local_ready() else None
+        data = local.get(key, field) if local is not None else None
+        if data is None:
+            if local is not None:
+                generation = local.generation
+            try:
+                data = self.raw_client.hget(key, field)
+            except Exception:
+                return None
+            if data is None:
+                return None
+            if local is not None:
+                local.set(key, field, data, generation)
+        try:
+            return cache_codec.decode(data)
+        except ValueError:
+            return None
+    
+    def hset_fields(self, key: str, mapping: Dict[str, Any], ttl: Optional[int] = None) -> bool:
+        """
+        设置哈希字段并刷新整个哈希的过期时间（HSET 与 EXPIRE 在同一个事务管道中，一次往返）
+        
+        Args:
+            key: 哈希键
+            mapping: {字段名: 字段值}（值经 cache_codec 编码）
+            ttl: 过期时间（秒），None 使用默认TTL
+            
+        Returns:
+            是否成功（值无法编码时返回 False）
+        """
+        if not mapping:
+            return True
+        try:
+            encoded = {field: cache_codec.encode(value) for field, value in mapping.items()}
+        except TypeError:
+            return False
+        try:
+            pipe = self.raw_client.pipeline(transaction=True)
+            pipe.hset(key, mapping=encoded)
+            pipe.expire(key, ttl or self.default_ttl)
+            pipe.execute()
+            return True
+        except Exception:
+            return False
+        finally:
+            self._invalidate_local(key)
+    
+    def replace_hash(self, key: str, mapping: Dict[str, Any], ttl: Optional[int] = None) -> bool:
+        """
+        整体替换哈希（DEL + HSET + EXPIRE 在同一个事务中，读者不会看到新旧字段混合的状态）
+        
+        Args:
+            key: 哈希键
+            mapping: {字段名: 字段值}（值经 cache_codec 编码），为空时只删除
+            ttl: 过期时间（秒），None 使用默认TTL
+            
+        Returns:
+            是否成功（值无法编码时只删除旧哈希并返回 False）
+        """
+        try:
+            encoded = {field: cache_codec.encode(value) for field, value in mapping.items()}
+        except TypeError:
+            self.delete(key)
+            return False
+        try:
+            pipe = self.raw_client.pipeline(transaction=True)
+            pipe.delete(key)
+            if encoded:
+                pipe.hset(key, mapping=encoded)
+                pipe.expire(key, ttl or self.default_ttl)
+            pipe.execute()
+            return True
+        except Exception:
+            return False
+        finally:
+            self._invalidate_local(key)
+    
+    def hdel(self, key: str, *fields: str) -> int:
+        """
+        删除哈希字段
+        
+        Args:
+            key: 哈希键
+            *fields: 字段名（可变参数）
+            
+        Returns:
+            删除的字段数量
+        """
+        try:
+            if not fields:
+                return 0
+            return self.client.hdel(key, *fields)
+        except Exception:
+            return 0
+        finally:
+            self._invalidate_local(key)
+    
     def exists(self, key: str) -> bool:
         """
         检查键是否存在
@@ -150,11 +401,11 @@ class UserCacheClient:
         Returns:
             版本号（从1开始）
         """
-        key = f"usercache:{cache_type}:ver:u{user_id}"
+        key = self.get_version_key(user_id, cache_type)
         version = self.client.get(key)
         if version is None:
             # 初始化版本号
-            self.client.set(key, "1", ex=86400 * 7)  # 7天过期
+            self.client.set(key, "1", ex=VERSION_TTL)
             return 1
         return int(version)
     
@@ -169,15 +420,107 @@ class UserCacheClient:
         Returns:
             新的版本号
         """
-        key = f"usercache:{cache_type}:ver:u{user_id}"
+        key = self.get_version_key(user_id, cache_type)
         try:
-            new_version = self.client.incr(key)
-            self.client.expire(key, 86400 * 7)  # 7天过期
+            # INCR 与 EXPIRE 放在同一个事务管道中，一次往返
+            pipe = self.client.pipeline(transaction=True)
+            pipe.incr(key)
+            pipe.expire(key, VERSION_TTL)
+            new_version, _ = pipe.execute()
             return new_version
         except Exception:
             # 如果失败，返回1
-            self.client.set(key, "1", ex=86400 * 7)
+            self.client.set(key, "1", ex=VERSION_TTL)
             return 1
+    
+    @staticmethod
+    def get_version_key(user_id: int, cache_type: str) -> str:
+        """用户缓存版本号键"""
+        return f"usercache:{cache_type}:ver:u{user_id}"
+    
+    @staticmethod
+    def _versioned_key_parts(user_id: int, cache_type: str) -> Tuple[str, str]:
+        """版本化数据键在版本号前后的部分（"usercache:addr:v" 与 ":u{user_id}:"）"""
+        return f"usercache:{cache_type}:v", f":u{user_id}:"
+    
+    def get_versioned(self, user_id: int, cache_type: str, suffix: str) -> Tuple[Optional[int], Optional[str]]:
+        """
+        一次往返读取当前版本的缓存值（版本号不存在时初始化为 1）
+        
+        Args:
+            user_id: 用户ID
+            cache_type: 缓存类型（如 "addr"）
+            suffix: 数据键在用户ID之后的部分（如 "list:all"，完整键为 usercache:addr:v{ver}:u{uid}:list:all）
+            
+        Returns:
+            (版本号, 缓存值)；缓存未命中时缓存值为 None，Redis 不可用时返回 (None, None)
+        """
+        prefix, infix = self._versioned_key_parts(user_id, cache_type)
+        try:
+            version, value = self._get_versioned_script(
+                keys=[self.get_version_key(user_id, cache_type)],
+                args=[prefix, infix + suffix, VERSION_TTL],
+                client=self.client,
+            )
+            return int(version), value
+        except Exception:
+            return None, None
+    
+    def set_versioned(
+        self,
+        user_id: int,
+        cache_type: str,
+        suffix: str,
+        value: str,
+        ttl: Optional[int] = None
+    ) -> bool:
+        """
+        一次往返写入当前版本的缓存值
+        
+        Args:
+            user_id: 用户ID
+            cache_type: 缓存类型（如 "addr"）
+            suffix: 数据键在用户ID之后的部分
+            value: 缓存值（字符串）
+            ttl: 过期时间（秒），None 使用默认TTL
+            
+        Returns:
+            是否成功
+        """
+        prefix, infix = self._versioned_key_parts(user_id, cache_type)
+        try:
+            self._set_versioned_script(
+                keys=[self.get_version_key(user_id, cache_type)],
+                args=[prefix, infix + suffix, VERSION_TTL, value, ttl or self.default_ttl],
+                client=self.client,
+            )
+            return True
+        except Exception:
+            return False
+    
+    def delete_versioned(self, user_id: int, cache_type: str, *suffixes: str) -> int:
+        """
+        一次往返删除当前版本的若干缓存键
+        
+        Args:
+            user_id: 用户ID
+            cache_type: 缓存类型（如 "addr"）
+            *suffixes: 数据键在用户ID之后的部分（可变参数）
+            
+        Returns:
+            删除的键数量
+        """
+        if not suffixes:
+            return 0
+        prefix, infix = self._versioned_key_parts(user_id, cache_type)
+        try:
+            return self._delete_versioned_script(
+                keys=[self.get_version_key(user_id, cache_type)],
+                args=[prefix, infix, VERSION_TTL, *suffixes],
+                client=self.client,
+            )
+        except Exception:
+            return 0
 
 
 # 全局用户缓存客户端实例
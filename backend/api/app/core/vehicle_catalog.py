@@ -0,0 +1,332 @@
+"""
+车辆目录快照（年份 / 品牌 / 型号）
+
+mini_vehicle_year / mini_vehicle_make / mini_vehicle_model 只在 ETL 运行时变化，
+因此每个进程加载一次不可变快照，级联下拉接口直接从内存返回，不访问数据库。
+
+存储方式（紧凑、只读）：
+- 整数列使用 array('i')，名称做字典编码（每个名称只存一次，行里只存下标）
+- 品牌按 (year_id, make_name) 排序，offset 索引 year_id -> [start, end)
+- 型号按 (year_id, make_id, model_name, model_id) 排序，offset 索引 (year_id, make_id) -> [start, end)
+- 型号列表支持游标分页：游标为 [year_id, model_name, model_id]，用二分定位起点
+
+ETL 完成后递增 Redis 中的目录版本号（catalog:ver:vehicle），各进程每隔
+VEHICLE_CATALOG_CHECK_SECONDS 检查一次，版本变化时重建新快照并整体替换引用
+（读请求始终拿到完整的旧快照或新快照，不会看到半成品）。
+"""
+import threading
+import time
+from array import array
+from bisect import bisect_right
+from typing import Optional, List, Dict, Tuple, Sequence
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.database import get_table
+from app.core.catalog_cache import catalog_cache
+
+VEHICLE_CATALOG = "vehicle"
+
+
+def _name_sort_key(name: str) -> Tuple[str, str]:
+    """名称排序键（近似 MySQL 不区分大小写的排序规则）"""
+    return (name.casefold(), name)
+
+
+class VehicleCatalogSnapshot:
+    """车辆目录不可变快照"""
+    
+    __slots__ = (
+        "version",
+        "names",
+        "year_ids",
+        "year_values",
+        "year_id_by_year",
+        "make_year_ids",
+        "make_ids",
+        "make_names",
+        "make_offsets",
+        "make_order_by_name",
+        "model_year_ids",
+        "model_make_ids",
+        "model_ids",
+        "model_names",
+        "model_offsets",
+        "model_order_by_make",
+    )
+    
+    def __init__(
+        self,
+        version: Optional[int],
+        years: List[Tuple[int, int]],
+        makes: List[Tuple[int, int, str]],
+        models: List[Tuple[int, int, int, str]],
+    ):
+        """
+        Args:
+            version: 目录版本号
+            years: [(id, year), ...]
+            makes: [(year_id, make_id, make_name), ...]
+            models: [(year_id, make_id, model_id, model_name), ...]
+        """
+        self.version = version
+        
+        # 名称字典（品牌名和型号名共用）
+        name_index: Dict[str, int] = {}
+        names: List[str] = []
+        
+        def encode(name: str) -> int:
+            idx = name_index.get(name)
+            if idx is None:
+                idx = len(names)
+                name_index[name] = idx
+                names.append(name)
+            return idx
+        
+        # 年份：按 year DESC
+        years = sorted(years, key=lambda row: row[1], reverse=True)
+        self.year_ids = array("i", (row[0] for row in years))
+        self.year_values = array("i", (row[1] for row in years))
+        self.year_id_by_year = {}
+        for year_id, year in years:
+            self.year_id_by_year.setdefault(year, year_id)
+        
+        # 品牌：按 (year_id, make_name)
+        makes = sorted(makes, key=lambda row: (row[0], _name_sort_key(row[2])))
+        self.make_year_ids = array("i", (row[0] for row in makes))
+        self.make_ids = array("i", (row[1] for row in makes))
+        self.make_names = array("i", (encode(row[2]) for row in makes))
+        self.make_offsets = self._build_offsets(
+            [row[0] for row in makes]
+        )
+        self.make_order_by_name = array(
+            "i",
+            sorted(range(len(makes)), key=lambda i: _name_sort_key(makes[i][2])),
+        )
+        
+        # 型号：按 (year_id, make_id, model_name, model_id)
+        models = sorted(models, key=lambda row: (row[0], row[1], _name_sort_key(row[3]), row[2]))
+        self.model_year_ids = array("i", (row[0] for row in models))
+        self.model_make_ids = array("i", (row[1] for row in models))
+        self.model_ids = array("i", (row[2] for row in models))
+        self.model_names = array("i", (encode(row[3]) for row in models))
+        self.model_offsets = self._build_offsets(
+            [(row[0], row[1]) for row in models]
+        )
+        
+        # 未指定年份时按品牌列出型号：year_id DESC, model_name ASC, model_id ASC
+        by_make: Dict[int, List[int]] = {}
+        for i in sorted(
+            range(len(models)),
+            key=lambda i: (-models[i][0], _name_sort_key(models[i][3]), models[i][2]),
+        ):
+            by_make.setdefault(models[i][1], []).append(i)
+        self.model_order_by_make = {
+            make_id: array("i", rows) for make_id, rows in by_make.items()
+        }
+        
+        self.names = tuple(names)
+    
+    @staticmethod
+    def _build_offsets(keys: list) -> dict:
+        """为已排序的键序列构建 key -> (start, end) 索引"""
+        offsets = {}
+        start = 0
+        for i in range(1, len(keys) + 1):
+            if i == len(keys) or keys[i] != keys[start]:
+                offsets[keys[start]] = (start, i)
+                start = i
+        return offsets
+    
+    def get_year_id(self, year: int) -> Optional[int]:
+        """年份 -> year_id，不存在返回 None"""
+        return self.year_id_by_year.get(year)
+    
+    def years(self) -> List[dict]:
+        """所有年份（year DESC）"""
+        return [
+            {"id": year_id, "year": year}
+            for year_id, year in zip(self.year_ids, self.year_values)
+        ]
+    
+    def makes(self, year: Optional[int] = None) -> List[dict]:
+        """
+        品牌列表（make_name ASC）
+        
+        Args:
+            year: 年份，None 表示所有年份（与原 SQL 一致，不去重）
+        """
+        if year is None:
+            rows = self.make_order_by_name
+        else:
+            year_id = self.get_year_id(year)
+            if year_id is None:
+                return []
+            start, end = self.make_offsets.get(year_id, (0, 0))
+            rows = range(start, end)
+        
+        names = self.names
+        return [
+            {"id": self.make_ids[i], "name": names[self.make_names[i]]}
+            for i in rows
+        ]
+    
+    def _model_sort_key(self, i: int) -> tuple:
+        """型号行的分页排序键：(year_id DESC, model_name, model_id)"""
+        return (
+            -self.model_year_ids[i],
+            _name_sort_key(self.names[self.model_names[i]]),
+            self.model_ids[i],
+        )
+    
+    def model_rows(
+        self,
+        make_id: int,
+        year: Optional[int] = None,
+        after: Optional[list] = None,
+    ) -> Sequence[int]:
+        """
+        型号行下标（已排序，可直接切片分页）
+        
+        Args:
+            make_id: 品牌ID
+            year: 年份；提供时按 model_name ASC，否则按 year_id DESC, model_name ASC
+            after: 游标 [year_id, model_name, model_id]，只返回排在其后的行
+            
+        Raises:
+            ValueError: 游标字段类型无效
+        """
+        if year is None:
+            rows = self.model_order_by_make.get(make_id, array("i"))
+        else:
+            year_id = self.get_year_id(year)
+            if year_id is None:
+                return range(0)
+            start, end = self.model_offsets.get((year_id, make_id), (0, 0))
+            rows = range(start, end)
+        
+        if after is not None:
+            year_id, model_name, model_id = after
+            if not isinstance(year_id, int) or not isinstance(model_name, str) or not isinstance(model_id, int):
+                raise ValueError("分页游标无效")
+            key = (-year_id, _name_sort_key(model_name), model_id)
+            rows = rows[bisect_right(rows, key, key=self._model_sort_key):]
+        
+        return rows
+    
+    def model_item(self, i: int) -> dict:
+        """型号行 -> ModelResponse 字典"""
+        return {
+            "id": self.model_ids[i],
+            "make_id": self.model_make_ids[i],
+            "name": self.names[self.model_names[i]],
+        }
+    
+    def model_cursor(self, i: int) -> list:
+        """型号行 -> 游标值 [year_id, model_name, model_id]"""
+        return [self.model_year_ids[i], self.names[self.model_names[i]], self.model_ids[i]]
+    
+    def models(self, make_id: int, year: Optional[int] = None) -> List[dict]:
+        """
+        型号列表
+        
+        Args:
+            make_id: 品牌ID
+            year: 年份；提供时按 model_name ASC，否则按 year_id DESC, model_name ASC
+        """
+        return [self.model_item(i) for i in self.model_rows(make_id, year)]
+
+
+def load_vehicle_catalog_snapshot(db: Session, version: Optional[int]) -> VehicleCatalogSnapshot:
+    """
+    从数据库加载车辆目录快照（3 条查询）
+    
+    Args:
+        db: 数据库会话
+        version: 目录版本号
+    """
+    years_table = get_table("mini_vehicle_year")
+    makes_table = get_table("mini_vehicle_make")
+    models_table = get_table("mini_vehicle_model")
+    
+    years = db.execute(
+        select(years_table.c.id, years_table.c.year)
+    ).fetchall()
+    makes = db.execute(
+        select(makes_table.c.year_id, makes_table.c.make_id, makes_table.c.make_name)
+    ).fetchall()
+    models = db.execute(
+        select(
+            models_table.c.year_id,
+            models_table.c.make_id,
+            models_table.c.model_id,
+            models_table.c.model_name,
+        )
+    ).fetchall()
+    
+    return VehicleCatalogSnapshot(
+        version,
+        [tuple(row) for row in years],
+        [tuple(row) for row in makes],
+        [tuple(row) for row in models],
+    )
+
+
+class VehicleCatalog:
+    """进程内车辆目录快照持有者（按版本号原子替换）"""
+    
+    def __init__(self):
+        self._snapshot: Optional[VehicleCatalogSnapshot] = None
+        self._version: Optional[int] = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+    
+    def get_version(self) -> Optional[int]:
+        """
+        获取当前车辆目录版本号（不加载快照、不访问数据库）
+        
+        每隔 VEHICLE_CATALOG_CHECK_SECONDS 从 Redis 读取一次，其余时间返回进程内缓存值；
+        Redis 不可用时返回最近一次读到的版本号（从未读到时为 None）。
+        """
+        now = time.monotonic()
+        if now - self._checked_at >= settings.VEHICLE_CATALOG_CHECK_SECONDS:
+            version = catalog_cache.get_version(VEHICLE_CATALOG)
+            if version is not None:
+                self._version = version
+            self._checked_at = now
+        return self._version
+    
+    def get(self, db: Session) -> VehicleCatalogSnapshot:
+        """
+        获取当前快照
+        
+        首次调用时从数据库加载；之后版本号（见 get_version）变化才重新加载。
+        Redis 不可用时继续使用已有快照。
+        
+        需要加载时在当前线程查询数据库，其他调用方在锁上等待；async 接口应通过 run_in_threadpool 调用，
+        加载期间只占用线程池线程，不阻塞事件循环。
+        
+        Args:
+            db: 数据库会话（仅在需要加载快照时使用）
+        """
+        version = self.get_version()
+        snapshot = self._snapshot
+        if snapshot is not None and (version is None or version == snapshot.version):
+            return snapshot
+        
+        with self._lock:
+            # 其他请求可能已经完成重建
+            snapshot = self._snapshot
+            if snapshot is None or (version is not None and version != snapshot.version):
+                snapshot = load_vehicle_catalog_snapshot(db, version)
+                self._snapshot = snapshot
+            return snapshot
+    
+    def invalidate(self) -> None:
+        """丢弃当前快照（下次访问时重新加载）"""
+        self._snapshot = None
+        self._checked_at = 0.0
+
+
+# 全局车辆目录实例
+vehicle_catalog = VehicleCatalog()
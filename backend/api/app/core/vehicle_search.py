@@ -0,0 +1,284 @@
+"""
+车辆名称自动补全索引（typeahead）
+
+用户输入 "2019 civic si" 时，在内存前缀索引中检索 year + make_name + model_name
++ vehicle_name，返回排序后的 vehicle_id，无需逐级点击 年份 -> 品牌 -> 型号 -> 车辆。
+
+索引结构：
+- 行号按展示顺序分配（year DESC, make, model, vehicle_name），倒排表中行号升序即排序顺序
+- tokens: 排好序的唯一词列表；前缀查询用二分定位 [prefix, prefix + "\\uffff") 区间
+- postings[token_id]: array('i')，包含该词的行号
+- row_texts[row]: " token1 token2 ... "，用于校验候选行是否包含其余查询词（前缀/精确）
+
+查询时从候选最少的查询词出发，按行号顺序逐行校验其余词，凑满 limit 即停止，
+避免对宽泛前缀（如 "s"）做大集合求交和全量排序。
+
+索引从车辆目录快照（名称字典）+ 一次 mini_vehicle_detail 查询构建，
+快照版本号变化后重建；重建期间其他请求继续使用旧索引。
+"""
+import heapq
+import re
+import threading
+from array import array
+from bisect import bisect_left
+from typing import Optional, List, Dict, Tuple, Iterator
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from app.database import get_table
+from app.core.vehicle_catalog import vehicle_catalog, VehicleCatalogSnapshot
+
+_TOKEN_PATTERN = re.compile(r"[0-9a-z]+")
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    """切分为小写字母数字词（"Civic Si (FK8)" -> ["civic", "si", "fk8"]）"""
+    if not text:
+        return []
+    return _TOKEN_PATTERN.findall(text.casefold())
+
+
+class VehicleSearchIndex:
+    """不可变的车辆名称前缀索引"""
+    
+    __slots__ = (
+        "version",
+        "vehicle_ids",
+        "years",
+        "make_ids",
+        "model_ids",
+        "labels",
+        "names",
+        "row_texts",
+        "tokens",
+        "postings",
+    )
+    
+    def __init__(self, snapshot: VehicleCatalogSnapshot, detail_rows: list):
+        """
+        Args:
+            snapshot: 车辆目录快照（提供年份、品牌名、型号名）
+            detail_rows: [(vehicle_id, year_id, make_id, model_id, vehicle_name), ...]
+        """
+        self.version = snapshot.version
+        
+        year_by_id = dict(zip(snapshot.year_ids, snapshot.year_values))
+        make_names = {
+            (snapshot.make_year_ids[i], snapshot.make_ids[i]): snapshot.names[snapshot.make_names[i]]
+            for i in range(len(snapshot.make_ids))
+        }
+        model_names = {
+            (snapshot.model_year_ids[i], snapshot.model_make_ids[i], snapshot.model_ids[i]):
+                snapshot.names[snapshot.model_names[i]]
+            for i in range(len(snapshot.model_ids))
+        }
+        
+        rows = []
+        for vehicle_id, year_id, make_id, model_id, vehicle_name in detail_rows:
+            year = year_by_id.get(year_id, 0)
+            make_name = make_names.get((year_id, make_id), "")
+            model_name = model_names.get((year_id, make_id, model_id), "")
+            rows.append((
+                -year,
+                make_name.casefold(),
+                model_name.casefold(),
+                (vehicle_name or "").casefold(),
+                vehicle_id,
+                year,
+                make_id,
+                model_id,
+                make_name,
+                model_name,
+                vehicle_name,
+            ))
+        rows.sort()
+        
+        # 名称字典：品牌名 / 型号名 / 车辆名共用
+        name_index: Dict[str, int] = {}
+        names: List[str] = []
+        
+        def encode(name: Optional[str]) -> int:
+            name = name or ""
+            idx = name_index.get(name)
+            if idx is None:
+                idx = len(names)
+                name_index[name] = idx
+                names.append(name)
+            return idx
+        
+        self.vehicle_ids: List[str] = []
+        self.years = array("i")
+        self.make_ids = array("i")
+        self.model_ids = array("i")
+        self.labels = array("i")  # 每行 3 个名称下标：make, model, vehicle_name
+        self.row_texts: List[str] = []
+        
+        token_rows: Dict[str, List[int]] = {}
+        for row_id, row in enumerate(rows):
+            year, make_id, model_id, make_name, model_name, vehicle_name = row[5:]
+            self.vehicle_ids.append(row[4])
+            self.years.append(year)
+            self.make_ids.append(make_id)
+            self.model_ids.append(model_id)
+            self.labels.extend((encode(make_name), encode(model_name), encode(vehicle_name)))
+            
+            row_tokens = dict.fromkeys(
+                [str(year)] + tokenize(make_name) + tokenize(model_name) + tokenize(vehicle_name)
+            )
+            self.row_texts.append(" " + " ".join(row_tokens) + " ")
+            for token in row_tokens:
+                token_rows.setdefault(token, []).append(row_id)
+        
+        self.names = tuple(names)
+        self.tokens = sorted(token_rows)
+        self.postings = [array("i", token_rows[token]) for token in self.tokens]
+    
+    def _prefix_range(self, prefix: str) -> Tuple[int, int]:
+        """前缀对应的 tokens 下标区间 [start, end)"""
+        start = bisect_left(self.tokens, prefix)
+        end = bisect_left(self.tokens, prefix + "\uffff", lo=start)
+        return start, end
+    
+    def _exact_postings(self, token: str) -> Optional[array]:
+        """精确词的倒排表，不存在返回 None"""
+        i = bisect_left(self.tokens, token)
+        if i < len(self.tokens) and self.tokens[i] == token:
+            return self.postings[i]
+        return None
+    
+    def _iter_prefix_rows(self, start: int, end: int) -> Iterator[int]:
+        """按行号升序（即展示顺序）遍历前缀区间内所有词的行，去重"""
+        if end - start == 1:
+            yield from self.postings[start]
+            return
+        last = -1
+        for row_id in heapq.merge(*self.postings[start:end]):
+            if row_id != last:
+                last = row_id
+                yield row_id
+    
+    def search(self, query: str, limit: int = 10) -> List[dict]:
+        """
+        检索车辆
+        
+        排序分两档，每档内按展示顺序（year DESC, make, model, vehicle_name）：
+        1. 所有查询词都精确命中（"ram 1500" 优先于 "rampage 1500x"）
+        2. 所有查询词都按前缀命中（最后一个词通常还没输完）
+        行号即展示顺序，因此每档按行号遍历、凑满 limit 即停止，宽泛前缀（如 "s"）也无需全量扫描。
+        
+        Args:
+            query: 查询字符串（如 "2019 civic si"）
+            limit: 返回数量
+        """
+        query_tokens = list(dict.fromkeys(tokenize(query)))
+        if not query_tokens:
+            return []
+        
+        row_texts = self.row_texts
+        matched: List[int] = []
+        
+        # 第一档：精确命中（从最短的倒排表出发，逐行校验其余词）
+        exact_postings = {token: self._exact_postings(token) for token in query_tokens}
+        if all(postings is not None for postings in exact_postings.values()):
+            driver = min(query_tokens, key=lambda token: len(exact_postings[token]))
+            needles = [f" {token} " for token in query_tokens if token != driver]
+            for row_id in exact_postings[driver]:
+                text = row_texts[row_id]
+                if all(needle in text for needle in needles):
+                    matched.append(row_id)
+                    if len(matched) >= limit:
+                        break
+        
+        # 第二档：前缀命中（从候选最少的前缀出发）
+        if len(matched) < limit:
+            ranges = {token: self._prefix_range(token) for token in query_tokens}
+            sizes = {
+                token: sum(len(self.postings[i]) for i in range(start, end))
+                for token, (start, end) in ranges.items()
+            }
+            driver = min(query_tokens, key=sizes.__getitem__)
+            if sizes[driver]:
+                seen = set(matched)
+                needles = [f" {token}" for token in query_tokens if token != driver]
+                for row_id in self._iter_prefix_rows(*ranges[driver]):
+                    text = row_texts[row_id]
+                    if row_id not in seen and all(needle in text for needle in needles):
+                        matched.append(row_id)
+                        if len(matched) >= limit:
+                            break
+        
+        results = []
+        names = self.names
+        for row_id in matched:
+            make_idx, model_idx, vehicle_idx = self.labels[row_id * 3:row_id * 3 + 3]
+            results.append({
+                "vehicle_id": self.vehicle_ids[row_id],
+                "year": self.years[row_id],
+                "make_id": self.make_ids[row_id],
+                "make_name": names[make_idx],
+                "model_id": self.model_ids[row_id],
+                "model_name": names[model_idx],
+                "vehicle_name": names[vehicle_idx] or None,
+            })
+        return results
+
+
+def load_vehicle_search_index(db: Session, snapshot: VehicleCatalogSnapshot) -> VehicleSearchIndex:
+    """
+    构建车辆名称索引（一次 mini_vehicle_detail 查询）
+    
+    Args:
+        db: 数据库会话
+        snapshot: 车辆目录快照
+    """
+    detail_table = get_table("mini_vehicle_detail")
+    result = db.execute(
+        select(
+            detail_table.c.vehicle_id,
+            detail_table.c.year_id,
+            detail_table.c.make_id,
+            detail_table.c.model_id,
+            detail_table.c.vehicle_name,
+        )
+    )
+    return VehicleSearchIndex(snapshot, [tuple(row) for row in result.fetchall()])
+
+
+class VehicleSearch:
+    """进程内车辆名称索引持有者（跟随车辆目录快照版本重建）"""
+    
+    def __init__(self):
+        self._index: Optional[VehicleSearchIndex] = None
+        self._lock = threading.Lock()
+    
+    def get(self, db: Session) -> VehicleSearchIndex:
+        """
+        获取与当前车辆目录快照同版本的索引
+        
+        已有旧索引时，只有一个请求负责重建，其余请求继续使用旧索引；
+        尚无索引时所有请求等待首次构建完成。
+        
+        需要构建时在当前线程查询数据库，耗时与车辆数成正比；async 接口应通过 run_in_threadpool 调用，
+        重建期间事件循环继续处理其他请求。
+        
+        Args:
+            db: 数据库会话（仅在需要构建索引时使用）
+        """
+        snapshot = vehicle_catalog.get(db)
+        index = self._index
+        if index is not None and index.version == snapshot.version:
+            return index
+        
+        if not self._lock.acquire(blocking=index is None):
+            return index
+        try:
+            index = self._index
+            if index is None or index.version != snapshot.version:
+                index = load_vehicle_search_index(db, snapshot)
+                self._index = index
+            return index
+        finally:
+            self._lock.release()
+
+
+# 全局车辆名称索引实例
+vehicle_search = VehicleSearch()
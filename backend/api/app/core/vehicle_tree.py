@@ -0,0 +1,179 @@
+"""
+车辆目录整树（year -> make -> model）紧凑编码
+
+车型选择器原本需要 3 个串行请求（years、makes?year=、models?make_id=&year=）。
+/vehicles/tree 一次返回整棵树，客户端预取后在本地完成级联：
+
+    {
+        "version": 3,
+        "names": ["Acura", "Honda", "Civic", ...],       # 名称字典，品牌名/型号名只存一次
+        "years":  {"id": [...], "year": [...], "make_start": [...]},
+        "makes":  {"id": [...], "name": [...], "model_start": [...]},
+        "models": {"id": [...], "name": [...]}
+    }
+
+- 列式存储，name 是 names 的下标
+- 第 i 个年份的品牌为 makes[make_start[i]:make_start[i+1]]（make_start 长度 = 年份数 + 1）
+- 第 j 个品牌的型号为 models[model_start[j]:model_start[j+1]]
+- 排序与 /years、/makes?year=、/models?make_id=&year= 一致
+
+每个快照版本只序列化、压缩一次（gzip 与 br），请求时按 Accept-Encoding（含 q 值）
+直接返回预压缩的字节。
+"""
+import gzip
+import json
+import threading
+from typing import Optional, Dict, Any, Tuple
+from sqlalchemy.orm import Session
+from app.core.vehicle_catalog import vehicle_catalog, VehicleCatalogSnapshot
+
+try:
+    import brotli
+except ImportError:  # requirements.txt 已固定 brotli，未安装时只提供 gzip
+    brotli = None
+
+
+def build_vehicle_tree(snapshot: VehicleCatalogSnapshot) -> Dict[str, Any]:
+    """
+    由车辆目录快照构建列式整树
+    
+    Args:
+        snapshot: 车辆目录快照
+    """
+    name_index: Dict[int, int] = {}
+    names = []
+    
+    def encode(snapshot_name_idx: int) -> int:
+        idx = name_index.get(snapshot_name_idx)
+        if idx is None:
+            idx = len(names)
+            name_index[snapshot_name_idx] = idx
+            names.append(snapshot.names[snapshot_name_idx])
+        return idx
+    
+    years = {"id": [], "year": [], "make_start": [0]}
+    makes = {"id": [], "name": [], "model_start": [0]}
+    models = {"id": [], "name": []}
+    
+    for year_id, year in zip(snapshot.year_ids, snapshot.year_values):
+        years["id"].append(year_id)
+        years["year"].append(year)
+        
+        make_start, make_end = snapshot.make_offsets.get(year_id, (0, 0))
+        for i in range(make_start, make_end):
+            make_id = snapshot.make_ids[i]
+            makes["id"].append(make_id)
+            makes["name"].append(encode(snapshot.make_names[i]))
+            
+            model_start, model_end = snapshot.model_offsets.get((year_id, make_id), (0, 0))
+            for k in range(model_start, model_end):
+                models["id"].append(snapshot.model_ids[k])
+                models["name"].append(encode(snapshot.model_names[k]))
+            makes["model_start"].append(len(models["id"]))
+        
+        years["make_start"].append(len(makes["id"]))
+    
+    return {
+        "version": snapshot.version,
+        "names": names,
+        "years": years,
+        "makes": makes,
+        "models": models,
+    }
+
+
+def parse_accept_encoding(accept_encoding: Optional[str]) -> Dict[str, float]:
+    """
+    解析 Accept-Encoding 为 编码 -> q 值（小写编码名；未写 q 时为 1，q 值无效时为 0）
+    
+    Args:
+        accept_encoding: Accept-Encoding 请求头（如 "br;q=0, gzip;q=0.8, *;q=0.1"）
+    """
+    weights: Dict[str, float] = {}
+    for token in (accept_encoding or "").split(","):
+        coding, _, params = token.partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value.strip())
+                except ValueError:
+                    q = 0.0
+                if not 0.0 <= q <= 1.0:
+                    q = 0.0
+        weights[coding] = q
+    return weights
+
+
+class VehicleTreePayload:
+    """某个快照版本的整树序列化结果（原始 JSON 及预压缩版本）"""
+    
+    __slots__ = ("snapshot", "identity", "gzip", "br")
+    
+    def __init__(self, snapshot: VehicleCatalogSnapshot):
+        self.snapshot = snapshot
+        self.identity = json.dumps(
+            build_vehicle_tree(snapshot),
+            ensure_ascii=False,
+            separators=(",", ":"),
+        ).encode("utf-8")
+        self.gzip = gzip.compress(self.identity, compresslevel=9)
+        self.br = brotli.compress(self.identity) if brotli is not None else None
+    
+    def select(self, accept_encoding: Optional[str]) -> Tuple[bytes, Optional[str]]:
+        """
+        按 Accept-Encoding 选择编码
+        
+        q 值最高的可用编码优先，q 相同时 br > gzip；q=0（或 q 值无效）表示不接受，
+        未单独列出的编码取 "*" 的 q 值。都不可接受时返回原始 JSON。
+        
+        Returns:
+            (body, content_encoding)，identity 时 content_encoding 为 None
+        """
+        weights = parse_accept_encoding(accept_encoding)
+        candidates = [(self.br, "br"), (self.gzip, "gzip")] if self.br is not None else [(self.gzip, "gzip")]
+        best = None
+        best_q = 0.0
+        for body, encoding in candidates:
+            q = weights.get(encoding, weights.get("*", 0.0))
+            if q > best_q:
+                best, best_q = (body, encoding), q
+        return best if best is not None else (self.identity, None)
+
+
+class VehicleTree:
+    """进程内整树缓存（快照替换后重新生成）"""
+    
+    def __init__(self):
+        self._payload: Optional[VehicleTreePayload] = None
+        self._lock = threading.Lock()
+    
+    def get(self, db: Session) -> VehicleTreePayload:
+        """
+        获取当前快照对应的整树
+        
+        版本变化时在当前线程重新生成并压缩整树（可能先加载车辆目录快照）；
+        async 接口应通过 run_in_threadpool 调用，不阻塞事件循环。
+        
+        Args:
+            db: 数据库会话（仅在需要加载快照时使用）
+        """
+        snapshot = vehicle_catalog.get(db)
+        payload = self._payload
+        if payload is not None and payload.snapshot is snapshot:
+            return payload
+        
+        with self._lock:
+            payload = self._payload
+            if payload is None or payload.snapshot is not snapshot:
+                payload = VehicleTreePayload(snapshot)
+                self._payload = payload
+            return payload
+
+
+# 全局整树实例
+vehicle_tree = VehicleTree()
@@ -0,0 +1,99 @@
+"""
+轮毂适配匹配（数值化 PCD / 直径）
+
+规格表中的 pcd / diameter 是自由文本（"5×114.3"、"18\""），直接做字符串匹配会误匹配
+（18 匹配 118，5x114.3 匹配 5x114.35）。这里统一把它们解析为数值：
+- pcd_lugs: 螺栓数量（如 5）
+- pcd_mm: 孔距直径（毫米，一位小数，如 114.3）
+- diameter_inch: 轮毂直径（英寸，整数，如 18）
+
+回填命令（scripts/backfill_spec_fitment.py）写入的数值列、轮毂搜索快照（app/core/wheel_search.py，
+数值列未回填时回退解析文本列）与请求参数的解析共用同一套函数，保证归一化规则一致；
+适配筛选在进程内快照的位图索引中完成，不在 SQL 中筛选。
+"""
+import re
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Optional, Tuple
+
+# 英寸表示的 PCD（如 "5x4.5"）换算为毫米
+MM_PER_INCH = Decimal("25.4")
+_ONE_DECIMAL = Decimal("0.1")
+
+_PCD_PATTERN = re.compile(r'(\d+)\s*x\s*(\d+(?:\.\d+)?)')
+_DIAMETER_PATTERN = re.compile(r'(\d+(?:\.\d+)?)')
+_NUMBER_PATTERN = re.compile(r'-?\d+(?:\.\d+)?')
+_INTERVAL_PATTERN = re.compile(
+    r'([+-]?\d+(?:\.\d+)?)\s*(?:mm|")?\s*(?:~|–|to|-)\s*([+-]?\d+(?:\.\d+)?)',
+    re.IGNORECASE,
+)
+
+
+def parse_pcd(pcd_str: Optional[str]) -> Optional[Tuple[int, float]]:
+    """
+    解析 PCD 字符串（如 "5x114.3"、"5×114.3"、"5X4.5"）为 (lugs, mm)
+    
+    孔距小于 10 视为英寸并换算为毫米；毫米值按四舍五入保留一位小数
+    （与 MySQL DECIMAL(5,1) 列的取整方式一致，5x114.35 -> 114.4）。
+    
+    Returns:
+        (lugs: int, mm: float) 或 None
+    """
+    if not pcd_str:
+        return None
+    
+    normalized = pcd_str.replace('×', 'x').replace('X', 'x').lower()
+    match = _PCD_PATTERN.search(normalized)
+    if not match:
+        return None
+    
+    lugs = int(match.group(1))
+    mm = Decimal(match.group(2))
+    if mm < 10:
+        mm *= MM_PER_INCH
+    return (lugs, float(mm.quantize(_ONE_DECIMAL, rounding=ROUND_HALF_UP)))
+
+
+def parse_diameter(diameter_str: Optional[str]) -> Optional[int]:
+    """
+    解析直径字符串（如 "18\""、"18.0"、"R18"）为整数英寸
+    
+    Returns:
+        int 或 None
+    """
+    if diameter_str is None or diameter_str == "":
+        return None
+    
+    match = _DIAMETER_PATTERN.search(str(diameter_str))
+    if match:
+        return int(float(match.group(1)))
+    return None
+
+
+def parse_number(value) -> Optional[float]:
+    """
+    提取字符串中的第一个数字，保留一位小数（"64.1mm" -> 64.1，"+35" -> 35.0，"8.5J" -> 8.5）
+    
+    Returns:
+        float 或 None
+    """
+    if value is None or value == "":
+        return None
+    match = _NUMBER_PATTERN.search(str(value))
+    return round(float(match.group(0)), 1) if match else None
+
+
+def parse_interval(value) -> Optional[Tuple[float, float]]:
+    """
+    解析数值区间（"35 - 45" -> (35.0, 45.0)，"+20 to +40" -> (20.0, 40.0)，"8.5J" -> (8.5, 8.5)）
+    
+    Returns:
+        (low, high)，保留一位小数；无法解析时返回 None
+    """
+    if value is None or value == "":
+        return None
+    match = _INTERVAL_PATTERN.search(str(value))
+    if match:
+        low, high = sorted((round(float(match.group(1)), 1), round(float(match.group(2)), 1)))
+        return low, high
+    number = parse_number(value)
+    return (number, number) if number is not None else None
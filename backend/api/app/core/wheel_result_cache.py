@@ -0,0 +1,65 @@
+"""
+轮毂列表结果缓存（Redis DB=4）
+
+热门车型的访客解析出的有效筛选条件（pcd、直径等）完全相同，/shop/wheels 的整页结果可以共享。
+车辆ID 先解析为归一化的筛选条件，再与分页参数一起组成缓存键：
+
+    catalog:wheels:v{product_version}:{filter_key}:{sort}:{position}:{page_size}
+
+position 为页码，游标分页时为 "c" + 规范化的游标。
+
+值为序列化好的 WheelsListResponse JSON，命中时只做一次 GET 并原样返回。
+后台编辑品牌或执行 scripts/refresh_product_catalog.py 后 catalog:ver:product 递增，旧版本的键不再被访问，等待 TTL 过期。
+"""
+from typing import Optional
+from app.config import settings
+from app.core.catalog_cache import catalog_cache
+
+WHEELS_KEY_PREFIX = "catalog:wheels"
+
+
+class WheelResultCache:
+    """/shop/wheels 整页结果缓存（按商品目录版本号隔离）"""
+    
+    @staticmethod
+    def get_key(version: int, filter_key: str, sort: str, position: str, page_size: int) -> str:
+        """
+        获取缓存键
+        
+        Args:
+            version: 商品目录版本号
+            filter_key: WheelFilter.key() 的结果
+            sort: 排序方式
+            position: 页码，游标分页时为 "c" + 游标
+            page_size: 每页数量
+        """
+        return f"{WHEELS_KEY_PREFIX}:v{version}:{filter_key}:{sort}:{position}:{page_size}"
+    
+    @staticmethod
+    def get(version: Optional[int], filter_key: str, sort: str, position: str, page_size: int) -> Optional[str]:
+        """
+        获取缓存的结果 JSON
+        
+        Args:
+            version: 商品目录版本号（None 表示版本未知，直接视为未命中）
+        """
+        if version is None:
+            return None
+        return catalog_cache.get(WheelResultCache.get_key(version, filter_key, sort, position, page_size))
+    
+    @staticmethod
+    def set(version: Optional[int], filter_key: str, sort: str, position: str, page_size: int, payload: str) -> bool:
+        """
+        写入结果 JSON
+        
+        Args:
+            version: 生成结果所用快照的商品目录版本号
+            payload: 序列化后的 WheelsListResponse
+        """
+        if version is None:
+            return False
+        return catalog_cache.set(
+            WheelResultCache.get_key(version, filter_key, sort, position, page_size),
+            payload,
+            ttl=settings.WHEEL_RESULT_CACHE_TTL,
+        )
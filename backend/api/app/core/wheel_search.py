@@ -0,0 +1,943 @@
+"""
+轮毂搜索引擎（进程内位图索引）
+
+/shop/wheels 的每个筛选条件原本都是一次 mini_product_spec 扫描加一次 COUNT。
+这里把所有上架规格（商品与规格均为 normal）加载为只读快照，在内存中完成筛选：
+
+- 行 = 一个规格；行按商品排序（weigh DESC, createtime DESC, id DESC）连续存放，
+  同一商品的规格内部同样按 weigh DESC, createtime DESC 排序，因此按行号遍历即为展示顺序
+- 离散列（pcd、直径、宽度、品牌、标签）：每个取值一个位图（Python int，第 r 位表示第 r 行）
+- 范围列（偏距、中心孔、价格）：按值排序的 (values, rows) 数组，另外每 RANGE_BLOCK_SIZE 行
+  预先生成一个块位图；二分定位后，整块直接按位或，只有两端的零散行需要逐行置位
+- 多个条件 = 位图按位与；匹配的商品数在遍历位图时顺带得到，无需 COUNT 查询
+- 同一筛选条件（如同一适配分组的所有车辆）的位图与商品数在快照内缓存
+- 游标分页：每个商品记录排序键 (weigh, createtime, id)，按游标二分定位起始商品，
+  从该商品的首行开始遍历位图，深页与首页代价相同
+- 排序方式（价格、最新、销量、库存）：每种排序预先生成商品下标的排列（及对应排序键），
+  筛选后排序 = 按排列顺序遍历商品、跳过不匹配的商品，不需要数据库排序
+- staggered 车辆（前后轮规格不同）：前轴、后轴各一个筛选条件，分别得到匹配的商品标记，
+  两者都有匹配规格的商品才入选（每个位图遍历一次，不枚举规格对）
+- 分面计数（直径、宽度、品牌、涂装）：每行预先记录各分面的取值编号，
+  遍历一次匹配位图即可得到每个取值的商品数
+
+商品目录版本号（catalog:ver:product，后台编辑品牌或执行 scripts/refresh_product_catalog.py 时递增）变化后整体重建快照；
+重建期间其他请求继续使用旧快照。
+"""
+import math
+import threading
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import Optional, List, Dict, Tuple, Iterable, Iterator
+from sqlalchemy import select, func
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.database import get_table
+from app.core.catalog_cache import catalog_cache, PRODUCT_CATALOG
+from app.core.wheel_fitment import parse_pcd, parse_diameter, parse_number
+
+# 每个字节值置位的 bit 下标（遍历位图用）
+_BYTE_BITS = tuple(
+    tuple(bit for bit in range(8) if value >> bit & 1)
+    for value in range(256)
+)
+
+# 每个快照缓存的筛选结果数量上限
+MATCH_CACHE_SIZE = 1024
+
+# 范围索引的块大小（行数）
+RANGE_BLOCK_SIZE = 2048
+
+# 排序方式：名称 -> (商品排序字段, 是否降序)；默认（DEFAULT_SORT）为展示顺序
+DEFAULT_SORT = "default"
+SORT_MODES = {
+    "price_asc": ("sale_price", False),
+    "price_desc": ("sale_price", True),
+    "newest": ("createtime", True),
+    "best_selling": ("sold", True),
+    "stock": ("stock", True),
+}
+
+# 分面字段（与 WheelFilter 的属性同名）
+FACET_FIELDS = ("diameter", "width", "brand_id", "finish")
+
+
+def bitmap_from_rows(rows: Iterable[int], size: int) -> int:
+    """
+    由行号集合构建位图
+    
+    Args:
+        rows: 行号
+        size: 总行数
+    """
+    bits = bytearray((size + 7) >> 3)
+    for row in rows:
+        bits[row >> 3] |= 1 << (row & 7)
+    return int.from_bytes(bits, "little")
+
+
+def iter_bitmap(bitmap: int) -> Iterator[int]:
+    """按行号升序遍历位图中置位的行"""
+    data = bitmap.to_bytes((bitmap.bit_length() + 7) >> 3, "little")
+    for index, byte in enumerate(data):
+        if byte:
+            base = index << 3
+            for bit in _BYTE_BITS[byte]:
+                yield base + bit
+
+
+class WheelFilter:
+    """轮毂筛选条件（已归一化）"""
+    
+    __slots__ = (
+        "pcd",
+        "diameter",
+        "width",
+        "brand_id",
+        "finish",
+        "tag_id",
+        "width_min",
+        "width_max",
+        "offset_min",
+        "offset_max",
+        "center_bore_min",
+        "price_min",
+        "price_max",
+        "rear",
+    )
+    
+    def __init__(
+        self,
+        pcd: Optional[Tuple[int, float]] = None,
+        diameter: Optional[int] = None,
+        width: Optional[float] = None,
+        brand_id: Optional[int] = None,
+        finish: Optional[str] = None,
+        tag_id: Optional[int] = None,
+        width_min: Optional[float] = None,
+        width_max: Optional[float] = None,
+        offset_min: Optional[float] = None,
+        offset_max: Optional[float] = None,
+        center_bore_min: Optional[float] = None,
+        price_min: Optional[float] = None,
+        price_max: Optional[float] = None,
+        rear: Optional["WheelFilter"] = None,
+    ):
+        """
+        Args:
+            pcd: parse_pcd() 的结果 (lugs, mm)
+            diameter: 直径（英寸）
+            width: 宽度（英寸）
+            brand_id: 品牌ID
+            finish: 涂装名称（如 Gloss Black）
+            tag_id: 标签ID
+            width_min / width_max: 宽度范围（英寸，含边界；车辆适配的宽度区间，与 width 同时设置时两者都需满足）
+            offset_min / offset_max: 偏距范围（毫米，含边界）
+            center_bore_min: 最小中心孔（毫米，轮毂中心孔需不小于车辆中心孔）
+            price_min / price_max: 价格范围（含边界）
+            rear: 后轴筛选条件（staggered 车辆；设置后本条件视为前轴，商品需前后轴都有匹配规格）
+        """
+        self.pcd = pcd
+        self.diameter = diameter
+        self.width = round(width, 1) if width is not None else None
+        self.brand_id = brand_id
+        self.finish = (finish.strip() or None) if finish is not None else None
+        self.tag_id = tag_id
+        self.width_min = width_min
+        self.width_max = width_max
+        self.offset_min = offset_min
+        self.offset_max = offset_max
+        self.center_bore_min = center_bore_min
+        self.price_min = price_min
+        self.price_max = price_max
+        self.rear = rear
+    
+    def key(self) -> str:
+        """规范化的筛选键（相同条件得到相同的键，用于缓存）"""
+        parts = []
+        for name in self.__slots__:
+            value = getattr(self, name)
+            if value is None:
+                continue
+            if name == "pcd":
+                value = f"{value[0]}x{value[1]:g}"
+            elif name == "rear":
+                value = f"({value.key()})"
+            elif isinstance(value, float):
+                value = f"{value:g}"
+            parts.append(f"{name}={value}")
+        return "&".join(parts) or "*"
+    
+    def without(self, name: str) -> "WheelFilter":
+        """
+        去掉某个条件后的副本（分面计数时，每个分面不受自身条件限制）
+        
+        后轴条件同样去掉该条件；name 为 "rear" 时得到只含前轴的条件。
+        """
+        copy = WheelFilter.__new__(WheelFilter)
+        for slot in self.__slots__:
+            setattr(copy, slot, getattr(self, slot))
+        setattr(copy, name, None)
+        if copy.rear is not None:
+            copy.rear = copy.rear.without(name)
+        return copy
+
+
+class WheelSearchSnapshot:
+    """轮毂规格只读快照（列数组 + 位图索引）"""
+    
+    __slots__ = (
+        "version",
+        "size",
+        "product_ids",
+        "product_keys",
+        "product_row_start",
+        "product_index",
+        "row_product",
+        "row_spec_ids",
+        "all_rows",
+        "pcd_bitmaps",
+        "diameter_bitmaps",
+        "width_bitmaps",
+        "brand_bitmaps",
+        "finish_bitmaps",
+        "tag_bitmaps",
+        "offset_index",
+        "center_bore_index",
+        "price_index",
+        "facet_values",
+        "facet_codes",
+        "sort_orders",
+        "_matches",
+        "_facets",
+        "_product_matches",
+    )
+    
+    def __init__(
+        self,
+        version: Optional[int],
+        products: List[tuple],
+        specs: List[tuple],
+        tags: List[tuple],
+        sales: Dict[int, int],
+    ):
+        """
+        Args:
+            version: 商品目录版本号
+            products: [(product_id, brand_id, finish_name, weigh, createtime, sale_price, stock), ...]，
+                      已按展示顺序排序
+            specs: [(spec_id, product_id, pcd, diameter, width, offset, center_bore, price), ...]，
+                   pcd 为 (lugs, mm) 或 None，其余数值列为 float/int 或 None，同一商品内已按展示顺序排序
+            tags: [(product_id, tag_id), ...]
+            sales: product_id -> 已支付订单的销量
+        """
+        self.version = version
+        
+        specs_by_product: Dict[int, List[tuple]] = {}
+        for spec in specs:
+            specs_by_product.setdefault(spec[1], []).append(spec)
+        
+        tags_by_product: Dict[int, List[int]] = {}
+        for product_id, tag_id in tags:
+            tags_by_product.setdefault(product_id, []).append(tag_id)
+        
+        self.product_ids = array("i")
+        self.product_keys: List[Tuple[float, float, int]] = []
+        self.product_row_start = array("i")
+        self.product_index: Dict[int, int] = {}
+        self.row_product = array("i")
+        self.row_spec_ids = array("i")
+        
+        pcd_rows: Dict[Tuple[int, float], List[int]] = {}
+        diameter_rows: Dict[int, List[int]] = {}
+        width_rows: Dict[float, List[int]] = {}
+        brand_rows: Dict[int, List[int]] = {}
+        finish_rows: Dict[str, List[int]] = {}
+        tag_rows: Dict[int, List[int]] = {}
+        offsets: List[Tuple[float, int]] = []
+        center_bores: List[Tuple[float, int]] = []
+        prices: List[Tuple[float, int]] = []
+        
+        # 排序字段的商品取值（下标与 product_ids 一致）
+        sort_values: Dict[str, list] = {column: [] for column, _ in SORT_MODES.values()}
+        
+        # 分面：取值 -> 编号，以及每行的取值编号（-1 表示无值）
+        facet_numbers: Dict[str, Dict] = {name: {} for name in FACET_FIELDS}
+        self.facet_codes: Dict[str, array] = {name: array("i") for name in FACET_FIELDS}
+        
+        def add_facet(name: str, value) -> None:
+            if value is None:
+                self.facet_codes[name].append(-1)
+                return
+            numbers = facet_numbers[name]
+            code = numbers.get(value)
+            if code is None:
+                code = numbers[value] = len(numbers)
+            self.facet_codes[name].append(code)
+        
+        row = 0
+        for product_id, brand_id, finish, weigh, createtime, sale_price, stock in products:
+            product_specs = specs_by_product.get(product_id)
+            if not product_specs:
+                continue  # 没有上架规格的商品不参与搜索
+            product_index = len(self.product_ids)
+            self.product_index[product_id] = product_index
+            self.product_ids.append(product_id)
+            self.product_keys.append(product_sort_key(weigh, createtime, product_id))
+            self.product_row_start.append(row)
+            sort_values["sale_price"].append(sale_price)
+            sort_values["createtime"].append(createtime)
+            sort_values["sold"].append(sales.get(product_id, 0))
+            sort_values["stock"].append(stock)
+            product_tags = tags_by_product.get(product_id, ())
+            finish = (finish.strip() or None) if finish else None
+            
+            for spec_id, _, pcd, diameter, width, offset, center_bore, price in product_specs:
+                self.row_product.append(product_index)
+                self.row_spec_ids.append(spec_id)
+                
+                if pcd is not None:
+                    pcd_rows.setdefault(pcd, []).append(row)
+                if diameter is not None:
+                    diameter_rows.setdefault(diameter, []).append(row)
+                if width is not None:
+                    width_rows.setdefault(width, []).append(row)
+                if brand_id is not None:
+                    brand_rows.setdefault(brand_id, []).append(row)
+                if finish is not None:
+                    finish_rows.setdefault(finish, []).append(row)
+                for tag_id in product_tags:
+                    tag_rows.setdefault(tag_id, []).append(row)
+                if offset is not None:
+                    offsets.append((offset, row))
+                if center_bore is not None:
+                    center_bores.append((center_bore, row))
+                if price is not None:
+                    prices.append((price, row))
+                add_facet("diameter", diameter)
+                add_facet("width", width)
+                add_facet("brand_id", brand_id)
+                add_facet("finish", finish)
+                row += 1
+        
+        self.size = row
+        self.all_rows = (1 << row) - 1
+        self.pcd_bitmaps = self._build_bitmaps(pcd_rows)
+        self.diameter_bitmaps = self._build_bitmaps(diameter_rows)
+        self.width_bitmaps = self._build_bitmaps(width_rows)
+        self.brand_bitmaps = self._build_bitmaps(brand_rows)
+        self.finish_bitmaps = self._build_bitmaps(finish_rows)
+        self.tag_bitmaps = self._build_bitmaps(tag_rows)
+        self.offset_index = self._build_range_index(offsets)
+        self.center_bore_index = self._build_range_index(center_bores)
+        self.price_index = self._build_range_index(prices)
+        self.facet_values: Dict[str, List] = {
+            name: list(numbers) for name, numbers in facet_numbers.items()
+        }
+        self.sort_orders: Dict[str, Tuple[array, List[tuple]]] = {
+            sort: self._build_sort_order(sort_values[column], descending)
+            for sort, (column, descending) in SORT_MODES.items()
+        }
+        self._matches: Dict[str, Tuple[int, int]] = {}
+        self._facets: Dict[str, Dict[str, List[Tuple[object, int]]]] = {}
+        self._product_matches: Dict[str, bytearray] = {}
+    
+    def _build_bitmaps(self, rows_by_value: Dict) -> Dict:
+        """取值 -> 行号列表 转为 取值 -> 位图"""
+        return {
+            value: bitmap_from_rows(rows, self.size)
+            for value, rows in rows_by_value.items()
+        }
+    
+    def _build_sort_order(self, values: list, descending: bool) -> Tuple[array, List[tuple]]:
+        """
+        生成排序排列
+        
+        Returns:
+            (按排序后顺序排列的商品下标, 对应的升序排序键列表（用于游标二分）)
+        """
+        keys = [
+            (sort_value_key(value, descending),) + product_key
+            for value, product_key in zip(values, self.product_keys)
+        ]
+        order = sorted(range(len(keys)), key=keys.__getitem__)
+        return array("i", order), [keys[index] for index in order]
+    
+    def _build_range_index(self, pairs: List[Tuple[float, int]]) -> Tuple[array, array, List[int]]:
+        """(value, row) 列表转为 (按值排序的 values, rows, 块位图列表)"""
+        pairs.sort()
+        rows = array("i", (row for _, row in pairs))
+        blocks = [
+            bitmap_from_rows(rows[start:start + RANGE_BLOCK_SIZE], self.size)
+            for start in range(0, len(rows), RANGE_BLOCK_SIZE)
+        ]
+        return array("d", (value for value, _ in pairs)), rows, blocks
+    
+    def _range_bitmap(self, index: Tuple[array, array, List[int]], low: Optional[float], high: Optional[float]) -> int:
+        """范围条件 [low, high] 的位图（None 表示不限）"""
+        values, rows, blocks = index
+        start = bisect_left(values, low) if low is not None else 0
+        end = bisect_right(values, high) if high is not None else len(values)
+        
+        first_block = -(-start // RANGE_BLOCK_SIZE)
+        last_block = end // RANGE_BLOCK_SIZE
+        if first_block >= last_block:
+            return bitmap_from_rows(rows[start:end], self.size)
+        
+        bitmap = bitmap_from_rows(
+            rows[start:first_block * RANGE_BLOCK_SIZE] + rows[last_block * RANGE_BLOCK_SIZE:end],
+            self.size,
+        )
+        for block in blocks[first_block:last_block]:
+            bitmap |= block
+        return bitmap
+    
+    def _pcd_bitmap(self, pcd: Tuple[int, float]) -> int:
+        """PCD 条件位图（螺栓数精确匹配 + 孔距毫米容差匹配）"""
+        lugs, mm = pcd
+        tolerance = settings.WHEEL_PCD_MM_TOLERANCE + 1e-9
+        bitmap = 0
+        for (value_lugs, value_mm), value_bitmap in self.pcd_bitmaps.items():
+            if value_lugs == lugs and abs(value_mm - mm) <= tolerance:
+                bitmap |= value_bitmap
+        return bitmap
+    
+    def count_products(self, bitmap: int) -> int:
+        """位图中包含的商品数（同一商品的行连续存放，按商品切换计数）"""
+        if bitmap == self.all_rows:
+            return len(self.product_ids)
+        row_product = self.row_product
+        total = 0
+        last = -1
+        for row in iter_bitmap(bitmap):
+            product_index = row_product[row]
+            if product_index != last:
+                last = product_index
+                total += 1
+        return total
+    
+    def match(self, wheel_filter: WheelFilter) -> Tuple[int, int]:
+        """
+        计算筛选结果
+        
+        Args:
+            wheel_filter: 筛选条件
+        
+        Returns:
+            (匹配规格的位图, 匹配的商品数)
+        """
+        key = wheel_filter.key()
+        cached = self._matches.get(key)
+        if cached is not None:
+            return cached
+        
+        if wheel_filter.rear is not None:
+            bitmap = self._paired_bitmap(wheel_filter)
+        else:
+            bitmap = self._filter_bitmap(wheel_filter)
+        
+        result = (bitmap, self.count_products(bitmap))
+        if len(self._matches) >= MATCH_CACHE_SIZE:
+            self._matches.clear()
+        self._matches[key] = result
+        return result
+    
+    def _filter_bitmap(self, f: WheelFilter) -> int:
+        """单轴筛选条件的位图"""
+        bitmap = self.all_rows
+        if f.pcd is not None:
+            bitmap &= self._pcd_bitmap(f.pcd)
+        if bitmap and f.diameter is not None:
+            bitmap &= self.diameter_bitmaps.get(f.diameter, 0)
+        if bitmap and f.width is not None:
+            bitmap &= self.width_bitmaps.get(f.width, 0)
+        if bitmap and (f.width_min is not None or f.width_max is not None):
+            bitmap &= self._width_range_bitmap(f.width_min, f.width_max)
+        if bitmap and f.brand_id is not None:
+            bitmap &= self.brand_bitmaps.get(f.brand_id, 0)
+        if bitmap and f.finish is not None:
+            bitmap &= self.finish_bitmaps.get(f.finish, 0)
+        if bitmap and f.tag_id is not None:
+            bitmap &= self.tag_bitmaps.get(f.tag_id, 0)
+        if bitmap and (f.offset_min is not None or f.offset_max is not None):
+            bitmap &= self._range_bitmap(self.offset_index, f.offset_min, f.offset_max)
+        if bitmap and f.center_bore_min is not None:
+            bitmap &= self._range_bitmap(self.center_bore_index, f.center_bore_min, None)
+        if bitmap and (f.price_min is not None or f.price_max is not None):
+            bitmap &= self._range_bitmap(self.price_index, f.price_min, f.price_max)
+        return bitmap
+    
+    def _width_range_bitmap(self, low: Optional[float], high: Optional[float]) -> int:
+        """宽度范围的位图（宽度取值只有几十种，直接合并范围内各取值的位图）"""
+        bitmap = 0
+        for width, rows in self.width_bitmaps.items():
+            if (low is None or width >= low) and (high is None or width <= high):
+                bitmap |= rows
+        return bitmap
+    
+    def _paired_bitmap(self, wheel_filter: WheelFilter) -> int:
+        """
+        前后轴配对的位图：前轴、后轴都有匹配规格的商品，保留其匹配任一轴的规格行
+        
+        两个轴各遍历一次位图得到商品标记（按筛选键缓存），再遍历一次并集保留入选商品的行。
+        """
+        front_filter = wheel_filter.without("rear")
+        front_bitmap, _ = self.match(front_filter)
+        rear_bitmap, _ = self.match(wheel_filter.rear)
+        front_products = self._matched_products(front_filter)
+        rear_products = self._matched_products(wheel_filter.rear)
+        
+        row_product = self.row_product
+        return bitmap_from_rows(
+            (
+                row for row in iter_bitmap(front_bitmap | rear_bitmap)
+                if front_products[row_product[row]] and rear_products[row_product[row]]
+            ),
+            self.size,
+        )
+    
+    def spec_axles(self, wheel_filter: WheelFilter, groups: List[Tuple[int, List[int]]]) -> Dict[int, str]:
+        """
+        本页规格适配的车轴（staggered 筛选时使用）
+        
+        Args:
+            wheel_filter: 含后轴条件的筛选条件
+            groups: page() / sorted_page() 返回的本页商品
+        
+        Returns:
+            spec_id -> "front" / "rear" / "both"
+        """
+        front_bitmap, _ = self.match(wheel_filter.without("rear"))
+        rear_bitmap, _ = self.match(wheel_filter.rear)
+        axles: Dict[int, str] = {}
+        for product_id, _ in groups:
+            start, end = self._product_rows(self.product_index[product_id])
+            mask = (1 << (end - start)) - 1
+            front_rows = (front_bitmap >> start) & mask
+            rear_rows = (rear_bitmap >> start) & mask
+            for offset in iter_bitmap(front_rows | rear_rows):
+                front = front_rows >> offset & 1
+                rear = rear_rows >> offset & 1
+                axles[self.row_spec_ids[start + offset]] = "both" if front and rear else ("front" if front else "rear")
+        return axles
+    
+    def facets(self, wheel_filter: WheelFilter) -> Dict[str, List[Tuple[object, int]]]:
+        """
+        计算分面计数
+        
+        每个分面按"去掉该分面自身条件"的筛选结果计数（已选直径时，直径分面仍列出其他直径的数量）。
+        未设置分面条件时所有分面共用同一个位图，只遍历一次。
+        
+        Args:
+            wheel_filter: 筛选条件
+        
+        Returns:
+            {分面字段: [(取值, 商品数), ...]}，只包含商品数大于 0 的取值；
+            直径、宽度按取值升序，品牌、涂装按商品数降序
+        """
+        key = wheel_filter.key()
+        cached = self._facets.get(key)
+        if cached is not None:
+            return cached
+        
+        # 去掉自身条件后筛选键相同的分面合并为一次遍历
+        groups: Dict[str, Tuple[WheelFilter, List[str]]] = {}
+        for name in FACET_FIELDS:
+            base = wheel_filter.without(name) if getattr(wheel_filter, name) is not None else wheel_filter
+            groups.setdefault(base.key(), (base, []))[1].append(name)
+        
+        row_product = self.row_product
+        result: Dict[str, List[Tuple[object, int]]] = {}
+        for base, names in groups.values():
+            bitmap, _ = self.match(base)
+            columns = [self.facet_codes[name] for name in names]
+            counts = [[0] * len(self.facet_values[name]) for name in names]
+            last_product = [[-1] * len(self.facet_values[name]) for name in names]
+            for row in iter_bitmap(bitmap):
+                product_index = row_product[row]
+                for codes, column_counts, column_last in zip(columns, counts, last_product):
+                    code = codes[row]
+                    # 同一商品的行连续存放，取值对应的上一个商品不同时才计数
+                    if code >= 0 and column_last[code] != product_index:
+                        column_last[code] = product_index
+                        column_counts[code] += 1
+            for name, column_counts in zip(names, counts):
+                buckets = [
+                    (value, count)
+                    for value, count in zip(self.facet_values[name], column_counts)
+                    if count
+                ]
+                if name in ("diameter", "width"):
+                    buckets.sort()
+                else:
+                    buckets.sort(key=lambda bucket: (-bucket[1], bucket[0]))
+                result[name] = buckets
+        
+        if len(self._facets) >= MATCH_CACHE_SIZE:
+            self._facets.clear()
+        self._facets[key] = result
+        return result
+    
+    def _collect(self, bitmap: int, start_row: int, skip: int, limit: int) -> Tuple[List[Tuple[int, List[int]]], int]:
+        """
+        从 start_row 开始按展示顺序收集商品及其匹配的规格
+        
+        Returns:
+            (本页 [(product_id, [spec_id, ...]), ...], 本页最后一个商品的下标；后面没有更多商品时为 -1)
+        """
+        row_product = self.row_product
+        groups: List[Tuple[int, List[int]]] = []
+        seen = 0
+        last = -1
+        for row in iter_bitmap(bitmap >> start_row):
+            row += start_row
+            product_index = row_product[row]
+            if product_index != last:
+                if seen == skip + limit:
+                    return groups, last  # 还有下一个商品
+                last = product_index
+                seen += 1
+                if seen > skip:
+                    groups.append((self.product_ids[product_index], []))
+            if seen > skip:
+                groups[-1][1].append(self.row_spec_ids[row])
+        return groups, -1
+    
+    def cursor_values(self, product_index: int) -> List[Optional[int]]:
+        """商品的游标值 [weigh, createtime, id]（与 decode_cursor 的结果对应）"""
+        weigh, createtime, product_id = self.product_keys[product_index]
+        return [
+            None if weigh == math.inf else -weigh,
+            None if createtime == math.inf else -createtime,
+            -product_id,
+        ]
+    
+    def page(self, bitmap: int, offset: int, limit: int) -> Tuple[List[Tuple[int, List[int]]], Optional[List[Optional[int]]]]:
+        """
+        取一页商品及其匹配的规格（按偏移量）
+        
+        Args:
+            bitmap: match() 返回的位图
+            offset: 跳过的商品数
+            limit: 本页商品数
+        
+        Returns:
+            ([(product_id, [spec_id, ...]), ...]，下一页的游标值；已是最后一页时为 None)，按展示顺序
+        """
+        groups, last = self._collect(bitmap, 0, offset, limit)
+        return groups, self.cursor_values(last) if last >= 0 else None
+    
+    def page_after(self, bitmap: int, after: List, limit: int) -> Tuple[List[Tuple[int, List[int]]], Optional[List[Optional[int]]]]:
+        """
+        取一页商品及其匹配的规格（按游标，keyset 分页）
+        
+        游标是上一页最后一个商品的 [weigh, createtime, id]；该商品被删除或排序字段变化后，
+        仍从排序位置紧随其后的商品继续。
+        
+        Args:
+            bitmap: match() 返回的位图
+            after: decode_cursor() 的结果
+            limit: 本页商品数
+        
+        Returns:
+            同 page()
+        
+        Raises:
+            ValueError: 游标值类型无效
+        """
+        weigh, createtime, product_id = after
+        if not all(
+            value is None or (isinstance(value, int) and not isinstance(value, bool))
+            for value in after
+        ) or product_id is None:
+            raise ValueError("分页游标无效")
+        
+        index = bisect_right(self.product_keys, product_sort_key(weigh, createtime, product_id))
+        if index >= len(self.product_ids):
+            return [], None
+        groups, last = self._collect(bitmap, self.product_row_start[index], 0, limit)
+        return groups, self.cursor_values(last) if last >= 0 else None
+
+    
+    def _matched_products(self, wheel_filter: WheelFilter) -> bytearray:
+        """匹配的商品标记（下标与 product_ids 一致，1 表示至少一个规格匹配），按筛选键缓存"""
+        key = wheel_filter.key()
+        flags = self._product_matches.get(key)
+        if flags is not None:
+            return flags
+        
+        bitmap, _ = self.match(wheel_filter)
+        row_product = self.row_product
+        flags = bytearray(len(self.product_ids))
+        for row in iter_bitmap(bitmap):
+            flags[row_product[row]] = 1
+        
+        if len(self._product_matches) >= MATCH_CACHE_SIZE:
+            self._product_matches.clear()
+        self._product_matches[key] = flags
+        return flags
+    
+    def _product_rows(self, product_index: int) -> Tuple[int, int]:
+        """商品的行号范围 [start, end)"""
+        start = self.product_row_start[product_index]
+        if product_index + 1 < len(self.product_row_start):
+            return start, self.product_row_start[product_index + 1]
+        return start, self.size
+    
+    def _product_spec_ids(self, bitmap: int, product_index: int) -> List[int]:
+        """商品在位图中匹配的规格ID（按展示顺序）"""
+        start, end = self._product_rows(product_index)
+        rows = (bitmap >> start) & ((1 << (end - start)) - 1)
+        return [self.row_spec_ids[start + offset] for offset in iter_bitmap(rows)]
+    
+    def sorted_page(
+        self,
+        wheel_filter: WheelFilter,
+        sort: str,
+        offset: int,
+        limit: int,
+        after: Optional[List] = None,
+    ) -> Tuple[List[Tuple[int, List[int]]], Optional[List]]:
+        """
+        按排序方式取一页商品及其匹配的规格
+        
+        沿预先生成的排列遍历商品，跳过不匹配的商品，收集到 offset + limit 个即停止。
+        
+        Args:
+            wheel_filter: 筛选条件
+            sort: SORT_MODES 中的排序方式
+            offset: 跳过的商品数（after 不为 None 时忽略）
+            limit: 本页商品数
+            after: 游标值 [sort, 排序字段值, weigh, createtime, id]（decode_cursor() 的结果）
+        
+        Returns:
+            ([(product_id, [spec_id, ...]), ...]，下一页的游标值；已是最后一页时为 None)
+        
+        Raises:
+            ValueError: 游标与排序方式不一致或取值类型无效
+        """
+        order, keys = self.sort_orders[sort]
+        start = 0
+        if after is not None:
+            after_sort, value, weigh, createtime, product_id = after
+            if after_sort != sort or not all(
+                item is None or (isinstance(item, (int, float)) and not isinstance(item, bool))
+                for item in after[1:]
+            ) or not isinstance(product_id, int) or isinstance(product_id, bool):
+                raise ValueError("分页游标无效")
+            descending = SORT_MODES[sort][1]
+            start = bisect_right(
+                keys,
+                (sort_value_key(value, descending),) + product_sort_key(weigh, createtime, product_id),
+            )
+            offset = 0
+        
+        bitmap, _ = self.match(wheel_filter)
+        flags = self._matched_products(wheel_filter)
+        groups: List[Tuple[int, List[int]]] = []
+        seen = 0
+        last = -1
+        for position in range(start, len(order)):
+            product_index = order[position]
+            if not flags[product_index]:
+                continue
+            if seen == offset + limit:
+                # 还有下一个商品：游标为本页最后一个商品的排序键
+                value = keys[last][0]
+                if value != math.inf:
+                    value = -value if SORT_MODES[sort][1] else value
+                else:
+                    value = None
+                return groups, [sort, value] + self.cursor_values(order[last])
+            seen += 1
+            last = position
+            if seen > offset:
+                groups.append((self.product_ids[product_index], self._product_spec_ids(bitmap, product_index)))
+        return groups, None
+
+
+def sort_value_key(value, descending: bool) -> float:
+    """排序字段值的升序排序键（降序取负；缺失值无论升序降序都排在最后）"""
+    if value is None:
+        return math.inf
+    return -value if descending else value
+
+
+def product_sort_key(weigh: Optional[int], createtime: Optional[int], product_id: int) -> Tuple[float, float, int]:
+    """
+    商品展示顺序的升序排序键（对应 weigh DESC, createtime DESC, id DESC；
+    与 MySQL 一致，降序时 NULL 排在最后）
+    """
+    return (
+        -weigh if weigh is not None else math.inf,
+        -createtime if createtime is not None else math.inf,
+        -product_id,
+    )
+
+
+def _to_float(value) -> Optional[float]:
+    """数据库数值（Decimal / None）转 float"""
+    return float(value) if value is not None else None
+
+
+def load_wheel_search_snapshot(db: Session, version: Optional[int]) -> WheelSearchSnapshot:
+    """
+    从数据库加载轮毂搜索快照（4 条查询：商品、规格、商品标签、商品销量）
+    
+    规格的 pcd_lugs / pcd_mm / diameter_inch 尚未回填时，回退解析文本列。
+    销量（已支付订单的商品数量）只在快照重建时刷新。
+    
+    Args:
+        db: 数据库会话
+        version: 商品目录版本号
+    """
+    products_table = get_table("mini_product")
+    specs_table = get_table("mini_product_spec")
+    tag_relation_table = get_table("mini_product_tag_relation")
+    orders_table = get_table("mini_order")
+    order_items_table = get_table("mini_order_item")
+    
+    products = db.execute(
+        select(
+            products_table.c.id,
+            products_table.c.brand_id,
+            products_table.c.finish_name,
+            products_table.c.weigh,
+            products_table.c.createtime,
+            products_table.c.sale_price,
+            products_table.c.stock,
+        )
+        .where(products_table.c.status == "normal")
+        .order_by(
+            products_table.c.weigh.desc(),
+            products_table.c.createtime.desc(),
+            products_table.c.id.desc(),
+        )
+    ).fetchall()
+    
+    spec_rows = db.execute(
+        select(
+            specs_table.c.id,
+            specs_table.c.product_id,
+            specs_table.c.pcd,
+            specs_table.c.pcd_lugs,
+            specs_table.c.pcd_mm,
+            specs_table.c.diameter,
+            specs_table.c.diameter_inch,
+            specs_table.c.width,
+            specs_table.c.offset,
+            specs_table.c.center_bore,
+            specs_table.c.price,
+        )
+        .where(specs_table.c.status == "normal")
+        .order_by(
+            specs_table.c.weigh.desc(),
+            specs_table.c.createtime.desc(),
+            specs_table.c.id.desc(),
+        )
+    ).fetchall()
+    
+    specs = []
+    for row in spec_rows:
+        if row.pcd_lugs and row.pcd_mm is not None:
+            pcd = (int(row.pcd_lugs), round(float(row.pcd_mm), 1))
+        else:
+            pcd = parse_pcd(row.pcd)
+        diameter = row.diameter_inch if row.diameter_inch is not None else parse_diameter(row.diameter)
+        specs.append((
+            row.id,
+            row.product_id,
+            pcd,
+            diameter,
+            parse_number(row.width),
+            parse_number(row.offset),
+            parse_number(row.center_bore),
+            _to_float(row.price),
+        ))
+    
+    tags = db.execute(
+        select(tag_relation_table.c.product_id, tag_relation_table.c.tag_id)
+    ).fetchall()
+    
+    sales = db.execute(
+        select(order_items_table.c.product_id, func.sum(order_items_table.c.quantity))
+        .select_from(
+            order_items_table.join(orders_table, orders_table.c.id == order_items_table.c.order_id)
+        )
+        .where(orders_table.c.payment_status == "paid")
+        .group_by(order_items_table.c.product_id)
+    ).fetchall()
+    
+    return WheelSearchSnapshot(
+        version,
+        [
+            (row.id, row.brand_id, row.finish_name, row.weigh, row.createtime, _to_float(row.sale_price), row.stock)
+            for row in products
+        ],
+        specs,
+        [tuple(row) for row in tags],
+        {product_id: int(quantity or 0) for product_id, quantity in sales},
+    )
+
+
+class WheelSearch:
+    """进程内轮毂搜索快照持有者（按商品目录版本号重建）"""
+    
+    def __init__(self):
+        self._snapshot: Optional[WheelSearchSnapshot] = None
+        self._version: Optional[int] = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+    
+    def get_version(self) -> Optional[int]:
+        """
+        获取当前商品目录版本号
+        
+        每隔 WHEEL_SEARCH_CHECK_SECONDS 从 Redis 读取一次，其余时间返回进程内缓存值；
+        Redis 不可用时返回最近一次读到的版本号（从未读到时为 None）。
+        """
+        now = time.monotonic()
+        if now - self._checked_at >= settings.WHEEL_SEARCH_CHECK_SECONDS:
+            version = catalog_cache.get_version(PRODUCT_CATALOG)
+            if version is not None:
+                self._version = version
+            self._checked_at = now
+        return self._version
+    
+    def get(self, db: Session) -> WheelSearchSnapshot:
+        """
+        获取当前快照
+        
+        首次调用时所有请求等待加载完成；之后版本号变化时只有一个请求负责重建，
+        其余请求继续使用旧快照。Redis 不可用时继续使用已有快照。
+        
+        需要加载时在当前线程查询数据库并构建位图索引；async 接口应通过 run_in_threadpool 调用，
+        重建期间事件循环继续处理其他请求。
+        
+        Args:
+            db: 数据库会话（仅在需要加载快照时使用）
+        """
+        version = self.get_version()
+        snapshot = self._snapshot
+        if snapshot is not None and (version is None or version == snapshot.version):
+            return snapshot
+        
+        if not self._lock.acquire(blocking=snapshot is None):
+            return snapshot
+        try:
+            snapshot = self._snapshot
+            if snapshot is None or (version is not None and version != snapshot.version):
+                snapshot = load_wheel_search_snapshot(db, version)
+                self._snapshot = snapshot
+            return snapshot
+        finally:
+            self._lock.release()
+    
+    def invalidate(self) -> None:
+        """丢弃当前快照（下次访问时重新加载）"""
+        self._snapshot = None
+        self._checked_at = 0.0
+
+
+# 全局轮毂搜索实例
+wheel_search = WheelSearch()
@@ -159,9 +159,14 @@ async def health():
     from app.core.usercache_client import usercache_client
     usercache_ok = usercache_client.ping()
     
+    # 检查目录缓存 Redis 连接
+    from app.core.catalog_cache import catalog_cache
+    catalog_ok = catalog_cache.ping()
+    
     return {
         "status": "ok",
         "redis": "connected" if redis_ok else "disconnected",
         "redis_usercache": "connected" if usercache_ok else "disconnected",
+        "redis_catalog": "connected" if catalog_ok else "disconnected",
     }
 
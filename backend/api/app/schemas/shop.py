@@ -2,7 +2,7 @@
 商品相关的 Pydantic 模式
 """
 from pydantic import BaseModel, Field
-from typing import Optional, List
+from typing import Optional, List, Union
 
 
 class WheelSpecResponse(BaseModel):
@@ -16,6 +16,7 @@ class WheelSpecResponse(BaseModel):
     center_bore: Optional[str] = None
     price: Optional[float] = None
     stock: int = 0
+    axle: Optional[str] = Field(None, description="staggered 车辆时规格适配的车轴：front / rear / both")
 
 
 class WheelProductResponse(BaseModel):
@@ -33,12 +34,61 @@ class WheelProductResponse(BaseModel):
     specs: List[WheelSpecResponse] = Field(default_factory=list)
 
 
+class WheelBrandResponse(BaseModel):
+    """轮毂品牌响应"""
+    id: int
+    name: str
+    slug: Optional[str] = None
+    logo: Optional[str] = None
+
+
+class WheelTagResponse(BaseModel):
+    """商品标签响应"""
+    id: int
+    name: str
+    color: Optional[str] = None
+
+
+class WheelGalleryResponse(BaseModel):
+    """商品图集响应"""
+    id: int
+    title: Optional[str] = None
+    image: Optional[str] = None
+    images: List[str] = Field(default_factory=list)
+
+
+class WheelProductDetailResponse(WheelProductResponse):
+    """轮毂商品详情响应（specs 为全部上架规格）"""
+    slug: Optional[str] = None
+    brand: Optional[WheelBrandResponse] = None
+    tags: List[WheelTagResponse] = Field(default_factory=list)
+    gallery: List[WheelGalleryResponse] = Field(default_factory=list)
+
+
 class WheelsListResponse(BaseModel):
     """轮毂商品列表响应"""
     items: List[WheelProductResponse] = Field(default_factory=list)
+    staggered: bool = Field(False, description="是否按前后轴配对匹配（staggered 车辆）")
     total: int = 0
     page: int = 1
     page_size: int = 20
+    next_cursor: Optional[str] = Field(None, description="下一页游标（最后一页为 null）")
+
+
+class WheelFacetBucket(BaseModel):
+    """分面取值及商品数"""
+    value: Union[int, float, str]
+    label: Optional[str] = Field(None, description="显示名称（品牌分面为品牌名）")
+    count: int
+
+
+class WheelFacetsResponse(BaseModel):
+    """轮毂筛选分面计数响应"""
+    total: int = 0
+    diameter: List[WheelFacetBucket] = Field(default_factory=list, description="直径（英寸），按取值升序")
+    width: List[WheelFacetBucket] = Field(default_factory=list, description="宽度（英寸），按取值升序")
+    brand: List[WheelFacetBucket] = Field(default_factory=list, description="品牌ID，按商品数降序")
+    finish: List[WheelFacetBucket] = Field(default_factory=list, description="涂装名称，按商品数降序")
 
 
 
@@ -2,7 +2,13 @@
 车辆相关的 Pydantic 模式（基于 raw 表结构）
 """
 from pydantic import BaseModel, Field
-from typing import Optional, List
+from typing import Optional, List, Dict
+
+# 批量获取 Fitment 时单次请求的最大 vehicle_id 数量
+FITMENT_BATCH_MAX_SIZE = 300
+
+# 车辆名称搜索单次返回的最大数量
+VEHICLE_SEARCH_MAX_LIMIT = 50
 
 
 class YearResponse(BaseModel):
@@ -30,6 +36,50 @@ class VehicleResponse(BaseModel):
     vehicle_name: Optional[str] = None
 
 
+class VehicleTreeYears(BaseModel):
+    """整树：年份列"""
+    id: List[int]
+    year: List[int]
+    make_start: List[int] = Field(..., description="第 i 个年份的品牌为 makes[make_start[i]:make_start[i+1]]")
+
+
+class VehicleTreeMakes(BaseModel):
+    """整树：品牌列"""
+    model_config = {"protected_namespaces": ()}  # 允许使用 model_start 字段
+    
+    id: List[int]
+    name: List[int] = Field(..., description="names 下标")
+    model_start: List[int] = Field(..., description="第 j 个品牌的型号为 models[model_start[j]:model_start[j+1]]")
+
+
+class VehicleTreeModels(BaseModel):
+    """整树：型号列"""
+    id: List[int]
+    name: List[int] = Field(..., description="names 下标")
+
+
+class VehicleTreeResponse(BaseModel):
+    """车辆目录整树（列式、名称字典编码）"""
+    version: Optional[int] = None
+    names: List[str]
+    years: VehicleTreeYears
+    makes: VehicleTreeMakes
+    models: VehicleTreeModels
+
+
+class VehicleSearchResponse(BaseModel):
+    """车辆名称搜索结果（typeahead）"""
+    model_config = {"protected_namespaces": ()}  # 允许使用 model_id 字段
+    
+    vehicle_id: str
+    year: int
+    make_id: int
+    make_name: str
+    model_id: int
+    model_name: str
+    vehicle_name: Optional[str] = None
+
+
 class FitmentOEM(BaseModel):
     """OEM 适配参数"""
     bolt_pattern: Optional[str] = None
@@ -58,4 +108,17 @@ class FitmentResponse(BaseModel):
     available_sizes: List[dict] = Field(default_factory=list, description="可用尺寸列表：[{diameter: 17, label: '17\" (-3)'}, ...]")
 
 
+class FitmentBatchRequest(BaseModel):
+    """批量 Fitment 请求"""
+    vehicle_ids: List[str] = Field(
+        ...,
+        min_length=1,
+        max_length=FITMENT_BATCH_MAX_SIZE,
+        description=f"车辆ID列表（最多 {FITMENT_BATCH_MAX_SIZE} 个，重复ID会被合并）",
+    )
+
 
+class FitmentBatchResponse(BaseModel):
+    """批量 Fitment 响应"""
+    items: Dict[str, FitmentResponse] = Field(default_factory=dict, description="vehicle_id -> Fitment")
+    missing: List[str] = Field(default_factory=list, description="未找到适配参数的 vehicle_id")
@@ -0,0 +1 @@
+# 运维/基准脚本（python -m scripts.<name>）
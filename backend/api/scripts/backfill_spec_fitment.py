@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+迁移 + 回填：规格表数值化适配列（pcd_lugs / pcd_mm / diameter_inch）
+
+1. 缺少列时 ALTER TABLE 添加：
+     pcd_lugs      TINYINT UNSIGNED NULL   螺栓数量
+     pcd_mm        DECIMAL(5,1)     NULL   孔距（毫米）
+     diameter_inch TINYINT UNSIGNED NULL   直径（英寸）
+2. 缺少索引时创建复合索引：
+     idx_spec_fitment (status, pcd_lugs, pcd_mm, diameter_inch)
+   等值列（status, pcd_lugs）在前，pcd_mm 范围条件其后，diameter_inch 作为索引内过滤，
+   供按适配参数直接查询规格（排查、报表）使用；/shop/wheels 的筛选在轮毂搜索快照中完成。
+3. 用 app.core.wheel_fitment 中与轮毂搜索快照相同的解析函数，从 pcd / diameter 文本列分批回填
+   （快照直接读取数值列，未回填的规格才回退解析文本列）。
+
+mini_product_spec 不在 database/schema.json 中（sync.php 将其列为待删除表），上述列和索引以本脚本为准；
+不要在 schema.json 中补写该表的局部定义：sync.php 会删除定义中未列出的索引并按定义 MODIFY 已有列。
+
+用法（在 backend/api 目录下）：
+  python -m scripts.backfill_spec_fitment                 # 迁移 + 回填全部规格
+  python -m scripts.backfill_spec_fitment --only-missing  # 只回填数值列为空的规格（适合定时任务）
+  python -m scripts.backfill_spec_fitment --dry-run       # 只打印将执行的 DDL 和统计
+"""
+import argparse
+import sys
+from sqlalchemy import inspect, text
+from app.database import engine
+from app.core.wheel_fitment import parse_pcd, parse_diameter
+
+SPEC_TABLE = "mini_product_spec"
+INDEX_NAME = "idx_spec_fitment"
+
+COLUMN_DDL = {
+    "pcd_lugs": "ADD COLUMN `pcd_lugs` TINYINT UNSIGNED NULL COMMENT 'PCD螺栓数量（如：5）' AFTER `pcd`",
+    "pcd_mm": "ADD COLUMN `pcd_mm` DECIMAL(5,1) NULL COMMENT 'PCD直径（毫米，如：114.3）' AFTER `pcd_lugs`",
+    "diameter_inch": "ADD COLUMN `diameter_inch` TINYINT UNSIGNED NULL COMMENT '直径（英寸，纯数字，如：18）' AFTER `diameter`",
+}
+INDEX_DDL = f"ADD INDEX `{INDEX_NAME}` (`status`, `pcd_lugs`, `pcd_mm`, `diameter_inch`)"
+
+
+def parse_args():
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description="规格表数值化适配列迁移与回填")
+    parser.add_argument("--batch-size", type=int, default=2000, help="每批回填的规格数量")
+    parser.add_argument("--only-missing", action="store_true", help="只回填数值列为空的规格")
+    parser.add_argument("--dry-run", action="store_true", help="只打印 DDL 和统计，不写入")
+    return parser.parse_args()
+
+
+def migrate(dry_run: bool) -> None:
+    """添加缺失的列和复合索引"""
+    inspector = inspect(engine)
+    existing_columns = {col["name"] for col in inspector.get_columns(SPEC_TABLE)}
+    existing_indexes = {idx["name"] for idx in inspector.get_indexes(SPEC_TABLE)}
+    
+    clauses = [ddl for name, ddl in COLUMN_DDL.items() if name not in existing_columns]
+    if INDEX_NAME not in existing_indexes:
+        clauses.append(INDEX_DDL)
+    
+    if not clauses:
+        print(f"[OK] {SPEC_TABLE} 已包含数值化适配列和索引")
+        return
+    
+    sql = f"ALTER TABLE `{SPEC_TABLE}` " + ", ".join(clauses)
+    print(f"[DDL] {sql}")
+    if dry_run:
+        return
+    
+    with engine.begin() as conn:
+        conn.execute(text(sql))
+    print(f"[OK] {SPEC_TABLE} 迁移完成")
+
+
+def backfill(batch_size: int, only_missing: bool, dry_run: bool) -> None:
+    """按 id 分批回填数值列"""
+    where = "id > :last_id"
+    if only_missing:
+        where += " AND (pcd_lugs IS NULL OR pcd_mm IS NULL OR diameter_inch IS NULL)"
+    
+    select_sql = text(
+        f"SELECT id, pcd, diameter FROM `{SPEC_TABLE}` WHERE {where} ORDER BY id LIMIT :limit"
+    )
+    update_sql = text(
+        f"UPDATE `{SPEC_TABLE}` SET pcd_lugs = :pcd_lugs, pcd_mm = :pcd_mm, "
+        f"diameter_inch = :diameter_inch WHERE id = :id"
+    )
+    
+    last_id = 0
+    total = 0
+    unparsed = 0
+    while True:
+        with engine.begin() as conn:
+            rows = conn.execute(select_sql, {"last_id": last_id, "limit": batch_size}).fetchall()
+            if not rows:
+                break
+            
+            values = []
+            for row in rows:
+                pcd_value = parse_pcd(row.pcd)
+                diameter_value = parse_diameter(row.diameter)
+                if pcd_value is None or diameter_value is None:
+                    unparsed += 1
+                values.append({
+                    "id": row.id,
+                    "pcd_lugs": pcd_value[0] if pcd_value else None,
+                    "pcd_mm": pcd_value[1] if pcd_value else None,
+                    "diameter_inch": diameter_value,
+                })
+            
+            if not dry_run:
+                conn.execute(update_sql, values)
+        
+        last_id = rows[-1].id
+        total += len(rows)
+        print(f"[OK] 已处理规格: {total} 条（最后 id: {last_id}）")
+    
+    print(f"[完成] 回填规格 {total} 条，其中 {unparsed} 条 pcd/diameter 无法解析（保留 NULL）")
+
+
+def main():
+    """主函数"""
+    args = parse_args()
+    try:
+        migrate(args.dry_run)
+        if args.dry_run:
+            # dry-run 时列可能尚不存在，只统计可解析情况
+            print("[INFO] dry-run：跳过回填写入")
+        backfill(args.batch_size, args.only_missing and not args.dry_run, args.dry_run)
+    except Exception as e:
+        print(f"[ERROR] 回填失败: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+基准：用户缓存载荷编解码（app/core/cache_codec.py）
+
+对地址缓存的典型载荷（单个地址、不同长度的地址列表）比较：
+- json: 原先的 json.dumps(..., ensure_ascii=False) / json.loads
+- codec-json: cache_codec 的 JSON（安装 orjson 时使用 orjson）
+- codec-json+zlib: 同上并强制压缩
+- codec-msgpack / codec-msgpack+zlib: MessagePack（需安装 msgpack）
+
+输出每个条目的编码 / 解码耗时（微秒）和字节数；指定 --redis 时写入用户缓存库（DB=3）的临时哈希，
+用 MEMORY USAGE 统计每个条目占用的 Redis 内存（测试键随后删除）。
+
+用法（在 backend/api 目录下）：
+  python -m scripts.bench_cache_codec
+  python -m scripts.bench_cache_codec --sizes 1,5,20,50 --repeat 20000 --redis
+"""
+import argparse
+import json
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from app.core import cache_codec as codec_module
+from app.core.cache_codec import CacheCodec
+from app.core.usercache_client import usercache_client
+
+BENCH_KEY_PREFIX = "usercache:bench:codec"
+
+
+def parse_args():
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description="用户缓存编解码基准")
+    parser.add_argument("--sizes", type=str, default="1,5,20,50", help="逗号分隔的地址列表长度（1 表示单个地址）")
+    parser.add_argument("--repeat", type=int, default=10000, help="每项编解码的次数")
+    parser.add_argument("--redis", action="store_true", help="同时统计 Redis 内存占用（MEMORY USAGE）")
+    return parser.parse_args()
+
+
+def build_address(address_id: int) -> Dict[str, Any]:
+    """构造一个与 mini_user_address 行结构相同的地址"""
+    return {
+        "id": address_id,
+        "user_id": 10086,
+        "address_type": "shipping" if address_id % 3 else "billing",
+        "is_default": address_id == 1,
+        "first_name": "Alexander",
+        "last_name": "Thompson",
+        "company": "Rimsurge Auto Parts Ltd." if address_id % 2 else None,
+        "phone_country_code": "+1",
+        "phone_number": f"604555{address_id:04d}",
+        "country_code": "CA",
+        "province": "British Columbia",
+        "province_code": "BC",
+        "city": "Vancouver",
+        "district": None,
+        "address_line1": f"{1000 + address_id} West Georgia Street",
+        "address_line2": f"Suite {address_id}00",
+        "postal_code": "V6E 4A2",
+        "tax_region": "BC",
+        "shipping_zone": "CA-WEST",
+        "is_shippable": True,
+        "createtime": 1700000000 + address_id,
+        "updatetime": 1700000000 + address_id,
+        "deletetime": None,
+    }
+
+
+def build_payload(size: int) -> Any:
+    """单个地址（size=1）或地址列表"""
+    if size == 1:
+        return build_address(1)
+    return [build_address(i) for i in range(1, size + 1)]
+
+
+def build_variants() -> List[Tuple[str, Callable[[Any], Any], Callable[[Any], Any]]]:
+    """(名称, 编码函数, 解码函数)"""
+    variants = [
+        (
+            "json",
+            lambda value: json.dumps(value, ensure_ascii=False),
+            json.loads,
+        ),
+    ]
+    for name, codec in (
+        ("codec-json", CacheCodec("json", 0)),
+        ("codec-json+zlib", CacheCodec("json", 1)),
+    ):
+        variants.append((name, codec.encode, codec.decode))
+    if codec_module.msgpack is not None:
+        for name, codec in (
+            ("codec-msgpack", CacheCodec("msgpack", 0)),
+            ("codec-msgpack+zlib", CacheCodec("msgpack", 1)),
+        ):
+            variants.append((name, codec.encode, codec.decode))
+    return variants
+
+
+def measure(func: Callable[[Any], Any], value: Any, repeat: int) -> float:
+    """单次调用的平均耗时（微秒）"""
+    started = time.perf_counter()
+    for _ in range(repeat):
+        func(value)
+    return (time.perf_counter() - started) * 1_000_000 / repeat
+
+
+def redis_memory(field: str, data: Any) -> Optional[int]:
+    """把条目写入临时哈希，返回哈希的 MEMORY USAGE（字节；Redis 不可用时为 None）"""
+    key = f"{BENCH_KEY_PREFIX}:{field}"
+    try:
+        usercache_client.raw_client.hset(key, field, data)
+        return usercache_client.raw_client.memory_usage(key, samples=0)
+    except Exception:
+        return None
+    finally:
+        usercache_client.delete(key)
+
+
+def main():
+    """主函数"""
+    args = parse_args()
+    variants = build_variants()
+    
+    print(f"orjson: {'yes' if codec_module.orjson is not None else 'no'}  "
+          f"msgpack: {'yes' if codec_module.msgpack is not None else 'no'}")
+    header = f"{'size':>5} {'codec':<20} {'bytes':>7} {'encode_us':>10} {'decode_us':>10}"
+    if args.redis:
+        header += f" {'redis_bytes':>12}"
+    print(header)
+    
+    for size in [int(s) for s in args.sizes.split(",")]:
+        payload = build_payload(size)
+        for name, encode, decode in variants:
+            data = encode(payload)
+            assert decode(data) == payload, name
+            encoded_size = len(data.encode("utf-8") if isinstance(data, str) else data)
+            line = (
+                f"{size:>5} {name:<20} {encoded_size:>7} "
+                f"{measure(encode, payload, args.repeat):>10.2f} {measure(decode, data, args.repeat):>10.2f}"
+            )
+            if args.redis:
+                memory = redis_memory(f"{size}:{name}", data)
+                line += f" {memory if memory is not None else '-':>12}"
+            print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+基准：统计 /api/v1/shop/wheels 每次请求执行的 SQL 语句数
+
+使用内存 SQLite 构造 mini_product / mini_product_spec 测试数据，
+对不同 page_size 发起请求并统计语句数与耗时，用于确认规格加载没有 N+1。
+
+用法（在 backend/api 目录下）：
+  python -m scripts.bench_wheels_queries
+  python -m scripts.bench_wheels_queries --products 500 --specs 4 --page-sizes 10,50,100
+"""
+import argparse
+import time
+from sqlalchemy import create_engine, event, text, MetaData
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from fastapi.testclient import TestClient
+
+import app.database as database
+from app.main import app
+
+
+SCHEMA_SQL = [
+    """
+    CREATE TABLE mini_product (
+        id INTEGER PRIMARY KEY, brand_id INT, name TEXT, image TEXT,
+        sale_price REAL, original_price REAL, price_per TEXT, stock INT,
+        status TEXT, weigh INT, createtime INT, finish_name TEXT
+    )
+    """,
+    """
+    CREATE TABLE mini_product_spec (
+        id INTEGER PRIMARY KEY, product_id INT, size TEXT, diameter TEXT,
+        diameter_inch INT, width TEXT, pcd TEXT, pcd_lugs INT, pcd_mm REAL,
+        offset TEXT, center_bore TEXT, price REAL, stock INT, status TEXT,
+        weigh INT, createtime INT
+    )
+    """,
+    """
+    CREATE TABLE mini_vehicle_detail (
+        vehicle_id TEXT PRIMARY KEY, year_id INT, make_id INT, model_id INT,
+        vehicle_name TEXT, bolt_pattern_front TEXT, bolt_pattern_rear TEXT,
+        rim_diameter_front TEXT, rim_diameter_rear TEXT
+    )
+    """,
+    """
+    CREATE TABLE mini_product_tag_relation (
+        id INTEGER PRIMARY KEY, product_id INT, tag_id INT, createtime INT
+    )
+    """,
+    """
+    CREATE TABLE mini_wheel_brand (
+        id INTEGER PRIMARY KEY, name TEXT, slug TEXT, logo TEXT, status TEXT
+    )
+    """,
+    """
+    CREATE TABLE mini_order (
+        id INTEGER PRIMARY KEY, payment_status TEXT
+    )
+    """,
+    """
+    CREATE TABLE mini_order_item (
+        id INTEGER PRIMARY KEY, order_id INT, product_id INT, product_spec_id INT, quantity INT
+    )
+    """,
+]
+
+
+def parse_args():
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description="get_wheels SQL 语句数基准")
+    parser.add_argument("--products", type=int, default=300, help="商品数量")
+    parser.add_argument("--specs", type=int, default=3, help="每个商品的规格数量")
+    parser.add_argument("--page-sizes", type=str, default="10,20,50,100", help="逗号分隔的 page_size 列表")
+    parser.add_argument("--repeat", type=int, default=20, help="每个 page_size 的请求次数")
+    return parser.parse_args()
+
+
+def seed(engine, products: int, specs: int):
+    """写入测试数据"""
+    with engine.begin() as conn:
+        for sql in SCHEMA_SQL:
+            conn.execute(text(sql))
+        conn.execute(text("INSERT INTO mini_wheel_brand VALUES (1, 'Brand', 'brand', NULL, 'normal')"))
+        spec_id = 1
+        for product_id in range(1, products + 1):
+            conn.execute(
+                text(
+                    "INSERT INTO mini_product VALUES "
+                    "(:id, 1, :name, NULL, 100, 120, 'set', 4, 'normal', :weigh, :ct, 'Gloss Black')"
+                ),
+                {"id": product_id, "name": f"Wheel {product_id}", "weigh": product_id % 10, "ct": product_id},
+            )
+            for i in range(specs):
+                conn.execute(
+                    text(
+                        "INSERT INTO mini_product_spec VALUES "
+                        "(:id, :pid, '18x8.5 +35', '18\"', 18, '8.5', '5x114.3', 5, 114.3, "
+                        "'35', '73.1', 200, 4, 'normal', :id, :id)"
+                    ),
+                    {"id": spec_id, "pid": product_id},
+                )
+                spec_id += 1
+
+
+def main():
+    """主函数"""
+    args = parse_args()
+    
+    engine = create_engine(
+        "sqlite://",
+        poolclass=StaticPool,
+        connect_args={"check_same_thread": False},
+    )
+    # 替换全局引擎与元数据，让 get_table() 反射 SQLite 表
+    database.engine = engine
+    database.metadata = MetaData()
+    session_factory = sessionmaker(bind=engine)
+    
+    seed(engine, args.products, args.specs)
+    
+    statements = {"count": 0}
+    
+    @event.listens_for(engine, "before_cursor_execute")
+    def _count(*_):
+        statements["count"] += 1
+    
+    def override_get_db():
+        db = session_factory()
+        try:
+            yield db
+        finally:
+            db.close()
+    
+    app.dependency_overrides[database.get_db] = override_get_db
+    client = TestClient(app)
+    
+    # 预热（表反射、搜索快照加载会产生额外语句，不计入统计）
+    client.get("/api/v1/shop/wheels", params={"pcd": "5x114.3", "diameter": 18})
+    
+    print(f"{'page_size':>10} {'items':>6} {'statements':>11} {'avg_ms':>8}")
+    for page_size in [int(p) for p in args.page_sizes.split(",")]:
+        statements["count"] = 0
+        started = time.perf_counter()
+        for _ in range(args.repeat):
+            response = client.get(
+                "/api/v1/shop/wheels",
+                params={"pcd": "5x114.3", "diameter": 18, "page_size": page_size},
+            )
+        elapsed_ms = (time.perf_counter() - started) * 1000 / args.repeat
+        items = len(response.json()["items"])
+        print(f"{page_size:>10} {items:>6} {statements['count'] / args.repeat:>11.1f} {elapsed_ms:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ETL 后物化步骤：预生成所有车辆的 Fitment 文档到 Redis（DB=4）
+
+流程：
+1. 读取当前车辆目录版本号（catalog:ver:vehicle，ETL 导入完成后已递增）
+2. 流式读取 mini_vehicle_detail，按批 HSET 到临时哈希
+   catalog:fitment:v{version}:building
+3. RENAME 为 catalog:fitment:v{version}（原子替换，API 不会读到半成品）
+4. 删除其他版本的旧哈希
+5. 统计适配分组（Fitment Class）数量：同组车辆在 /shop/wheels 共用一份匹配结果
+
+用法（在 backend/api 目录下，ETL 完成后执行）：
+  python -m scripts.materialize_fitment
+  python -m scripts.materialize_fitment --batch-size 5000
+"""
+import argparse
+import sys
+import time
+from sqlalchemy import select
+from app.database import SessionLocal, get_table
+from app.core.catalog_cache import catalog_cache
+from app.core.vehicle_catalog import VEHICLE_CATALOG
+from app.core.fitment_store import (
+    FITMENT_KEY_PREFIX,
+    FitmentStore,
+    build_fitment_document,
+    serialize_fitment,
+)
+from app.core.fitment_class import build_fitment_signature
+
+
+def parse_args():
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description="物化车辆 Fitment 文档到 Redis")
+    parser.add_argument("--batch-size", type=int, default=2000, help="每批写入 Redis 的车辆数量")
+    return parser.parse_args()
+
+
+def materialize(batch_size: int) -> int:
+    """
+    物化所有车辆的 Fitment 文档
+    
+    Returns:
+        写入的车辆数量
+    """
+    version = catalog_cache.get_version(VEHICLE_CATALOG)
+    if version is None:
+        raise RuntimeError("无法读取车辆目录版本号（Redis 不可用）")
+    
+    final_key = FitmentStore.get_key(version)
+    building_key = f"{final_key}:building"
+    redis = catalog_cache.client
+    redis.delete(building_key)
+    
+    detail_table = get_table("mini_vehicle_detail")
+    db = SessionLocal()
+    total = 0
+    signatures = set()
+    try:
+        result = db.execute(
+            select(detail_table).execution_options(stream_results=True, yield_per=batch_size)
+        )
+        for rows in result.partitions(batch_size):
+            mapping = {}
+            for row in rows:
+                document = build_fitment_document(row)
+                mapping[row.vehicle_id] = serialize_fitment(document)
+                signatures.add(build_fitment_signature(document))
+            redis.hset(building_key, mapping=mapping)
+            total += len(mapping)
+            print(f"[OK] 已物化车辆: {total} 条")
+    finally:
+        db.close()
+    
+    if total == 0:
+        redis.delete(building_key)
+        return 0
+    
+    redis.rename(building_key, final_key)
+    
+    # 清理其他版本的旧哈希
+    for key in redis.scan_iter(match=f"{FITMENT_KEY_PREFIX}:v*", count=100):
+        if key != final_key and not key.endswith(":building"):
+            redis.delete(key)
+    
+    print(f"[OK] Fitment 文档已写入 {final_key}")
+    print(f"[OK] 适配分组: {len(signatures)} 组（{total} 辆车）")
+    return total
+
+
+def main():
+    """主函数"""
+    args = parse_args()
+    started = time.perf_counter()
+    try:
+        total = materialize(args.batch_size)
+    except Exception as e:
+        print(f"[ERROR] 物化失败: {e}")
+        sys.exit(1)
+    print(f"[完成] 共物化 {total} 辆车，耗时 {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
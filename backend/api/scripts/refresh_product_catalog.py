@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+商品目录缓存手动失效（mini_product / mini_product_spec 变更后执行）
+
+API 读取 mini_product / mini_product_spec，后台（FastAdmin）的商品 / 规格模型维护的是
+mini_wheel_product / mini_wheel_product_spec，其钩子不会覆盖 API 读取的表。
+通过 SQL、导入脚本等方式修改 mini_product / mini_product_spec 后，需要执行本脚本：
+
+- 默认：递增商品目录版本号（catalog:ver:product），各 worker 在 WHEEL_SEARCH_CHECK_SECONDS 内
+  重建轮毂搜索快照，/shop/wheels 结果缓存与所有商品详情缓存随版本号失效；
+  覆盖层按版本号隔离，旧版本的覆盖层不再被读取，并在这里删除
+- --product-id：只递增指定商品的版本号（catalog:product:{id}:ver），只使这些商品的详情缓存失效
+  （只改了详情页展示字段、不影响列表 / 筛选时使用）
+- --overlay：由 mini_product_spec.price / stock 生成当前版本的规格实时覆盖层
+  （catalog:spec:live:v{version}），写入临时哈希后 RENAME 原子替换，并删除其他版本的覆盖层；
+  只改了价格 / 库存时使用，不递增版本号（各 worker 在 WHEEL_SEARCH_CHECK_SECONDS 内开始使用）
+
+用法（在 backend/api 目录下）：
+  python -m scripts.refresh_product_catalog
+  python -m scripts.refresh_product_catalog --product-id 12 --product-id 15
+  python -m scripts.refresh_product_catalog --overlay
+"""
+import argparse
+import sys
+from sqlalchemy import select
+from app.database import SessionLocal, get_table
+from app.core.catalog_cache import catalog_cache, PRODUCT_CATALOG
+from app.core.product_detail import ProductDetailCache
+from app.core.spec_overlay import SPEC_LIVE_KEY_PREFIX, SpecOverlay, serialize_live
+
+
+def parse_args():
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description="商品目录缓存手动失效")
+    parser.add_argument(
+        "--product-id",
+        type=int,
+        action="append",
+        default=[],
+        help="只使指定商品的详情缓存失效（可重复）",
+    )
+    parser.add_argument("--overlay", action="store_true", help="重新生成规格实时价格 / 库存覆盖层")
+    parser.add_argument("--batch-size", type=int, default=2000, help="生成覆盖层时每批写入 Redis 的规格数量")
+    return parser.parse_args()
+
+
+def delete_stale_overlays(version: int) -> int:
+    """
+    删除其他版本的覆盖层
+    
+    Args:
+        version: 保留的商品目录版本号
+    
+    Returns:
+        删除的键数量
+    """
+    keep_key = SpecOverlay.get_key(version)
+    redis = catalog_cache.client
+    deleted = 0
+    for key in redis.scan_iter(match=f"{SPEC_LIVE_KEY_PREFIX}:v*", count=100):
+        if key != keep_key and not key.endswith(":building"):
+            deleted += redis.delete(key)
+    return deleted
+
+
+def refresh_overlay(batch_size: int) -> int:
+    """
+    由 mini_product_spec 生成当前商品目录版本的规格实时覆盖层
+    
+    Returns:
+        写入的规格数量
+    """
+    version = catalog_cache.get_version(PRODUCT_CATALOG)
+    if version is None:
+        raise RuntimeError("无法读取商品目录版本号（Redis 不可用）")
+    
+    final_key = SpecOverlay.get_key(version)
+    building_key = f"{final_key}:building"
+    redis = catalog_cache.client
+    redis.delete(building_key)
+    
+    specs_table = get_table("mini_product_spec")
+    db = SessionLocal()
+    total = 0
+    try:
+        result = db.execute(
+            select(specs_table.c.id, specs_table.c.price, specs_table.c.stock)
+            .execution_options(stream_results=True, yield_per=batch_size)
+        )
+        for rows in result.partitions(batch_size):
+            mapping = {
+                row.id: serialize_live(float(row.price) if row.price is not None else None, row.stock or 0)
+                for row in rows
+            }
+            redis.hset(building_key, mapping=mapping)
+            total += len(mapping)
+    finally:
+        db.close()
+    
+    if total == 0:
+        redis.delete(building_key, final_key)
+    else:
+        redis.rename(building_key, final_key)
+    delete_stale_overlays(version)
+    return total
+
+
+def main():
+    """主函数"""
+    args = parse_args()
+    
+    if args.overlay:
+        try:
+            total = refresh_overlay(args.batch_size)
+        except Exception as e:
+            print(f"[ERROR] 生成覆盖层失败: {e}")
+            sys.exit(1)
+        print(f"[OK] 覆盖层已写入: {total} 个规格")
+        return
+    
+    if args.product_id:
+        for product_id in args.product_id:
+            try:
+                version = catalog_cache.client.incr(ProductDetailCache.get_version_key(product_id))
+            except Exception as e:
+                print(f"[ERROR] 递增商品 {product_id} 版本号失败: {e}")
+                sys.exit(1)
+            print(f"[OK] 商品 {product_id} 版本号: {version}")
+        return
+    
+    version = catalog_cache.bump_version(PRODUCT_CATALOG)
+    if version is None:
+        print("[ERROR] 递增商品目录版本号失败（Redis 不可用）")
+        sys.exit(1)
+    print(f"[OK] 商品目录版本号: {version}")
+    try:
+        deleted = delete_stale_overlays(version)
+    except Exception as e:
+        print(f"[WARN] 删除旧版本覆盖层失败（旧覆盖层不会再被读取）: {e}")
+        return
+    print(f"[OK] 已删除旧版本覆盖层: {deleted} 个")
+
+
+if __name__ == "__main__":
+    main()
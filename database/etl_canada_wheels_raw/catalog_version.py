@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ETL 完成后递增车辆目录版本号（Redis：catalog:ver:vehicle）
+
+API 进程按该版本号判断车辆目录快照是否需要重新加载。
+Redis 配置与 API 一致，从环境变量读取：
+  REDIS_HOST / REDIS_PORT / REDIS_PASSWORD / REDIS_CATALOG_DB
+"""
+import os
+from typing import Optional
+
+VEHICLE_CATALOG_VERSION_KEY = "catalog:ver:vehicle"
+
+
+def bump_vehicle_catalog_version() -> Optional[int]:
+    """
+    递增车辆目录版本号
+    
+    Returns:
+        新版本号；redis 库未安装或 Redis 不可用时返回 None（不影响 ETL 结果，
+        API 进程会继续使用旧快照，直到重启或版本号被再次递增）
+    """
+    try:
+        import redis
+    except ImportError:
+        print("[WARN] 未安装 redis 库，跳过目录版本号递增（pip install redis）")
+        return None
+    
+    redis_kwargs = {
+        'host': os.getenv('REDIS_HOST', 'localhost'),
+        'port': int(os.getenv('REDIS_PORT', '6379')),
+        'db': int(os.getenv('REDIS_CATALOG_DB', '4')),
+        'socket_connect_timeout': 5,
+        'socket_timeout': 5,
+    }
+    password = os.getenv('REDIS_PASSWORD', 'a123123')
+    if password:
+        redis_kwargs['password'] = password
+    
+    try:
+        version = redis.Redis(**redis_kwargs).incr(VEHICLE_CATALOG_VERSION_KEY)
+        print(f"[OK] 车辆目录版本号已递增: {VEHICLE_CATALOG_VERSION_KEY} = {version}")
+        return version
+    except Exception as e:
+        print(f"[WARN] 递增车辆目录版本号失败: {e}")
+        return None
+
+
+if __name__ == "__main__":
+    bump_vehicle_catalog_version()
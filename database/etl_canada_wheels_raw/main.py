@@ -13,6 +13,7 @@ from pathlib import Path
 from typing import List, Optional
 from extract import CanadaWheelsRawExtractor
 from load import MySQLRawLoader
+from catalog_version import bump_vehicle_catalog_version
 
 
 def parse_args():
@@ -166,6 +167,10 @@ def main():
             loader.load_models(models_data)
             loader.load_vehicle_details(vehicle_details_data)
             
+            # 通知 API 进程重新加载车辆目录快照
+            print("\n[步骤 3] 递增车辆目录版本号...")
+            bump_vehicle_catalog_version()
+            
             print("\n" + "=" * 60)
             print("[完成] 所有数据导入完成！")
             print("=" * 60)
@@ -175,6 +180,8 @@ def main():
             else:
                 print(f"\n请运行 verify_data.py 验证数据:")
                 print(f"  python verify_data.py")
+            print(f"\n请在 backend/api 目录执行 Fitment 物化（预生成 /vehicles/fitment 结果）:")
+            print(f"  python -m scripts.materialize_fitment")
             print("=" * 60)
             
         except Exception as e: